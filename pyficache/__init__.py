@@ -82,32 +82,52 @@ Summary
 __docformat__ = "restructuredtext"
 
 # Export some functions
-from pyficache.pyasm import PyasmLexer
+from pyficache.pyasm import FastPyasmLexer, PyasmLexer
+from pyficache.analysis_store import code_key, set_analysis_store
+from pyficache.decompiled import register_decompiler, set_decompiled_store
+from pyficache.code_pyasm import code_pyasm, get_code_pyasm_line, pyc_code_pyasm
+from pyficache.file_view import FileView, open_view
+from pyficache.frame_source import FrameSource, frame_source
+from pyficache.position_table import CodePositionTable, position_for_offset
 from pyficache.code_positions import (
     code_loop_for_positions,
     code_position_cache,
+    code_position_cache_stats,
     update_code_position_cache,
 )
 
 from pyficache.main import (
     PYVER,
+    RangeLine,
     add_remap_pat,
+    breakpoint_code_keys,
+    breakpoint_code_offsets,
     cache_code_lines,
     cache_file,
+    cache_files,
+    cache_frame_files,
     cache_script,
     cached_files,
     checkcache,
     clear_file_cache,
     clear_file_format_cache,
+    clear_resolve_cache,
     code_line_info,
     code_lines,
     code_offset_info,
+    codes_to_instrument,
     dark_terminal_formatter,
     file_cache,
     file2file_remap,
+    get_code_tables,
     get_linecache_info,
     get_pyasm_line,
+    get_pyasm_lines_for_source,
+    get_pyasm_location,
+    get_valid_lines,
     getline,
+    getline_range,
+    getline_window,
     getlines,
     highlight_array,
     highlight_string,
@@ -118,11 +138,13 @@ from pyficache.main import (
     light_terminal_formatter,
     maxline,
     path,
+    pyasm_file_info,
     pyasm_lexer,
     remap_file,
     remap_file_lines,
     remap_file_pat,
     remove_remap_file,
+    resolve_breakpoint_lines,
     resolve_name_to_path,
     sha1,
     size,
@@ -135,31 +157,57 @@ from pyficache.main import (
     update_cache,
     update_script_cache,
 )
+from pyficache.pyasm_stream import stream_pyasm_file, unstream_pyasm_file
+from pyficache.remap_snapshot import load_remap_snapshot, save_remap_snapshot
+from pyficache.valid_lines import ValidLines
 from pyficache.version import __version__
 
 __all__ = [
     "__version__",
+    "CodePositionTable",
+    "FastPyasmLexer",
+    "FileView",
+    "FrameSource",
     "PYVER",
     "PyasmLexer",
+    "RangeLine",
+    "ValidLines",
     "add_remap_pat",
+    "breakpoint_code_keys",
+    "breakpoint_code_offsets",
     "cache_code_lines",
     "cache_file",
+    "cache_files",
+    "cache_frame_files",
     "cache_script",
     "cached_files",
     "checkcache",
     "clear_file_cache",
     "clear_file_format_cache",
+    "clear_resolve_cache",
     "code_line_info",
     "code_lines",
     "code_loop_for_positions",
     "code_offset_info",
+    "codes_to_instrument",
+    "code_pyasm",
+    "code_key",
     "code_position_cache",
+    "code_position_cache_stats",
     "dark_terminal_formatter",
     "file_cache",
     "file2file_remap",
+    "frame_source",
+    "get_code_pyasm_line",
+    "get_code_tables",
     "get_linecache_info",
     "get_pyasm_line",
+    "get_pyasm_lines_for_source",
+    "get_pyasm_location",
+    "get_valid_lines",
     "getline",
+    "getline_range",
+    "getline_window",
     "getlines",
     "highlight_array",
     "highlight_string",
@@ -168,23 +216,46 @@ __all__ = [
     "is_mapped_file",
     "is_python_assembly_file",
     "light_terminal_formatter",
+    "load_remap_snapshot",
     "maxline",
+    "open_view",
     "path",
+    "pyasm_file_info",
     "pyasm_lexer",
+    "position_for_offset",
+    "pyc_code_pyasm",
+    "register_decompiler",
     "remap_file",
     "remap_file_lines",
     "remap_file_pat",
     "remove_remap_file",
+    "resolve_breakpoint_lines",
     "resolve_name_to_path",
+    "save_remap_snapshot",
+    "set_analysis_store",
+    "set_decompiled_store",
     "sha1",
     "size",
     "stat",
+    "stream_pyasm_file",
     "terminal_256_formatter",
     "trace_line_numbers",
     "uncache_script",
     "unmap_file",
     "unmap_file_line",
+    "unstream_pyasm_file",
     "update_cache",
     "update_code_position_cache",
     "update_script_cache",
+    "warm_up",
 ]
+
+
+def __getattr__(name: str):
+    # pyficache.warmup is imported on first use, so that it is not already
+    # in sys.modules when run with "python -m pyficache.warmup".
+    if name == "warm_up":
+        from pyficache.warmup import warm_up
+
+        return warm_up
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2026 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Awaitable versions of the main pyficache routines, for asyncio programs
+such as debug-adapter servers.
+
+Reading, decoding and highlighting a file would block the event loop,
+so when a file is not already cached in the form asked for, the work is
+done by the synchronous routine in a thread of the loop's default
+executor. At most `max_concurrency` such loads run at once for each
+event loop, and loads of the same file that are in progress at the same
+time are done only once: later callers wait for the first one. When the
+file is already cached, the answer comes straight from the cache without
+leaving the loop.
+
+The loads fill the same cache as the synchronous API, which can still be
+used alongside this module. Reads of the cache made on the loop hold
+pyficache.main.cache_lock, as the synchronous routines that change the
+cache do; when another thread holds it, the read is done in a thread
+rather than block the loop waiting for it.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from weakref import WeakKeyDictionary
+
+import pyficache.main as main
+from pyficache.frame_source import FrameSource, frame_source as sync_frame_source
+
+# The largest number of loads run at once in threads, for each event loop.
+max_concurrency = 8
+
+# The semaphore that bounds the loads of each event loop.
+loop_semaphores: "WeakKeyDictionary[Any, asyncio.Semaphore]" = WeakKeyDictionary()
+
+# Loads in progress, for each event loop, keyed by what is being loaded.
+loop_loads: "WeakKeyDictionary[Any, Dict[Hashable, asyncio.Task]]" = (
+    WeakKeyDictionary()
+)
+
+
+async def run_in_thread(func: Callable, *args) -> Any:
+    """Return the result of func(*args), run in a thread of the running
+    loop's default executor, waiting first if `max_concurrency` calls are
+    already running."""
+    loop = asyncio.get_running_loop()
+    semaphore = loop_semaphores.get(loop)
+    if semaphore is None:
+        semaphore = loop_semaphores[loop] = asyncio.Semaphore(max_concurrency)
+    async with semaphore:
+        return await loop.run_in_executor(None, func, *args)
+
+
+async def run_once(key: Hashable, func: Callable, *args) -> Any:
+    """Like run_in_thread(), but if a call with the same `key` is already
+    in progress, wait for its result instead of making another call.
+    Cancelling one caller does not cancel the call the others wait for."""
+    loop = asyncio.get_running_loop()
+    loads = loop_loads.get(loop)
+    if loads is None:
+        loads = loop_loads[loop] = {}
+    task = loads.get(key)
+    if task is None:
+        task = loop.create_task(run_in_thread(func, *args))
+        loads[key] = task
+        task.add_done_callback(lambda _: loads.pop(key, None))
+    return await asyncio.shield(task)
+
+
+def opts_key(opts) -> Hashable:
+    """Return a key for `opts` in run_once() keys, so that only calls with
+    the same options are merged. If `opts` cannot be hashed, the key
+    matches no other."""
+    if not isinstance(opts, dict):
+        return opts
+    try:
+        key = frozenset(opts.items())
+        hash(key)
+    except TypeError:
+        return object()
+    return key
+
+
+async def read_cached(func: Callable, *args) -> Any:
+    """Return the result of func(*args), which reads from the cache,
+    holding main.cache_lock. It is called on the loop if the lock is
+    free, and otherwise in a thread, so that the loop does not wait while
+    another thread changes the cache."""
+    if main.cache_lock.acquire(blocking=False):
+        try:
+            return func(*args)
+        finally:
+            main.cache_lock.release()
+
+    def locked_func():
+        with main.cache_lock:
+            return func(*args)
+
+    return await run_in_thread(locked_func)
+
+
+def is_loaded(filename: str, opts) -> bool:
+    """Return True if `filename` is cached with lines formatted as `opts`
+    asks for and need not be checked for changes."""
+    if main.get_option("reload_on_change", opts):
+        return False
+    file_info = main.file_cache.get(filename)
+    return (
+        file_info is not None
+        and main.highlight_format(opts)[0] in file_info.lines
+        and (
+            file_info.pyasm_mapping is not None
+            or not main.is_python_assembly_file(filename)
+        )
+    )
+
+
+def without_reload(opts) -> dict:
+    """Return `opts` for reading a file that has just been loaded, so that
+    it is not checked for changes again on the event loop."""
+    return dict(opts, reload_on_change=False)
+
+
+async def load(file_or_script: str, opts) -> Optional[str]:
+    """Make sure `file_or_script` is cached as `opts` asks for, and return
+    the name it is cached under after file remapping, or None if it cannot
+    be read."""
+    filename = main.unmap_file(file_or_script)
+    if not is_loaded(filename, opts):
+        # getline() caches the file, or its decompiled source, highlights it,
+        # and computes its line count.
+        await run_once(
+            ("getline", filename, opts_key(opts)),
+            main.getline,
+            file_or_script,
+            1,
+            dict(opts),
+        )
+        filename = main.unmap_file(file_or_script)
+        if filename not in main.file_cache:
+            return None
+    return filename
+
+
+async def cache_file(
+    filename: str, reload_on_change=False, opts=main.default_opts
+) -> Optional[str]:
+    """Awaitable version of cache_file()."""
+    if not reload_on_change:
+        file_info = main.file_cache.get(filename)
+        if file_info is not None:
+            return file_info.path
+    return await run_once(
+        ("cache_file", filename, reload_on_change, opts_key(opts)),
+        main.cache_file,
+        filename,
+        reload_on_change,
+        dict(opts),
+    )
+
+
+async def getline(
+    file_or_script: str, line_number: int, opts=main.default_opts
+) -> Optional[str]:
+    """Awaitable version of getline()."""
+    if await load(file_or_script, opts) is None:
+        return None
+    return await read_cached(
+        main.getline, file_or_script, line_number, without_reload(opts)
+    )
+
+
+async def getlines(filename: str, opts=main.default_opts) -> Optional[List[str]]:
+    """Awaitable version of getlines()."""
+    if is_loaded(filename, opts):
+        return await read_cached(main.getlines, filename, opts)
+    return await run_once(
+        ("getlines", filename, opts_key(opts)),
+        main.getlines,
+        filename,
+        dict(opts),
+    )
+
+
+async def getline_range(
+    file_or_script: str, start: int, end: int, opts=main.default_opts
+) -> Optional[List[main.RangeLine]]:
+    """Awaitable version of getline_range()."""
+    if main.get_option("lazy_highlight", opts):
+        return await run_in_thread(
+            main.getline_range, file_or_script, start, end, dict(opts)
+        )
+    if await load(file_or_script, opts) is None:
+        return None
+    return await read_cached(
+        main.getline_range, file_or_script, start, end, without_reload(opts)
+    )
+
+
+async def getline_window(
+    file_or_script: str, center: int, before: int, after: int, opts=main.default_opts
+) -> Optional[List[main.RangeLine]]:
+    """Awaitable version of getline_window()."""
+    return await getline_range(file_or_script, center - before, center + after, opts)
+
+
+async def frame_source(
+    frame, context=2, style: Optional[str] = None
+) -> Optional[FrameSource]:
+    """Awaitable version of pyficache.frame_source.frame_source()."""
+    if style is None:
+        opts = {"output": "plain"}
+    else:
+        opts = {"output": "terminal", "style": style}
+    if await load(frame.f_code.co_filename, opts) is None:
+        return None
+    return await read_cached(sync_frame_source, frame, context, style)
+
+
+async def update_cache(
+    filename: str, opts=main.default_opts, module_globals=None
+) -> Optional[str]:
+    """Awaitable version of update_cache()."""
+    return await run_once(
+        (
+            "update_cache",
+            filename,
+            opts_key(opts),
+            None if module_globals is None else id(module_globals),
+        ),
+        main.update_cache,
+        filename,
+        dict(opts),
+        module_globals,
+    )
+
+
+async def checkcache(filename: Optional[str] = None, opts=False):
+    """Awaitable version of checkcache()."""
+    return await run_once(
+        ("checkcache", filename, opts_key(opts)), main.checkcache, filename, opts
+    )
+
+
+async def cache_files(
+    filenames, opts=main.default_opts, max_workers=None, timeout=None
+) -> Dict[str, Optional[str]]:
+    """Awaitable version of cache_files()."""
+    return await run_in_thread(
+        main.cache_files, list(filenames), opts, max_workers, timeout
+    )
@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2026 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+A persistent, on-disk store of the code-analysis tables of files.
+
+Line numbers, line starts, breakpoint tables and position tables come
+from compiling a file and walking its code objects; see
+pyficache.code_analysis. CodeTables holds these without the code
+objects themselves, referring to a code object by its code key:
+its qualified name and first line number. So CodeTables can be saved
+to disk and read back by another process, which can then validate and
+resolve breakpoints without compiling or walking anything. A debugger
+matches the code keys against live code objects with code_key().
+
+Saved tables are keyed by a hash of the file's contents and by a tag
+for the Python implementation and bytecode version, so they are never
+used for a changed file or by another Python. A bytecode file can be for
+any Python version xdis supports; its tables are tagged with the magic
+number of the file instead, so they can be used by any Python. Nothing
+is saved unless a store directory is set with set_analysis_store() or
+the PYFICACHE_ANALYSIS_STORE environment variable.
+"""
+
+import hashlib
+import marshal
+import os
+import os.path as osp
+import sys
+import tempfile
+from dataclasses import dataclass, field
+from importlib.util import MAGIC_NUMBER
+from types import CodeType, FunctionType, ModuleType
+from typing import Dict, List, Optional, Tuple
+
+from xdis.lineoffsets import LineOffsetsCompact
+
+from pyficache.code_analysis import (
+    BYTECODE_EXTENSIONS,
+    CodeAnalysis,
+    analyze_file,
+    get_breakpoint_table,
+)
+from pyficache.position_table import CodePositionTable, code_position_table
+from pyficache.valid_lines import ValidLines
+
+STORE_FORMAT_VERSION = 2
+
+# The directory saved tables are kept in, or None if they are not saved.
+analysis_store_dir: Optional[str] = os.environ.get("PYFICACHE_ANALYSIS_STORE") or None
+
+CodeKey = Tuple[str, int]
+
+
+@dataclass
+class CodeTables:
+    """
+    The code-analysis tables of a file, with code objects referred to by
+    code key.
+
+    breakpoint_table: a dictionary mapping a line number to a list of
+          (code key, offsets) pairs, as CodeAnalysis.breakpoint_table.
+
+    code_keys: the code keys of all the code objects of the file, in
+          depth-first order.
+
+    line_numbers: the sorted line numbers found in the line-number tables
+          of all the code objects.
+
+    line_offsets: a dictionary mapping a line number to a list of
+          (code key, offsets) pairs giving the offsets of all instructions
+          in each run of instructions for the line, as xdis'
+          LineOffsetInfo.line_numbers(include_offsets=True) does.
+
+    linestarts: a dictionary mapping a bytecode offset to a source line number
+          for the module code object.
+
+    position_codes: a dictionary mapping a code key to its code object, for
+          the code objects whose position tables have not been made yet.
+          It is not saved.
+
+    position_tables: a dictionary mapping a code key to the CodePositionTable
+          of its code object, for the tables made so far. Tables are made
+          on first use, by position_table(), or when the tables are saved;
+          see all_position_tables(). There are none when code objects have
+          no co_positions() or are not for the running Python.
+
+    source_hash: the SHA-256 hex digest of the file's contents.
+
+    tag: the Python implementation and bytecode version the tables are for;
+          see store_tag() and bytecode_tag().
+
+    valid_lines: line_numbers as a ValidLines. It is computed on first use
+          and not saved.
+    """
+
+    source_hash: str
+    tag: str
+    breakpoint_table: Dict[int, List[Tuple[CodeKey, Tuple[int, ...]]]] = field(
+        default_factory=dict
+    )
+    code_keys: List[CodeKey] = field(default_factory=list)
+    line_numbers: List[int] = field(default_factory=list)
+    line_offsets: Dict[int, List[Tuple[CodeKey, Tuple[int, ...]]]] = field(
+        default_factory=dict
+    )
+    linestarts: Dict[int, int] = field(default_factory=dict)
+    position_codes: Dict[CodeKey, CodeType] = field(default_factory=dict)
+    position_tables: Dict[CodeKey, CodePositionTable] = field(default_factory=dict)
+    valid_lines: Optional[ValidLines] = None
+
+    def position_table(self, key: CodeKey) -> Optional[CodePositionTable]:
+        """Return the CodePositionTable of the code object with code key
+        `key`, or None if there is none."""
+        table = self.position_tables.get(key)
+        if table is None and key in self.position_codes:
+            table = self.position_tables[key] = code_position_table(
+                self.position_codes.pop(key)
+            )
+        return table
+
+    def all_position_tables(self) -> Dict[CodeKey, CodePositionTable]:
+        """Return position_tables after making any tables not made yet."""
+        for key in list(self.position_codes):
+            self.position_table(key)
+        return self.position_tables
+
+
+def set_analysis_store(directory: Optional[str]) -> None:
+    """Save code-analysis tables in `directory` from now on, or stop saving
+    and reading them if `directory` is None."""
+    global analysis_store_dir
+    analysis_store_dir = directory
+    return
+
+
+def code_key(code) -> CodeKey:
+    """Return the key for `code` used in CodeTables: its qualified name
+    (its name before Python 3.11) and its first line number. Code objects
+    of the same name that start on the same line have the same key."""
+    return (getattr(code, "co_qualname", code.co_name), code.co_firstlineno)
+
+
+def live_code_objects(live, filename: str) -> Dict[CodeKey, List[CodeType]]:
+    """Return the code objects of the running program for file `filename`
+    that can be found from `live`, grouped by code key.
+
+    `live` is a module, class, function or code object, or a list of
+    these. Code objects nested in the ones found are included. Only the
+    modules in `live` are searched, along with the classes defined in
+    them: modules, classes and functions they import from elsewhere are
+    not. Python does not keep the module code object of an imported
+    module, so to include it pass the f_code of a frame running it.
+    """
+    roots = list(live) if isinstance(live, (list, tuple)) else [live]
+    root_ids = {id(root) for root in roots}
+    module_names = {
+        root.__name__ if isinstance(root, ModuleType) else root.__module__
+        for root in roots
+        if isinstance(root, (ModuleType, type))
+    }
+    target = osp.realpath(filename)
+    in_file: Dict[str, bool] = {}
+    codes: Dict[CodeKey, List[CodeType]] = {}
+    seen = set()
+    stack = roots
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, FunctionType):
+            obj = obj.__code__
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, CodeType):
+            co_filename = obj.co_filename
+            if co_filename not in in_file:
+                in_file[co_filename] = osp.realpath(co_filename) == target
+            if in_file[co_filename]:
+                codes.setdefault(code_key(obj), []).append(obj)
+                stack.extend(c for c in obj.co_consts if isinstance(c, CodeType))
+        elif isinstance(obj, (staticmethod, classmethod)):
+            stack.append(obj.__func__)
+        elif isinstance(obj, property):
+            stack.extend(f for f in (obj.fget, obj.fset, obj.fdel) if f is not None)
+        elif isinstance(obj, ModuleType):
+            if id(obj) in root_ids:
+                stack.extend(vars(obj).values())
+        elif isinstance(obj, type):
+            if id(obj) in root_ids or getattr(obj, "__module__", None) in module_names:
+                stack.extend(vars(obj).values())
+        pass
+    return codes
+
+
+def store_tag() -> str:
+    """Return the tag for the running Python's implementation and bytecode
+    version."""
+    return f"{sys.implementation.cache_tag}-{MAGIC_NUMBER.hex()}-{sys.byteorder}"
+
+
+def bytecode_tag(magic: bytes) -> str:
+    """Return the tag for tables of a bytecode file whose magic number is
+    `magic`."""
+    return f"pyc-{magic.hex()}-{sys.byteorder}"
+
+
+def file_source_hash(path: str) -> str:
+    """Return the SHA-256 hex digest of the contents of `path`."""
+    return file_hash_and_tag(path)[0]
+
+
+def file_hash_and_tag(path: str) -> Tuple[str, str]:
+    """Return the SHA-256 hex digest of the contents of `path` and the tag
+    for its tables: bytecode_tag() for a bytecode file, otherwise
+    store_tag()."""
+    with open(path, "rb") as fp:
+        data = fp.read()
+    if path.endswith(BYTECODE_EXTENSIONS):
+        tag = bytecode_tag(data[:4])
+    else:
+        tag = store_tag()
+    return hashlib.sha256(data).hexdigest(), tag
+
+
+def code_tables_from_analysis(
+    analysis: CodeAnalysis, source_hash: str, tag: Optional[str] = None
+) -> CodeTables:
+    """Return the CodeTables for `analysis` of a file whose contents hash to
+    `source_hash`. `tag` is by default store_tag()."""
+    tables = CodeTables(
+        source_hash=source_hash,
+        tag=store_tag() if tag is None else tag,
+        code_keys=[code_key(code) for code in analysis.codes],
+        line_numbers=sorted(analysis.line_number_set),
+        linestarts=dict(analysis.linestarts),
+    )
+    for li in analysis.lines:
+        if li is None:
+            continue
+        tables.line_offsets.setdefault(li.line_number, []).append(
+            (code_key(li.code), tuple(li.offsets))
+        )
+        pass
+    for line_number, code_offsets in get_breakpoint_table(analysis).items():
+        tables.breakpoint_table[line_number] = [
+            (code_key(code), offsets) for code, offsets in code_offsets
+        ]
+        pass
+    for code in analysis.codes:
+        # Position tables are made only for code objects of the running
+        # Python, not xdis' code objects for other versions.
+        if isinstance(code, CodeType) and hasattr(code, "co_positions"):
+            tables.position_codes[code_key(code)] = code
+        pass
+    return tables
+
+
+def code_tables_line_numbers(
+    tables: CodeTables, toplevel_only=False, include_offsets=True
+):
+    """Return line numbers of `tables` in the same form as
+    pyficache.code_analysis.analysis_line_numbers() does for a
+    CodeAnalysis, with the code name taken from the code key."""
+    if not include_offsets:
+        return sorted(tables.linestarts.values())
+    module_key = tables.code_keys[0] if tables.code_keys else None
+    lines = {}
+    for line_number, key_offsets in tables.line_offsets.items():
+        for key, offsets in key_offsets:
+            if toplevel_only and key != module_key:
+                continue
+            lines.setdefault(line_number, []).append(
+                LineOffsetsCompact(key[0].rsplit(".", 1)[-1], list(offsets))
+            )
+            pass
+        pass
+    return lines
+
+
+def store_path(source_hash: str, tag: Optional[str] = None) -> Optional[str]:
+    """Return the path tables for `source_hash` and `tag` (by default
+    store_tag()) are saved at, or None if no store directory is set."""
+    if analysis_store_dir is None:
+        return None
+    if tag is None:
+        tag = store_tag()
+    return osp.join(analysis_store_dir, f"{source_hash}-{tag}.marshal")
+
+
+def code_tables_to_data(tables: CodeTables) -> bytes:
+    """Return `tables` serialized, as they are saved in the store."""
+    return marshal.dumps(
+        {
+            "format": STORE_FORMAT_VERSION,
+            "tag": tables.tag,
+            "breakpoint_table": tables.breakpoint_table,
+            "code_keys": tables.code_keys,
+            "line_numbers": tables.line_numbers,
+            "line_offsets": tables.line_offsets,
+            "linestarts": tables.linestarts,
+            "position_tables": {
+                key: (table.code_size,) + table.columns()
+                for key, table in tables.all_position_tables().items()
+            },
+        }
+    )
+
+
+def code_tables_from_data(
+    source_hash: str, data: bytes, tag: Optional[str] = None
+) -> Optional[CodeTables]:
+    """Return the CodeTables serialized in `data` by code_tables_to_data()
+    for a file whose contents hash to `source_hash`. None is returned if
+    `data` cannot be read or its tag is not `tag` (by default
+    store_tag())."""
+    if tag is None:
+        tag = store_tag()
+    try:
+        saved = marshal.loads(data)
+    except (EOFError, ValueError, TypeError):
+        return None
+    if (
+        not isinstance(saved, dict)
+        or saved.get("format") != STORE_FORMAT_VERSION
+        or saved.get("tag") != tag
+    ):
+        return None
+    return CodeTables(
+        source_hash=source_hash,
+        tag=saved["tag"],
+        breakpoint_table=saved["breakpoint_table"],
+        code_keys=saved["code_keys"],
+        line_numbers=saved["line_numbers"],
+        line_offsets=saved["line_offsets"],
+        linestarts=saved["linestarts"],
+        position_tables={
+            key: CodePositionTable.from_columns(*columns)
+            for key, columns in saved["position_tables"].items()
+        },
+    )
+
+
+def save_code_tables(tables: CodeTables, data: Optional[bytes] = None) -> None:
+    """Save `tables` in the store directory, if one is set. `data` is
+    `tables` already serialized, if that has been done. Errors writing the
+    store are ignored."""
+    path = store_path(tables.source_hash, tables.tag)
+    if path is None:
+        return
+    if data is None:
+        data = code_tables_to_data(tables)
+    temp_path = None
+    try:
+        os.makedirs(analysis_store_dir, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=analysis_store_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+        os.replace(temp_path, path)
+    except OSError:
+        if temp_path is not None:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        pass
+    return
+
+
+def load_code_tables(
+    source_hash: str, tag: Optional[str] = None
+) -> Optional[CodeTables]:
+    """Return the CodeTables saved for `source_hash` and `tag` (by default
+    store_tag()), or None if there are none or they cannot be read."""
+    path = store_path(source_hash, tag)
+    if path is None:
+        return None
+    try:
+        with open(path, "rb") as fp:
+            data = fp.read()
+    except OSError:
+        return None
+    return code_tables_from_data(source_hash, data, tag)
+
+
+def load_or_build_code_tables(
+    path: str, analysis: Optional[CodeAnalysis] = None
+) -> CodeTables:
+    """Return the CodeTables for the file at `path`: the saved ones if the
+    store has them for its current contents, otherwise ones built from
+    `analysis`, or from analyzing the file if `analysis` is None. Tables
+    that are built are saved.
+
+    `path` can be a bytecode file of any Python version xdis supports.
+    """
+    source_hash, tag = file_hash_and_tag(path)
+    tables = load_code_tables(source_hash, tag)
+    if tables is None:
+        if analysis is None:
+            analysis = analyze_file(path)
+        tables = code_tables_from_analysis(analysis, source_hash, tag)
+        save_code_tables(tables)
+    return tables
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2026 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Code analysis of a file, done with one compile and one walk over its
+code objects.
+
+trace_line_numbers(), get_linecache_info() and cache_code_lines() in
+pyficache.main each used to compile the file and walk its code objects
+on their own: once to collect line numbers, once more through xdis'
+lineoffsets_in_file(), and once more to collect source positions. Here
+the file is compiled (or its bytecode loaded) once, and a single walk
+collects everything those routines need.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field
+from types import CodeType
+from typing import Any, Dict, List, Optional, Set, Tuple
+from weakref import finalize
+
+from xdis import iscode
+from xdis.lineoffsets import LineOffsetInfo, LineOffsets, LineOffsetsCompact
+from xdis.load import load_module
+from xdis.op_imports import get_opcode_module
+from xdis.version_info import PYTHON_IMPLEMENTATION, PYTHON_VERSION_TRIPLE
+
+from pyficache.code_positions import add_code_lines, discard_code_positions
+from pyficache.pycache import load_source_code
+
+BYTECODE_EXTENSIONS = (".pyc", ".pyo")
+
+
+@dataclass
+class CodeAnalysis:
+    """
+    The results of analyzing the code objects of a file.
+
+    breakpoint_table: a dictionary mapping a line number to a list of
+          (code object, offsets) pairs: the code objects that have
+          instructions starting that line, and the offsets of those
+          instructions. It is computed on first use; see
+          get_breakpoint_table().
+
+    code: the module code object of the file.
+
+    code_map: a dictionary mapping the name (co_name) of each code object to
+          the code object, in depth-first order like xdis' LineOffsetInfo.
+
+    codes: all of the code objects, in depth-first order. Their source
+          positions are analyzed when first looked up in code_position_cache;
+          when the CodeAnalysis goes away, they are removed from there.
+
+    line_info: a dictionary mapping line number to a list of code object and
+          offsets pairs, as returned by update_code_position_cache().
+
+    line_number_set: the line numbers found in the line-number tables of all
+          of the code objects.
+
+    lines: the LineOffsets of all code objects, in depth-first order.
+
+    linestarts: a dictionary mapping a bytecode offset to a source line number
+          for the module code object.
+
+    toplevel_lines: the LineOffsets of just the module code object.
+    """
+
+    code: Any
+    breakpoint_table: Optional[Dict[int, List[Tuple[Any, Tuple[int, ...]]]]] = None
+    code_map: Dict[str, CodeType] = field(default_factory=dict)
+    codes: List[CodeType] = field(default_factory=list)
+    line_info: Dict[int, List[Tuple[CodeType, int]]] = field(default_factory=dict)
+    line_number_set: Set[int] = field(default_factory=set)
+    lines: List[LineOffsets] = field(default_factory=list)
+    linestarts: Dict[int, int] = field(default_factory=dict)
+    toplevel_lines: List[LineOffsets] = field(default_factory=list)
+
+
+def load_code(filename: str) -> tuple:
+    """Return the module code object for `filename` along with the opcode
+    module that goes with it. A bytecode file is loaded; anything
+    else is taken to be Python source for the running Python, and its
+    __pycache__ bytecode is used when it is up to date.
+    """
+    if filename.endswith(BYTECODE_EXTENSIONS):
+        version, _, _, code, python_implementation, *_ = load_module(filename)
+        return code, get_opcode_module(version, python_implementation)
+    code = load_source_code(filename)
+    return code, get_opcode_module(PYTHON_VERSION_TRIPLE, PYTHON_IMPLEMENTATION)
+
+
+def analyze_code(code, opc) -> CodeAnalysis:
+    """Walk `code` and the code objects nested inside it once, and return
+    their CodeAnalysis."""
+    analysis = CodeAnalysis(code)
+
+    # Line information is gathered in breadth-first order, as
+    # update_code_position_cache() does.
+    lines_queue: List[Tuple[int, Any, Optional[Any]]] = []
+    line_info = defaultdict(list)
+
+    # Line offsets and the code map are gathered in depth-first order, as
+    # xdis' LineOffsetInfo does.
+    stack: List[Tuple[Any, Optional[Any], int]] = [(code, None, 0)]
+    while stack:
+        c, parent, depth = stack.pop()
+        code_info = LineOffsetInfo(opc, c, include_children=False)
+        if parent is None:
+            analysis.linestarts = code_info.linestarts
+            analysis.toplevel_lines = code_info.lines
+        analysis.codes.append(c)
+        analysis.code_map[c.co_name] = c
+        analysis.lines += code_info.lines
+        analysis.line_number_set.update(code_info.linestarts.values())
+        lines_queue.append((depth, c, parent))
+
+        children = [
+            (child, c, depth + 1) for child in c.co_consts if iscode(child)
+        ]
+        stack.extend(reversed(children))
+        pass
+
+    # Sorting depth-first order stably by depth gives breadth-first order.
+    lines_queue.sort(key=lambda entry: entry[0])
+    for _, c, parent in lines_queue:
+        add_code_lines(c, parent, line_info)
+    analysis.line_info = line_info
+
+    finalize(analysis, discard_code_positions, list(analysis.codes))
+    return analysis
+
+
+def analyze_file(filename: str) -> CodeAnalysis:
+    """Load or compile `filename` once and return its CodeAnalysis."""
+    return analyze_code(*load_code(filename))
+
+
+def get_breakpoint_table(
+    analysis: CodeAnalysis,
+) -> Dict[int, List[Tuple[Any, Tuple[int, ...]]]]:
+    """Return the breakpoint table of `analysis`, building it from
+    line_info the first time."""
+    if analysis.breakpoint_table is None:
+        table = {}
+        for line_number, code_offsets in analysis.line_info.items():
+            entries: Dict[int, Tuple[Any, List[int]]] = {}
+            for code, offset in code_offsets:
+                # Key by identity: distinct code objects can compare equal.
+                entries.setdefault(id(code), (code, []))[1].append(offset)
+            table[line_number] = [
+                (code, tuple(sorted(offsets))) for code, offsets in entries.values()
+            ]
+            pass
+        analysis.breakpoint_table = table
+    return analysis.breakpoint_table
+
+
+def analysis_line_numbers(
+    analysis: CodeAnalysis, toplevel_only=False, include_offsets=True
+):
+    """Return line numbers in the form of xdis'
+    LineOffsetInfo.line_numbers(): with `include_offsets`, a
+    dictionary mapping a line number to a list of LineOffsetsCompact;
+    otherwise a sorted list of line numbers of the module code object.
+    """
+    if not include_offsets:
+        return sorted(analysis.linestarts.values())
+    lines = {}
+    for li in analysis.toplevel_lines if toplevel_only else analysis.lines:
+        if li is None:
+            continue
+        lines.setdefault(li.line_number, []).append(
+            LineOffsetsCompact(li.code.co_name, li.offsets)
+        )
+        pass
+    return lines
@@ -15,19 +15,36 @@
 #   You should have received a copy of the GNU General Public License
 #   along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from collections import defaultdict
-from dataclasses import dataclass
-
+import sys
+from collections import OrderedDict, defaultdict
 from types import CodeType
-from typing import Dict, Optional, Tuple
+from typing import Any, Dict, Iterable, Optional, Tuple
+from weakref import WeakKeyDictionary, ref
 
-from xdis import iscode, load_file, findlinestarts
+from xdis import iscode, findlinestarts
 from collections import deque
 
+from pyficache.position_table import CodePositionTable, code_position_table
+from pyficache.pycache import load_source_code
+
 
-@dataclass
 class CodePositionInfo:
     """
+    The source positions of the instructions of a code object.
+
+    code: the code object.
+
+    table: the CodePositionTable of `code`, which holds its positions
+          column-wise; see pyficache.position_table. It is the table that
+          code_position_table() gives for `code`.
+
+    parent: static enclosing code or not None if this a module.
+
+    lineno_and_offset and lineno_and_start_column give the positions as
+    dictionaries. They are built from `table` the first time either of
+    them is used, so code objects whose positions are only looked up in
+    `table` do not pay for them.
+
     lineno_and_offset: A dictionary mapping line and code offset numbers into a pair of
           (starting line, starting column), (ending line, ending column) values.
           in code.
@@ -35,17 +52,117 @@ class CodePositionInfo:
     lineno_and_start_column: A dictionary mapping line and code offset numbers into a pair of
           (starting line, starting column), (ending line, ending column) values.
           in code.
+    """
 
-    parent: static enclosing code or not None if this a module.
+    __slots__ = ("code", "dicts", "parent", "table")
+
+    def __init__(self, code: CodeType, parent: Optional[CodeType] = None):
+        self.code = code
+        self.dicts: Optional[Tuple[dict, dict]] = None
+        self.parent = parent
+        self.table = code_position_table(code)
+        return
+
+    @property
+    def lineno_and_offset(self) -> Dict[Tuple[int, int], tuple]:
+        if self.dicts is None:
+            self.dicts = position_dicts(self.code, self.table)
+        return self.dicts[0]
+
+    @property
+    def lineno_and_start_column(self) -> Dict[Tuple[int, int], Any]:
+        if self.dicts is None:
+            self.dicts = position_dicts(self.code, self.table)
+        return self.dicts[1]
+
+
+class CodePositionCache(OrderedDict):
+    """The type of code_position_cache. Looking up a code object that is
+    not in the cache analyzes and adds it; see code_position_info().
+    Looking up one that is in the cache makes it the most recently used.
+    Iterating goes over just the code objects analyzed so far.
     """
 
-    lineno_and_offset: Optional[Dict[Tuple[int, int], set]] = None
-    lineno_and_start_column: Optional[Dict[Tuple[int, int], set]] = None
-    parent: Optional[CodeType] = None
+    def __getitem__(self, code):
+        try:
+            self.move_to_end(code)
+        except KeyError:
+            return self.__missing__(code)
+        return OrderedDict.__getitem__(self, code)
+
+    def __missing__(self, code):
+        if not iscode(code):
+            raise KeyError(code)
+        return code_position_info(code)
+
+    def get(self, code, default=None):
+        try:
+            return self[code]
+        except KeyError:
+            return default
 
 
-# A cache of source-code position and code offset information keyed by a Python code object.
-code_position_cache: Dict[CodeType, CodePositionInfo] = {}
+# A cache of source-code position and code offset information keyed by a
+# Python code object. Entries are added when they are first looked up.
+#
+# The position information of a file in the file cache is owned by the
+# CodeAnalysis of its entry (see pyficache.code_analysis). When that goes
+# away, because the file changed or its entry was removed, its code
+# objects are removed from here too; see discard_code_positions().
+# Beyond that, the cache holds at most code_position_cache_maxsize code
+# objects; the least recently used ones are removed first.
+code_position_cache: CodePositionCache = CodePositionCache()
+code_position_cache_maxsize = 20000
+
+# The enclosing code of nested code objects seen by code_loop_for_positions()
+# or pyficache.code_analysis, for CodePositionInfo.parent. The enclosing code
+# is referenced weakly, since it refers to the nested code in co_consts.
+code_parents: "WeakKeyDictionary[CodeType, ref]" = WeakKeyDictionary()
+
+
+def store_code_position(code: CodeType, info: CodePositionInfo) -> None:
+    """Add `info` for `code` to code_position_cache, removing the least
+    recently used entries if the cache is full."""
+    code_position_cache[code] = info
+    code_position_cache.move_to_end(code)
+    while len(code_position_cache) > code_position_cache_maxsize:
+        code_position_cache.popitem(last=False)
+    return
+
+
+def discard_code_positions(codes: Iterable[CodeType]) -> None:
+    """Remove the code_position_cache entries for `codes`, if any."""
+    for code in codes:
+        code_position_cache.pop(code, None)
+        pass
+    return
+
+
+def code_position_cache_stats() -> Dict[str, int]:
+    """Return counters for monitoring the size of code_position_cache:
+    the number of code objects in it, the most it may hold, the number
+    of position-table rows for them, and an estimate of the memory in
+    bytes those rows, and any position dictionaries built from them, use.
+    The code objects themselves are not counted.
+    """
+    code_objects = positions = memory = 0
+    for info in list(code_position_cache.values()):
+        code_objects += 1
+        positions += len(info.table)
+        memory += sys.getsizeof(info) + info.table.nbytes()
+        for table in info.dicts or ():
+            memory += sys.getsizeof(table)
+            for key, value in table.items():
+                memory += sys.getsizeof(key) + sys.getsizeof(value)
+                pass
+            pass
+        pass
+    return {
+        "code_objects": code_objects,
+        "maxsize": code_position_cache_maxsize,
+        "positions": positions,
+        "memory": memory,
+    }
 
 
 def update_code_position_cache(filename: str) -> Dict[int, list]:
@@ -61,9 +178,11 @@ def update_code_position_cache(filename: str) -> Dict[int, list]:
     situation where a line number itself is ambiguous and can refer
     to several scopes. The code object as opposed to its name,
     might be useful in setting breakpoints.
+
+    Source positions of the code objects in the file are analyzed when
+    they are first looked up in code_position_cache.
     """
-    # FIXME: try to find bytecode for corresponding file
-    code = load_file(filename)
+    code = load_source_code(filename)
     return code_loop_for_positions(code)
 
 
@@ -71,61 +190,19 @@ def code_loop_for_positions(
     code: CodeType,
 ) -> Dict[int, list]:
     """Loops over all code objects found within the constant section of `code` returning the
-    information described in populate_code_position_cache() above and updating code_position_cache.
+    information described in update_code_position_cache() above.
+
+    Only the cheap line-start tables are read here; see add_code_lines().
     """
 
     parent: Optional[CodeType] = None
     queue = deque([(code, parent)])
 
-    offset_line_dict = {}
-    line_offset_dict = {}
     line_info = defaultdict(list)
 
     while len(queue) > 0:
         code, parent = queue.popleft()
-
-        for offset, line in findlinestarts(code):
-            offset_line_dict[offset] = line
-            line_offset_dict[line] = offset
-
-        # First, process code.co_lines()...
-        for start_offset, _, lineno in code.co_lines():
-            if start_offset in offset_line_dict:
-                line_info[lineno].append((code, start_offset))
-
-        lineno_and_offset = {}
-        lineno_and_start_column = {}
-
-        # Next, process code.co_positions()...
-        for start_line, end_line, start_column, end_column in code.co_positions():
-            start_offset = line_offset_dict.get(start_line, None)
-            if (
-                start_offset is not None
-                and start_column is not None
-                and end_column is not None
-            ):
-                lookup = (start_line, start_offset)
-                if start_column == 0 and end_column == 0:
-                    lineno_and_start_column[start_line, start_column] = (
-                        start_offset,
-                        code,
-                    )
-                else:
-                    lineno_and_start_column[start_line, start_column] = start_offset
-
-                    if existing_range := lineno_and_offset.get(lookup, False):
-                        new_start = min(existing_range[0], (start_line, start_column))
-                        new_stop = max(existing_range[1], (end_line, end_column))
-                        lineno_and_offset[lookup] = (new_start, new_stop)
-                    else:
-                        lineno_and_offset[lookup] = (
-                            (start_line, start_column),
-                            (end_line, end_column),
-                        )
-
-            code_position_cache[code] = CodePositionInfo(
-                lineno_and_offset, lineno_and_start_column, parent
-            )
+        add_code_lines(code, parent, line_info)
 
         for c in code.co_consts:
             if iscode(c):
@@ -136,6 +213,86 @@ def code_loop_for_positions(
     return line_info
 
 
+def add_code_lines(
+    code: CodeType,
+    parent: Optional[CodeType],
+    line_info: Dict[int, list],
+) -> None:
+    """Process a single code object `code` for code_loop_for_positions():
+    add its line-start line and offset pairs to `line_info`, and record
+    `parent` as its enclosing code for code_position_info(). Nested code
+    objects are not processed.
+    """
+    for offset, line in findlinestarts(code):
+        line_info[line].append((code, offset))
+    if parent is not None:
+        try:
+            code_parents[code] = ref(parent)
+        except TypeError:
+            # Not weak-referenceable
+            pass
+    return
+
+
+def code_position_info(code: CodeType) -> CodePositionInfo:
+    """Return the CodePositionInfo for `code`, analyzing the source
+    positions of `code` the first time it is asked for. Nested code
+    objects are not analyzed.
+    """
+    info = dict.get(code_position_cache, code)
+    if info is None:
+        info = compute_code_position_info(code)
+        store_code_position(code, info)
+    return info
+
+
+def compute_code_position_info(code: CodeType) -> CodePositionInfo:
+    """Return a CodePositionInfo for the source positions of `code`."""
+    parent_ref = code_parents.get(code)
+    parent = None if parent_ref is None else parent_ref()
+    return CodePositionInfo(code, parent)
+
+
+def position_dicts(code: CodeType, table: CodePositionTable) -> Tuple[dict, dict]:
+    """Return the lineno_and_offset and lineno_and_start_column
+    dictionaries of CodePositionInfo for `code`, whose position table is
+    `table`."""
+    line_offset_dict = {line: offset for offset, line in findlinestarts(code)}
+
+    lineno_and_offset = {}
+    lineno_and_start_column = {}
+
+    # Rows of the table are runs of instructions with the same position,
+    # and each position needs to be looked at only once.
+    for _, (start_line, start_column, end_line, end_column) in table:
+        start_offset = line_offset_dict.get(start_line, None)
+        if (
+            start_offset is not None
+            and start_column is not None
+            and end_column is not None
+        ):
+            lookup = (start_line, start_offset)
+            if start_column == 0 and end_column == 0:
+                lineno_and_start_column[start_line, start_column] = (
+                    start_offset,
+                    code,
+                )
+            else:
+                lineno_and_start_column[start_line, start_column] = start_offset
+
+                if existing_range := lineno_and_offset.get(lookup, False):
+                    new_start = min(existing_range[0], (start_line, start_column))
+                    new_stop = max(existing_range[1], (end_line, end_column))
+                    lineno_and_offset[lookup] = (new_start, new_stop)
+                else:
+                    lineno_and_offset[lookup] = (
+                        (start_line, start_column),
+                        (end_line, end_column),
+                    )
+
+    return lineno_and_offset, lineno_and_start_column
+
+
 if __name__ == "__main__":
     from pprint import pformat
 
@@ -149,15 +306,20 @@ if __name__ == "__main__":
         )
         print()
 
-    for code, code_position_info in code_position_cache.items():
+    # Look up the code objects so that their positions are analyzed.
+    for offset_pairs in lineno_info.values():
+        for code, _ in offset_pairs:
+            code_position_cache[code]
+
+    for code, position_info in code_position_cache.items():
         print("=" * 30)
-        print(f"{code.co_name} parent: {code_position_info.parent}")
+        print(f"{code.co_name} parent: {position_info.parent}")
         print(
             f"(line, offset): source positions for {code.co_name}:"
-            f"\n\t{pformat(code_position_info.lineno_and_offset)}"
+            f"\n\t{pformat(position_info.lineno_and_offset)}"
         )
         print(
             f"(line, offset): start columns for {code.co_name}:"
-            f"\n\t{pformat(code_position_info.lineno_and_start_column)}"
+            f"\n\t{pformat(position_info.lineno_and_start_column)}"
         )
         print("-" * 30)
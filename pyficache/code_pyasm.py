@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2026 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Python assembly (pyasm) listings built from code objects.
+
+get_pyasm_line() in pyficache.main works on a .pyasm file that some
+other tool wrote. The routines here instead disassemble a single code
+object with xdis when it is first asked for, and cache the listing
+along with its line-number mapping. So a debugger can show bytecode
+for a frame without a full-file dump having been written and parsed.
+"""
+
+import os
+import os.path as osp
+from collections import deque
+from dataclasses import dataclass, field
+from types import CodeType
+from typing import Dict, List, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+from xdis import iscode
+from xdis.bytecode import Bytecode
+from xdis.disasm import format_code_info, get_opcode
+from xdis.load import load_module
+from xdis.version_info import PYTHON_IMPLEMENTATION, PYTHON_VERSION_TRIPLE
+
+from pyficache.main import default_opts, get_option, highlight_string, pyasm_lexer
+from pyficache.pyasm import PyasmLineMapping, build_pyasm_line_mapping
+
+
+@dataclass
+class PyasmListing:
+    """
+    A pyasm listing for a single code object.
+
+    lines: the lines of the listing, a code-information header followed by
+          the disassembly of the code object.
+
+    pyasm_mapping: the line-number mapping of `lines`, as for a .pyasm file.
+
+    offset_to_pyasm_line: a dictionary mapping a bytecode offset to the
+          (1-origin) line in `lines` for the instruction at that offset.
+
+    highlighted_lines: a dictionary mapping a (style, line index) pair to
+          the syntax-highlighted line.
+    """
+
+    lines: List[str]
+    pyasm_mapping: PyasmLineMapping
+    offset_to_pyasm_line: Dict[int, int]
+    highlighted_lines: Dict[Tuple[str, int], str] = field(default_factory=dict)
+
+
+# Listings for code objects, keyed by the code object. Entries go away
+# when the code object does.
+code_pyasm_cache: "WeakKeyDictionary[CodeType, PyasmListing]" = WeakKeyDictionary()
+
+# Code objects loaded from bytecode files, keyed by path. The value is
+# a tuple of the file's stat mtime and size, the bytecode version
+# tuple, the Python implementation, and the module code object.
+pyc_code_cache: Dict[str, tuple] = {}
+
+
+def code_pyasm(
+    code,
+    version_tuple: tuple = PYTHON_VERSION_TRIPLE,
+    python_implementation=PYTHON_IMPLEMENTATION,
+) -> PyasmListing:
+    """
+    Return the pyasm listing for `code`, disassembling just `code` and
+    not the code objects nested in it. `version_tuple` and
+    `python_implementation` describe the bytecode of `code`; by default
+    this is the bytecode of the running Python.
+    """
+    try:
+        listing = code_pyasm_cache.get(code)
+    except TypeError:
+        # Not weak-referenceable
+        listing = None
+    if listing is not None:
+        return listing
+
+    opc = get_opcode(version_tuple, python_implementation)
+    text = (
+        format_code_info(
+            code, version_tuple, python_implementation=python_implementation
+        )
+        + "\n"
+        + Bytecode(code, opc).dis(asm_format="classic")
+    )
+    lines = text.splitlines(keepends=True)
+    pyasm_mapping = build_pyasm_line_mapping(lines)
+    line_offset_to_remapped_line = pyasm_mapping.line_offset_to_remapped_line
+    listing = PyasmListing(
+        lines=lines,
+        pyasm_mapping=pyasm_mapping,
+        offset_to_pyasm_line={
+            offset: pyasm_line
+            for (_, offset), pyasm_line in line_offset_to_remapped_line.items()
+        },
+    )
+    try:
+        code_pyasm_cache[code] = listing
+    except TypeError:
+        pass
+    return listing
+
+
+def get_code_pyasm_line(code, offset: int, opts=default_opts) -> tuple:
+    """
+    Return the pyasm line for the instruction at `offset` in `code` and its
+    1-origin index in the listing for `code`. This is like
+    get_pyasm_line(), but the listing is built from `code` on first use.
+    If there is no instruction at `offset`, (None, -1) is returned.
+
+    For a frame, use `frame.f_code` and `frame.f_lasti`.
+    """
+    listing = code_pyasm(code)
+    pyasm_line_index = listing.offset_to_pyasm_line.get(offset, -1)
+    if pyasm_line_index < 0:
+        return None, -1
+    line = listing.lines[pyasm_line_index - 1]
+
+    fmt = opts.get("style", "plain")
+    if fmt != "plain":
+        key = (fmt, pyasm_line_index - 1)
+        if key not in listing.highlighted_lines:
+            listing.highlighted_lines[key] = highlight_string(
+                line, style=fmt, lexer=pyasm_lexer
+            )
+        line = listing.highlighted_lines[key]
+
+    if get_option("strip_nl", opts):
+        line = line.rstrip("\n")
+    return line, pyasm_line_index
+
+
+def pyc_code(pyc_path: str, co_name: str = "<module>", first_line=None):
+    """
+    Return the code object named `co_name` in bytecode file `pyc_path`,
+    along with the bytecode version tuple and Python implementation of the
+    file. If `first_line` is given, the code object must also start on that
+    line. None is returned if there is no such code object.
+
+    The bytecode file is read once and reloaded only when it changes.
+    """
+    pyc_path = osp.abspath(pyc_path)
+    try:
+        stat = os.stat(pyc_path)
+    except OSError:
+        return None
+    cached = pyc_code_cache.get(pyc_path)
+    if cached is None or cached[0] != (stat.st_mtime, stat.st_size):
+        version_tuple, _, _, module_code, python_implementation, *_ = load_module(
+            pyc_path
+        )
+        cached = (
+            (stat.st_mtime, stat.st_size),
+            version_tuple,
+            python_implementation,
+            module_code,
+        )
+        pyc_code_cache[pyc_path] = cached
+    _, version_tuple, python_implementation, module_code = cached
+
+    queue = deque([module_code])
+    while len(queue) > 0:
+        code = queue.popleft()
+        if code.co_name == co_name and first_line in (None, code.co_firstlineno):
+            return code, version_tuple, python_implementation
+        for c in code.co_consts:
+            if iscode(c):
+                queue.append(c)
+            pass
+        pass
+    return None
+
+
+def pyc_code_pyasm(
+    pyc_path: str, co_name: str = "<module>", first_line=None
+) -> Optional[PyasmListing]:
+    """
+    Return the pyasm listing for the code object named `co_name` in
+    bytecode file `pyc_path`. See pyc_code() for the meaning of the
+    parameters. The bytecode can be for any Python version that xdis
+    supports.
+    """
+    found = pyc_code(pyc_path, co_name, first_line)
+    if found is None:
+        return None
+    return code_pyasm(*found)
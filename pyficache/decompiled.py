@@ -0,0 +1,300 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2026 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Source code for bytecode files that have no source, from a decompiler,
+kept in a persistent store.
+
+Decompiling a module can take seconds, so the result is saved the
+first time: the decompiled source goes in a .py file in the store
+directory, and its line map in a file next to it. Both are keyed by a
+hash of the bytecode file, so a later session, or another process,
+reads them back instead of decompiling again.
+
+Decompilers are not part of this package. A decompiler is a function
+called as decompile(bytecode_path), returning the decompiled source text
+and its line map, or None if it cannot decompile the file. The line map
+is a sequence of (decompiled line, bytecode line) pairs, as given by the
+--linemap option of uncompyle6 and decompyle3. Decompilers are added
+with register_decompiler() or, by an installed package, with an entry
+point in the "pyficache.decompilers" group.
+
+The store directory is $PYFICACHE_DECOMPILED_STORE, or else
+pyficache/decompiled in the user's cache directory; set_decompiled_store()
+changes it. If the store directory cannot be written, decompiled sources
+are kept in a temporary directory that lasts until the program exits.
+"""
+
+import hashlib
+import marshal
+import os
+import os.path as osp
+import tempfile
+from dataclasses import dataclass
+from importlib.metadata import entry_points
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+DECOMPILED_FORMAT_VERSION = 1
+
+ENTRY_POINT_GROUP = "pyficache.decompilers"
+
+LineMap = Tuple[Tuple[int, int], ...]
+
+Decompiler = Callable[[str], Optional[Tuple[str, Iterable[Tuple[int, int]]]]]
+
+
+def default_decompiled_store() -> str:
+    cache_home = os.environ.get("XDG_CACHE_HOME") or osp.join(
+        osp.expanduser("~"), ".cache"
+    )
+    return osp.join(cache_home, "pyficache", "decompiled")
+
+
+# The directory decompiled sources are kept in.
+decompiled_store_dir: str = (
+    os.environ.get("PYFICACHE_DECOMPILED_STORE") or default_decompiled_store()
+)
+
+# The directory decompiled sources are kept in when the store directory
+# cannot be written; see temporary_store_dir().
+temporary_store: Optional[tempfile.TemporaryDirectory] = None
+
+# Decompilers by name, in the order they are tried.
+decompilers: Dict[str, Decompiler] = {}
+entry_points_loaded = False
+
+
+@dataclass
+class DecompiledSource:
+    """
+    The decompiled source of a bytecode file.
+
+    backend: the name of the decompiler that produced it.
+
+    bytecode_hash: the SHA-256 hex digest of the bytecode file.
+
+    line_map: (decompiled line, bytecode line) pairs, sorted by
+          decompiled line.
+
+    path: the path of the decompiled source in the store directory.
+    """
+
+    backend: str
+    bytecode_hash: str
+    line_map: LineMap
+    path: str
+
+
+# Decompiled sources already looked up in this session, by bytecode hash.
+decompiled_sources: Dict[str, DecompiledSource] = {}
+
+# Bytecode files no decompiler could decompile, mapped to their modification
+# time and size then, so they are not tried again until they change or a
+# decompiler is added.
+undecompilable: Dict[str, Tuple[float, int]] = {}
+
+
+def set_decompiled_store(directory: str) -> None:
+    """Keep decompiled sources in `directory` from now on."""
+    global decompiled_store_dir
+    decompiled_store_dir = directory
+    decompiled_sources.clear()
+    undecompilable.clear()
+    return
+
+
+def register_decompiler(name: str, decompile: Optional[Decompiler]) -> None:
+    """Add `decompile` as the decompiler called `name`, replacing any
+    decompiler of that name, or remove it if `decompile` is None.
+    Decompilers are tried in the order they were added."""
+    if decompile is None:
+        decompilers.pop(name, None)
+    else:
+        decompilers[name] = decompile
+        undecompilable.clear()
+    return
+
+
+def load_decompiler_entry_points() -> None:
+    """Add the decompilers of installed packages, given as entry points in
+    the "pyficache.decompilers" group. This is done only once; decompilers
+    already registered under the same name are kept."""
+    global entry_points_loaded
+    if entry_points_loaded:
+        return
+    entry_points_loaded = True
+    try:
+        group = entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:
+        # Before Python 3.10
+        group = entry_points().get(ENTRY_POINT_GROUP, [])
+    for entry_point in group:
+        if entry_point.name in decompilers:
+            continue
+        try:
+            decompilers[entry_point.name] = entry_point.load()
+        except Exception:
+            pass
+        pass
+    return
+
+
+def temporary_store_dir() -> Optional[str]:
+    """Return a temporary directory for decompiled sources, removed when
+    the program exits, or None if one cannot be made."""
+    global temporary_store
+    if temporary_store is None:
+        try:
+            temporary_store = tempfile.TemporaryDirectory(
+                prefix="pyficache-decompiled-"
+            )
+        except OSError:
+            return None
+    return temporary_store.name
+
+
+def store_paths(bytecode_hash: str, directory: Optional[str] = None) -> Tuple[str, str]:
+    """Return the paths of the decompiled source and of its line map for
+    `bytecode_hash` in `directory`, by default the store directory."""
+    base = osp.join(directory or decompiled_store_dir, bytecode_hash)
+    return base + ".py", base + ".linemap"
+
+
+def load_decompiled_source(bytecode_hash: str) -> Optional[DecompiledSource]:
+    """Return the DecompiledSource saved for `bytecode_hash`, or None if
+    there is none or it cannot be read."""
+    source_path, line_map_path = store_paths(bytecode_hash)
+    try:
+        with open(line_map_path, "rb") as fp:
+            saved = marshal.load(fp)
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if (
+        not isinstance(saved, dict)
+        or saved.get("format") != DECOMPILED_FORMAT_VERSION
+        or not osp.isfile(source_path)
+    ):
+        return None
+    return DecompiledSource(
+        backend=saved["backend"],
+        bytecode_hash=bytecode_hash,
+        line_map=saved["line_map"],
+        path=source_path,
+    )
+
+
+def write_atomically(path: str, data: bytes) -> None:
+    fd, temp_path = tempfile.mkstemp(dir=osp.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fp:
+            fp.write(data)
+        os.replace(temp_path, path)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return
+
+
+def save_decompiled_source(
+    bytecode_hash: str,
+    backend: str,
+    source: str,
+    line_map: LineMap,
+    directory: Optional[str] = None,
+) -> Optional[DecompiledSource]:
+    """Save `source` and `line_map`, decompiled by `backend`, for
+    `bytecode_hash` in `directory`, by default the store directory, and
+    return them as a DecompiledSource. None is returned if the directory
+    cannot be written."""
+    directory = directory or decompiled_store_dir
+    source_path, line_map_path = store_paths(bytecode_hash, directory)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        # The line map is written last: a source without one is not used.
+        write_atomically(source_path, source.encode("utf-8"))
+        write_atomically(
+            line_map_path,
+            marshal.dumps(
+                {
+                    "format": DECOMPILED_FORMAT_VERSION,
+                    "backend": backend,
+                    "line_map": line_map,
+                }
+            ),
+        )
+    except OSError:
+        return None
+    return DecompiledSource(
+        backend=backend,
+        bytecode_hash=bytecode_hash,
+        line_map=line_map,
+        path=source_path,
+    )
+
+
+def decompile_bytecode(bytecode_path: str) -> Optional[DecompiledSource]:
+    """Return the decompiled source of the bytecode file at
+    `bytecode_path`, decompiling it only if the store does not already
+    have it. None is returned if the file cannot be read or no decompiler
+    can decompile it."""
+    try:
+        stat = os.stat(bytecode_path)
+        if undecompilable.get(bytecode_path) == (stat.st_mtime, stat.st_size):
+            return None
+        with open(bytecode_path, "rb") as fp:
+            bytecode_hash = hashlib.sha256(fp.read()).hexdigest()
+    except OSError:
+        return None
+
+    decompiled = decompiled_sources.get(bytecode_hash)
+    if decompiled is not None and osp.isfile(decompiled.path):
+        return decompiled
+    decompiled = load_decompiled_source(bytecode_hash)
+    if decompiled is None:
+        load_decompiler_entry_points()
+        for backend, decompile in list(decompilers.items()):
+            try:
+                result = decompile(bytecode_path)
+            except Exception:
+                continue
+            if result is None:
+                continue
+            source, line_map = result
+            line_map = tuple(sorted((int(a), int(b)) for a, b in line_map))
+            decompiled = save_decompiled_source(
+                bytecode_hash, backend, source, line_map
+            )
+            if decompiled is None:
+                # The store cannot be written; keep the source for this
+                # session only.
+                directory = temporary_store_dir()
+                if directory is None:
+                    return None
+                decompiled = save_decompiled_source(
+                    bytecode_hash, backend, source, line_map, directory
+                )
+                if decompiled is None:
+                    return None
+            break
+        else:
+            undecompilable[bytecode_path] = (stat.st_mtime, stat.st_size)
+            return None
+        pass
+    decompiled_sources[bytecode_hash] = decompiled
+    return decompiled
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2026 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Views of cached files for reading many lines quickly.
+
+Each getline() call unmaps the file name, looks up options, resolves the
+style, gets the lines and the line count, and unmaps the line number. A
+FileView, made by open_view(), does all but the last of these once, so
+that profilers and coverage annotators that read lines in a tight loop
+just index a list.
+
+A view notices when the file's cache entry is replaced or removed, as
+by checkcache(), update_cache() or clear_file_cache(), or when its line
+remapping changes, and then binds itself again. With the
+"reload_on_change" option, it also checks the file on disk, at most
+once every VIEW_CHECK_INTERVAL seconds.
+"""
+
+import os
+from time import monotonic
+from typing import List, Optional
+
+import pyficache.main as main
+
+# The least number of seconds between checks of a view's file on disk
+# when the "reload_on_change" option is set.
+VIEW_CHECK_INTERVAL = 1.0
+
+
+class FileView:
+    """A view of the lines of a cached file, with options already
+    applied. Line numbers are those that getline() takes."""
+
+    __slots__ = (
+        "cache_key",
+        "file_info",
+        "filename",
+        "max_line",
+        "next_check",
+        "opts",
+        "remap_entry",
+        "view_lines",
+    )
+
+    def __init__(self, filename: str, opts=main.default_opts):
+        self.filename = main.unmap_file(filename)
+        self.opts = dict(opts)
+        self.next_check = 0.0
+        self.bind()
+        return
+
+    def bind(self) -> bool:
+        """Look up the file's lines, line count and line remapping again.
+        Return False if the file cannot be read, in which case the view is
+        empty."""
+        filename = self.filename
+        self.cache_key = filename
+        self.file_info = None
+        self.view_lines: List[str] = []
+        self.max_line = 0
+        self.remap_entry = None
+        is_pyasm = self.opts.get("is_pyasm", main.is_python_assembly_file(filename))
+        lines = main.getlines(filename, self.opts, is_pyasm=is_pyasm)
+        if lines is None:
+            return False
+        self.cache_key = (
+            filename
+            if filename in main.file_cache
+            else main.resolve_name_to_path(filename)
+        )
+        self.file_info = main.file_cache.get(self.cache_key)
+        self.max_line = main.maxline(filename) or 0
+        self.remap_entry = main.file2file_remap_lines.get(filename)
+        if main.get_option("strip_nl", self.opts):
+            self.view_lines = [line.rstrip("\n") for line in lines]
+        else:
+            self.view_lines = lines
+        return True
+
+    def check(self) -> None:
+        """Bind the view again if the file or its remapping has changed."""
+        if (
+            main.file_cache.get(self.cache_key) is not self.file_info
+            or main.file2file_remap_lines.get(self.filename) is not self.remap_entry
+        ):
+            self.bind()
+        elif (
+            self.file_info is not None
+            and main.get_option("reload_on_change", self.opts)
+            and monotonic() >= self.next_check
+        ):
+            self.next_check = monotonic() + VIEW_CHECK_INTERVAL
+            cached_stat = self.file_info.stat
+            try:
+                stat = os.stat(self.file_info.path)
+            except OSError:
+                return
+            if cached_stat is None or (
+                (stat.st_mtime, stat.st_size)
+                != (cached_stat.st_mtime, cached_stat.st_size)
+            ):
+                main.checkcache(self.cache_key)
+                self.bind()
+            pass
+        return
+
+    def line(self, line_number: int) -> Optional[str]:
+        """Return line `line_number` as getline() would, or None if there is
+        no such line."""
+        self.check()
+        if not 1 <= line_number <= self.max_line:
+            return None
+        if self.remap_entry is not None:
+            _, line_number = main.unmap_file_line(self.filename, line_number)
+            if not 1 <= line_number <= len(self.view_lines):
+                return None
+        return self.view_lines[line_number - 1]
+
+    def lines(self, start: int, end: int) -> List[Optional[str]]:
+        """Return lines `start` through `end` inclusive, as line() would
+        return them. Lines past the end of the file are left out."""
+        self.check()
+        start = max(start, 1)
+        end = min(end, self.max_line)
+        if self.remap_entry is None:
+            return self.view_lines[start - 1 : end]
+        return [self.line(line_number) for line_number in range(start, end + 1)]
+
+    def __len__(self) -> int:
+        """The largest line number, as maxline() gives."""
+        self.check()
+        return self.max_line
+
+
+def open_view(filename: str, opts=main.default_opts) -> Optional[FileView]:
+    """Return a FileView of `filename` with options `opts`, which are
+    those of getline(), or None if the file cannot be read."""
+    view = FileView(filename, opts)
+    return view if view.file_info is not None else None
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2026 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+The source lines around the current position of a frame, for a
+debugger to show after each step.
+
+Doing this with unmap_file(), unmap_file_line(), getline() for each line
+of context, and position_for_offset() resolves the file name, parses
+options and checks the line count over and over. frame_source() instead
+looks each thing up once: the file remapping, the file-cache entry, the
+lines in the requested style, the line remapping and the position table
+of the frame's code object.
+"""
+
+import os.path as osp
+from dataclasses import dataclass
+from typing import List, Optional
+
+import pyficache.main as main
+from pyficache.position_table import SourceSpan, position_for_offset
+
+
+@dataclass
+class FrameSource:
+    """
+    Source lines around the current line of a frame.
+
+    filename: the path the lines come from, after file remapping.
+
+    line_number: the current line in `filename`, after line remapping.
+
+    first_line: the line number in `filename` of lines[0].
+
+    lines: the lines from first_line through the current line and up to
+          `context` lines after it, syntax-highlighted if a style was given,
+          without trailing newlines.
+
+    source_line: the current line, without highlighting.
+
+    span: the source span (start line, start column, end line, end column)
+          in `filename` of the instruction the frame is at, or None if it
+          is not known. Columns are character positions.
+    """
+
+    filename: str
+    line_number: int
+    first_line: int
+    lines: List[str]
+    source_line: str
+    span: Optional[SourceSpan] = None
+
+    @property
+    def current_index(self) -> int:
+        """The index of the current line in `lines`."""
+        return self.line_number - self.first_line
+
+    def marker(self, char="^") -> str:
+        """Return a line that marks with `char` the part of the current line
+        that the span covers, to be shown under the current line. It is
+        empty if the span is not known."""
+        if self.span is None:
+            return ""
+        start_line, start_column, end_line, end_column = self.span
+        if start_line != self.line_number or start_column is None:
+            return ""
+        if end_line != start_line or end_column is None:
+            end_column = len(self.source_line.rstrip())
+        if end_column <= start_column:
+            return ""
+        return " " * start_column + char * (end_column - start_column)
+
+
+def byte_to_char_column(line: str, column: Optional[int]) -> Optional[int]:
+    """co_positions() columns are UTF-8 byte offsets; return `column` as a
+    character offset in `line`."""
+    if column is None or line.isascii():
+        return column
+    return len(line.encode("utf-8")[:column].decode("utf-8", errors="ignore"))
+
+
+def frame_source(
+    frame, context=2, style: Optional[str] = None
+) -> Optional[FrameSource]:
+    """Return the FrameSource for `frame`: its current line with `context`
+    lines before and after it, syntax-highlighted in pygments style `style`
+    unless that is None, along with the span of the current instruction.
+    None is returned if the source cannot be found.
+
+    File and line remappings are applied as getline() does.
+    """
+    code = frame.f_code
+    filename = main.unmap_file(code.co_filename)
+    file_info = main.file_cache.get(filename)
+    if file_info is None:
+        if not main.cache_file(filename):
+            filename = main.decompiled_file(filename) or filename
+            if not main.cache_file(filename):
+                return None
+        file_info = main.file_cache[filename]
+        pass
+
+    plain_lines = file_info.lines["plain"]
+    if style is None:
+        lines = plain_lines
+    else:
+        lines = file_info.lines.get(style)
+        if lines is None:
+            lines = main.getlines(filename, {"output": "terminal", "style": style})
+            if lines is None:
+                return None
+            pass
+        pass
+
+    frame_line = frame.f_lineno
+    line_number = frame_line
+    if filename in main.file2file_remap_lines:
+        _, line_number = main.unmap_file_line(filename, frame_line)
+    if not 1 <= line_number <= len(plain_lines):
+        return None
+
+    first_line = max(1, line_number - context)
+    last_line = min(len(plain_lines), line_number + context)
+    source_line = plain_lines[line_number - 1].rstrip("\n")
+
+    span = None
+    if (
+        line_number == frame_line
+        and frame.f_lasti >= 0
+        and hasattr(code, "co_positions")
+    ):
+        start_line, start_column, end_line, end_column = position_for_offset(
+            code, frame.f_lasti
+        ) or (None, None, None, None)
+        if start_line is not None and start_line <= len(plain_lines):
+            if end_line is not None and end_line <= len(plain_lines):
+                end_column = byte_to_char_column(
+                    plain_lines[end_line - 1], end_column
+                )
+            span = (
+                start_line,
+                byte_to_char_column(plain_lines[start_line - 1], start_column),
+                end_line,
+                end_column,
+            )
+        pass
+
+    return FrameSource(
+        filename=file_info.path or osp.abspath(filename),
+        line_number=line_number,
+        first_line=first_line,
+        lines=[line.rstrip("\n") for line in lines[first_line - 1 : last_line]],
+        source_line=source_line,
+        span=span,
+    )
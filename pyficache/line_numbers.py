@@ -1,10 +1,11 @@
-from xdis import findlinestarts, iscode, load_file
+from xdis import findlinestarts, iscode
 from collections import deque
 
+from pyficache.pycache import load_source_code
+
 
 def code_linenumbers_in_file(filename):
-    # FIXME: try to find bytecode for corresponding file
-    code = load_file(filename)
+    code = load_source_code(filename)
     return code_loop(code)
 
 
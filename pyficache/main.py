@@ -61,20 +61,43 @@ import os.path as osp
 import re
 import sys
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
 from dataclasses import dataclass, field
+from functools import wraps
 from importlib.util import find_spec, source_from_cache
-from types import CodeType
+from threading import RLock
+from types import CodeType, ModuleType
 from typing import Any, Dict, List, Optional, Set, Tuple
 
 from pygments import highlight
 from pygments.formatters import Terminal256Formatter, TerminalFormatter
 from pygments.lexers import PythonLexer
 from term_background import is_dark_background
-from xdis.lineoffsets import lineoffsets_in_file
 
+from pyficache.analysis_store import (
+    CodeTables,
+    code_key,
+    code_tables_line_numbers,
+    live_code_objects,
+    load_or_build_code_tables,
+)
+from pyficache.code_analysis import (
+    BYTECODE_EXTENSIONS,
+    CodeAnalysis,
+    analysis_line_numbers,
+    analyze_file,
+    get_breakpoint_table,
+)
 from pyficache.code_positions import update_code_position_cache
-from pyficache.line_numbers import code_linenumbers_in_file
-from pyficache.pyasm import PyasmLexer, compute_pyasm_line_mapping
+from pyficache.decompiled import decompile_bytecode
+from pyficache.pyasm import (
+    FastPyasmLexer,
+    PyasmLineMapping,
+    build_pyasm_line_mapping,
+)
+from pyficache.pyasm_stream import streaming_pyasm_files
+from pyficache.pycache import pycache_path
+from pyficache.valid_lines import ValidLines
 
 PYVER = "%s%s" % sys.version_info[0:2]
 
@@ -88,6 +111,8 @@ default_opts = {
     "output": "plain",  # To we want plain output?
     # Set to 'terminal'
     # for terminal syntax-colored output
+    "lazy_highlight": False,  # getline_range() highlights just the
+    # lines asked for
 }
 
 
@@ -110,6 +135,101 @@ def has_trailing_nl(string) -> bool:
     return len(string) > 0 and "\n" == string[-1]
 
 
+# Memoized results of resolve_name_to_path() for names that are not
+# already Python source paths. Failed resolutions, where the name
+# comes back unchanged, are stored as well so that we do not repeat
+# find_spec() searches that we know will not find anything.
+# The entries are only valid for the import-path state recorded in
+# `_resolve_cache_state`; see _import_path_state().
+_resolve_cache: Dict[str, str] = {}
+_resolve_cache_state: Optional[tuple] = None
+
+# A directory listing of each entry in ["."] + sys.path, used when
+# looking up relative filenames. The key is the directory name and the
+# value is the directory's modification time when it was listed along
+# with the set of names found in it. It is cleared when the current
+# directory or sys.path changes. A directory is listed again when a name
+# is not in its listing and its modification time has changed.
+_sys_path_index: Dict[str, Tuple[Optional[int], frozenset]] = {}
+_sys_path_index_state: Optional[tuple] = None
+
+
+def _import_path_state() -> tuple:
+    """Return a value that changes whenever the current directory,
+    sys.path or sys.path_importer_cache changes. It is used to
+    invalidate the name resolution caches above."""
+    try:
+        cwd = os.getcwd()
+    except OSError:
+        cwd = None
+    return (cwd, tuple(sys.path), len(sys.path_importer_cache))
+
+
+def clear_resolve_cache():
+    """Clear memoized name-to-path resolutions and the directory
+    index of sys.path."""
+    global _resolve_cache_state, _sys_path_index_state
+    _resolve_cache.clear()
+    _sys_path_index.clear()
+    _resolve_cache_state = _sys_path_index_state = None
+
+
+def find_in_sys_path(filename: str) -> Optional[str]:
+    """Look for relative path `filename` in the current directory
+    and then in the directories of sys.path. Return the first path
+    found or None if `filename` is not in any of these.
+
+    The first component of `filename` is checked against a
+    directory listing of each search directory that is computed
+    once and reused until the current directory or sys.path changes,
+    or the directory has changed.
+    """
+    global _sys_path_index_state
+    try:
+        cwd = os.getcwd()
+    except OSError:
+        cwd = None
+    state = (cwd, tuple(sys.path))
+    if state != _sys_path_index_state:
+        _sys_path_index.clear()
+        _sys_path_index_state = state
+
+    first_component = osp.normpath(filename).split(os.sep, 1)[0]
+    if osp.altsep:
+        first_component = first_component.split(osp.altsep, 1)[0]
+    if first_component in (os.curdir, os.pardir):
+        # Directory listings do not have "." or "..".
+        for dirname in ["."] + sys.path:
+            path = osp.join(dirname, filename)
+            if osp.exists(path):
+                return path
+            pass
+        return None
+
+    for dirname in ["."] + sys.path:
+        mtime, entries = _sys_path_index.get(dirname, (None, None))
+        if entries is None or first_component not in entries:
+            try:
+                dir_mtime = os.stat(dirname or ".").st_mtime_ns
+            except OSError:
+                dir_mtime = None
+            if entries is None or dir_mtime != mtime:
+                try:
+                    entries = frozenset(os.listdir(dirname or "."))
+                except OSError:
+                    entries = frozenset()
+                _sys_path_index[dirname] = (dir_mtime, entries)
+                pass
+            if first_component not in entries:
+                continue
+            pass
+        path = osp.join(dirname, filename)
+        if first_component == filename or osp.exists(path):
+            return path
+        pass
+    return None
+
+
 def resolve_name_to_path(path_or_name: str) -> str:
     """Try to "resolve" `path_or_name` info its constituent file path.
 
@@ -123,11 +243,33 @@ def resolve_name_to_path(path_or_name: str) -> str:
     If not we'll try other hacky methods.
 
     If all fails, we'll just return `path_or_name` unchanged.
+
+    Results are memoized until the current directory, sys.path or
+    sys.path_importer_cache changes.
     """
+    global _resolve_cache_state
     if path_or_name.endswith(".py"):
         # Assume Python source code
         return file2file_remap.get(path_or_name, path_or_name)
 
+    state = _import_path_state()
+    if state != _resolve_cache_state:
+        _resolve_cache.clear()
+        _resolve_cache_state = state
+    elif path_or_name in _resolve_cache:
+        return _resolve_cache[path_or_name]
+
+    resolved = _resolve_name_to_path(path_or_name)
+    _resolve_cache[path_or_name] = resolved
+    # find_spec() may have imported parent packages and so added
+    # entries to sys.path_importer_cache. That does not change
+    # what we have resolved so far.
+    _resolve_cache_state = _import_path_state()
+    return resolved
+
+
+def _resolve_name_to_path(path_or_name: str) -> str:
+    """The uncached part of resolve_name_to_path()."""
     if source_from_cache:
         try:
             source_path = source_from_cache(path_or_name)
@@ -165,11 +307,25 @@ class LineCacheInfo:
 
     Fields:
 
+    code_analysis: the results of compiling the file and walking its code objects
+          once; see pyficache.code_analysis. It is computed on first use.
+
     code_map: a dictionary mapping the name (co_name) of a file to its code object.
 
+    code_tables: the code-analysis tables of the file, which may have been read
+          from the analysis store; see pyficache.analysis_store. They are
+          computed on first use.
+
+    identity: the canonical key of the file; see file_identity().
+
     line_info: a dictionary mapping line number in a file to a list of
           code object and offsets pairs.
 
+    live_breakpoint_table: the breakpoint table with the running program's
+          code objects, along with the modules and module specs it was
+          built from; see live_breakpoint_table(). It is computed on first
+          use.
+
     linestarts: a dictionary mapping a bytecode offset to a source line number
 
     lines: A dictionary lines of the file, with pygments formatting applied according to
@@ -177,24 +333,47 @@ class LineCacheInfo:
           has been applied.
 
     path: the OS file path it it is not "".
+
+    pyasm_mapping: for a pyasm file, the line-number mapping between its
+          source lines and offsets and its pyasm lines. It is computed on first use.
+
+    pyasm_highlighted_lines: for a pyasm file, a dictionary mapping a
+          (style, pyasm line index) pair to the syntax-highlighted line.
     sha1: a sha1 of the contents of the "path" if it is not None
     stat: file system OS stat object, i.e. result of calling os.stat().
     """
 
+    code_analysis: Optional[CodeAnalysis] = None
     code_map: Dict[str, CodeType] = field(default_factory=dict)
+    code_tables: Optional[CodeTables] = None
     eols: Optional[Any] = None
+    identity: Optional[tuple] = None
     line_info: Optional[Dict[int, List[Tuple[CodeType, int]]]] = None
+    live_breakpoint_table: Optional[tuple] = None
     line_numbers: Optional[Dict[int, Any]] = None
     lines: Dict[str, List[str]] = field(default_factory=dict)
     linestarts: Optional[Dict[int, Any]] = None
     path: str = ""
+    pyasm_mapping: Optional[PyasmLineMapping] = None
+    pyasm_highlighted_lines: Dict[Tuple[str, int], str] = field(default_factory=dict)
     sha1: Optional[Any] = None
     stat: Optional[os.stat_result] = None
 
 
 # The file cache. The key is a name as would be given by co_filename
-# or __file__.
+# or __file__. Several names can refer to the same file, e.g. a
+# relative and an absolute path; these share a single LineCacheInfo.
 file_cache: Dict[str, LineCacheInfo] = {}
+
+# `_file_aliases` maps the canonical identity of a cached file (see
+# file_identity()) to the list of names under which its entry is
+# found in file_cache. The first name in the list is the one reported
+# by cached_files().
+_file_aliases: Dict[tuple, List[str]] = {}
+
+# Line-number information for bytecode files, keyed by absolute path. The
+# entries have code_tables, linestarts and line_numbers but no lines.
+bytecode_file_cache: Dict[str, LineCacheInfo] = {}
 pyasm_files: Set[str] = set()
 script_cache = {}
 
@@ -244,6 +423,11 @@ file2file_remap_lines = {}
 
 RemapLineEntry = namedtuple("RemapLineEntry", "mapped_path from_to_pairs")
 
+# `RangeLine` is a line returned by getline_range(): `line_number` is the
+# line number asked for, `mapped_line_number` the line number in the file
+# after line remapping, and `text` the line.
+RangeLine = namedtuple("RangeLine", "line_number mapped_line_number text")
+
 # Example. File "unmapped.template" contains:
 
 #  x = 1; y = 2       # line 1
@@ -281,18 +465,93 @@ RemapLineEntry = namedtuple("RemapLineEntry", "mapped_path from_to_pairs")
 # At such time as the need arises, we will work this.
 
 
+# Held while file_cache, `_file_aliases` or bytecode_file_cache are
+# changed, or looked at and then changed, so that cache_files() and
+# pyficache.aio can update the cache from worker threads while other
+# threads use it.
+cache_lock = RLock()
+
+
+def _with_cache_lock(func):
+    """Decorator that runs `func` holding cache_lock."""
+
+    @wraps(func)
+    def locked(*args, **kwargs):
+        with cache_lock:
+            return func(*args, **kwargs)
+
+    return locked
+
+
+def file_identity(path: str, stat: Optional[os.stat_result]) -> tuple:
+    """Return a key that identifies the file at `path` no matter which
+    name was used to reach it: its resolved real path together with
+    its device and inode numbers. When there is no stat information,
+    as for source text that came from a PEP 302 loader, device and inode
+    are 0.
+    """
+    if stat is None:
+        return (path, 0, 0)
+    return (osp.realpath(path), stat.st_dev, stat.st_ino)
+
+
+@_with_cache_lock
+def _add_cache_entry(entry: LineCacheInfo, names) -> None:
+    """Store `entry` in file_cache under each of `names` and record
+    these names as aliases of the entry's identity. Names of an
+    existing entry for the same identity are redirected to `entry`."""
+    aliases = _file_aliases.setdefault(entry.identity, [])
+    for name in aliases:
+        file_cache[name] = entry
+    for name in names:
+        if name in aliases:
+            continue
+        prev_entry = file_cache.get(name)
+        if prev_entry is not None and prev_entry.identity != entry.identity:
+            prev_aliases = _file_aliases.get(prev_entry.identity, [])
+            if name in prev_aliases:
+                prev_aliases.remove(name)
+                if not prev_aliases:
+                    del _file_aliases[prev_entry.identity]
+        aliases.append(name)
+        file_cache[name] = entry
+        pass
+    return
+
+
+@_with_cache_lock
+def _remove_cache_entry(entry: LineCacheInfo) -> List[str]:
+    """Remove `entry` from file_cache under all of its names.
+    The list of names removed is returned."""
+    aliases = _file_aliases.pop(entry.identity, [])
+    for name in aliases:
+        if file_cache.get(name) is entry:
+            del file_cache[name]
+    return aliases
+
+
+@_with_cache_lock
 def clear_file_cache(filename=None):
     """Clear the file cache. If no filename is given clear it entirely.
-    if a filename is given, clear just that filename."""
-    global file_cache, file2file_remap, file2file_remap_lines
+    if a filename is given, clear just that filename under all of the
+    names it is cached as."""
+    global file2file_remap, file2file_remap_lines
     if filename is not None:
+        filename = unmap_file(filename)
         if filename in file_cache:
-            del file_cache[filename]
+            _remove_cache_entry(file_cache[filename])
             pass
+        bytecode_file_cache.pop(osp.abspath(filename), None)
     else:
-        file_cache = {}
+        # Clear rather than rebind, so that code objects and position
+        # information are not kept alive by references to the old dictionary,
+        # e.g. pyficache.file_cache.
+        file_cache.clear()
+        _file_aliases.clear()
+        bytecode_file_cache.clear()
         file2file_remap = {}
         file2file_remap_lines = {}
+        clear_resolve_cache()
         pass
     return
 
@@ -302,21 +561,24 @@ def clear_file_format_cache():
     when you change the Pygments syntax or Token formatting
     and want to redo how files may have previously been
     syntax marked."""
-    for fname, cache_info in file_cache.items():
-        for format, lines in cache_info.lines.items():
+    for aliases in _file_aliases.values():
+        cache_info = file_cache[aliases[0]]
+        for format in cache_info.lines.keys():
             if "plain" == format:
                 continue
-            file_cache[fname].lines[format] = None
+            cache_info.lines[format] = None
             pass
         pass
     pass
 
 
 def cached_files():
-    """Return an array of cached file names"""
-    return list(file_cache.keys())
+    """Return an array of cached file names. Each file is listed once,
+    even when it is cached under several names."""
+    return [aliases[0] for aliases in _file_aliases.values()]
 
 
+@_with_cache_lock
 def checkcache(filename=None, opts=False):
     """Discard cache entries that are out of date. If *filename* is *None*
     all entries in the file cache *file_cache* are checked.  If we do not
@@ -331,7 +593,7 @@ def checkcache(filename=None, opts=False):
         pass
 
     if not filename:
-        filenames = list(file_cache.keys())
+        filenames = cached_files()
     elif filename in file_cache:
         filenames = [filename]
     else:
@@ -385,6 +647,7 @@ def update_script_cache(script, text, opts={}):
     return script
 
 
+@_with_cache_lock
 def cache_file(filename, reload_on_change=False, opts=default_opts):
     """Cache filename if it is not already cached.
     Return the expanded filename for it in the cache
@@ -403,6 +666,71 @@ def cache_file(filename, reload_on_change=False, opts=default_opts):
     return None
 
 
+def cache_files(
+    filenames, opts=default_opts, max_workers=None, timeout=None
+) -> Dict[str, Optional[str]]:
+    """Cache `filenames` concurrently in a pool of up to `max_workers`
+    threads, as cache_file() does for each. If `opts` asks for highlighted
+    output, the lines are highlighted too, as getlines() does.
+
+    Return a dictionary mapping each filename to the expanded filename
+    for it in the cache, or None if it could not be found. If `timeout` is
+    given, this returns after at most that many seconds; files that were
+    not ready by then are left out of the dictionary, and those already
+    being read are still cached in the background. An error raised while
+    caching a file is raised again here.
+    """
+    highlight = highlight_format(opts)[0] != "plain"
+
+    def cache_one(filename: str) -> Optional[str]:
+        fullname = cache_file(
+            filename, get_option("reload_on_change", opts), dict(opts)
+        )
+        if fullname and highlight:
+            getlines(filename, opts)
+        return fullname
+
+    filenames = list(dict.fromkeys(filenames))
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        futures = {
+            executor.submit(cache_one, filename): filename for filename in filenames
+        }
+        done, _ = wait(futures, timeout=timeout)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return {futures[future]: future.result() for future in done}
+
+
+def cache_frame_files(
+    frame_or_traceback, opts=default_opts, max_workers=None, timeout=None
+) -> Dict[str, Optional[str]]:
+    """Cache the files of all of the frames of a stack, as cache_files()
+    does. `frame_or_traceback` is either a frame, whose callers are
+    followed, or a traceback, whose later entries are followed."""
+    filenames = []
+    if hasattr(frame_or_traceback, "tb_frame"):
+        tb = frame_or_traceback
+        while tb is not None:
+            filenames.append(tb.tb_frame.f_code.co_filename)
+            tb = tb.tb_next
+            pass
+    else:
+        frame = frame_or_traceback
+        while frame is not None:
+            filenames.append(frame.f_code.co_filename)
+            frame = frame.f_back
+            pass
+        pass
+    # Skip pseudo-files such as "<string>" and "<frozen ...>".
+    filenames = [
+        filename
+        for filename in filenames
+        if not (filename.startswith("<") and filename.endswith(">"))
+    ]
+    return cache_files(filenames, opts, max_workers, timeout)
+
+
 def is_cached(file_or_script) -> bool:
     """Return True if file_or_script is cached"""
     if isinstance(file_or_script, str):
@@ -431,6 +759,29 @@ def is_python_assembly_file(filename: str) -> bool:
     return filename.endswith(".pyasm")
 
 
+def pyasm_file_info(filename: str) -> Optional[LineCacheInfo]:
+    """Return the cache entry for pyasm file `filename` with its
+    `pyasm_mapping` field filled in. The mapping is computed only once
+    for each version of the file's contents, and it is also registered
+    as the line remapping for `filename`.
+    """
+    filename = unmap_file(filename)
+    if filename not in file_cache:
+        cache_file(filename)
+        if filename not in file_cache:
+            return None
+        pass
+    file_info = file_cache[filename]
+    if file_info.pyasm_mapping is None:
+        pyasm_mapping = build_pyasm_line_mapping(file_info.lines["plain"])
+        file_info.pyasm_mapping = pyasm_mapping
+        file_info.pyasm_highlighted_lines.clear()
+        file2file_remap_lines[filename] = RemapLineEntry(
+            filename, pyasm_mapping.from_to_pairs
+        )
+    return file_info
+
+
 # FIXME: add approximate flag.
 def get_pyasm_line(
     filepath: str,
@@ -443,47 +794,53 @@ def get_pyasm_line(
     Get a line from a python assembly file. If `is_source_line` is True, then we need to look
     up the `location`, a line number, in the remapping file. Otherwise we will take the `location`
     to be the index in the pyasm file.
+
+    If the file has been registered with stream_pyasm_file(), lines are read from the
+    memory-mapped file, and only the part of the file indexed so far is searched.
     """
     filename = unmap_file(filepath)
 
-    lines = getlines(filename, {"output": "plain"}, is_pyasm=True)
+    streaming = streaming_pyasm_files.get(filename)
+    if streaming is None:
+        lines = getlines(filename, {"output": "plain"}, is_pyasm=True)
+        if lines is None:
+            return None, -1
     pyasm_line_index = -1
-    if lines is None:
-        return None, -1
 
-    if is_source_line:
+    if streaming is not None:
+        file_info = None
+        if is_source_line:
+            pyasm_line_index = streaming.pyasm_line_for(location, offset)
+            line = streaming.line(pyasm_line_index)
+        else:
+            pyasm_line_index = location
+            line = streaming.line(location + 1)
+        pass
+    elif is_source_line:
         line = None
-        from_to_lines, line_offset_to_remapped_line = compute_pyasm_line_mapping(lines)
-        remap_file_lines(filename, filename, from_to_lines)
-        remap_line_entries = file2file_remap_lines.get(filename)
-        if remap_line_entries:
-            from_to_lines = remap_line_entries.from_to_pairs
-            if offset >= 0 and (
-                pyasm_line_index := line_offset_to_remapped_line.get((location, offset))
-            ):
+        file_info = pyasm_file_info(filename)
+        if file_info is None:
+            return None, -1
+        pyasm_mapping = file_info.pyasm_mapping
+        if offset >= 0 and (
+            pyasm_line_index := pyasm_mapping.line_offset_to_remapped_line.get(
+                (location, offset)
+            )
+        ):
+            line = lines[pyasm_line_index - 1]
+
+        if line is None:
+            pyasm_line_index = pyasm_mapping.source_line_to_pyasm_line.get(
+                location, -1
+            )
+            if pyasm_line_index > 0:
                 line = lines[pyasm_line_index - 1]
-
-            if line is None:
-                line_max = len(lines)
-                # FIXME: use binary search
-                # Note we assume assume from_line is increasing.
-                # Add sentinel at end of from pairs to handle using the final
-                # entry for line numbers greater than it.
-                # Find the closest mapped line number equal or before line_number.
-                for python_line, try_pyasm_index in remap_line_entries.from_to_pairs + (
-                    (large_int, line_max),
-                ):
-                    if python_line == location:
-                        pyasm_line_index = try_pyasm_index
-                        line = lines[pyasm_line_index - 1]
-                        break
-                    pass
-                pass
             pass
         pass
     else:
         if location >= len(lines):
             return None, -1
+        file_info = file_cache.get(filename)
         pyasm_line_index = location
         line = lines[pyasm_line_index]
 
@@ -492,13 +849,53 @@ def get_pyasm_line(
         return None, -1
 
     if fmt != "plain":
-        line = highlight_string(line, fmt, lexer=pyasm_lexer)
+        # Key on the index into `lines`, which is 0 origin.
+        key = (fmt, pyasm_line_index - 1 if is_source_line else pyasm_line_index)
+        if file_info is None:
+            line = highlight_string(line, style=fmt, lexer=pyasm_lexer)
+        elif key in file_info.pyasm_highlighted_lines:
+            line = file_info.pyasm_highlighted_lines[key]
+        else:
+            line = highlight_string(line, style=fmt, lexer=pyasm_lexer)
+            file_info.pyasm_highlighted_lines[key] = line
 
     if get_option("strip_nl", opts):
         line = line.rstrip("\n")
     return line, pyasm_line_index
 
 
+def get_pyasm_location(filepath: str, pyasm_line: int) -> Optional[tuple]:
+    """
+    Return the (source line, offset, code object name) triple for the
+    instruction on line `pyasm_line` of python assembly file `filepath`,
+    or None if that line is not an instruction.
+    """
+    file_info = pyasm_file_info(filepath)
+    if file_info is None:
+        return None
+    return file_info.pyasm_mapping.pyasm_line_to_location.get(pyasm_line)
+
+
+def get_pyasm_lines_for_source(
+    filepath: str, start_line: int, end_line: Optional[int] = None
+) -> List[int]:
+    """
+    Return the pyasm instruction lines of python assembly file `filepath` for
+    source lines `start_line` through `end_line` inclusive. If `end_line` is
+    not given, just the pyasm lines for `start_line` are returned.
+    """
+    file_info = pyasm_file_info(filepath)
+    if file_info is None:
+        return []
+    if end_line is None:
+        end_line = start_line
+    source_line_to_pyasm_lines = file_info.pyasm_mapping.source_line_to_pyasm_lines
+    pyasm_lines = []
+    for line_number in range(start_line, end_line + 1):
+        pyasm_lines.extend(source_line_to_pyasm_lines.get(line_number, []))
+    return sorted(pyasm_lines)
+
+
 def getline(file_or_script: str, line_number: int, opts=default_opts):
     """Get line *line_number* from file named *file_or_script*. Return None if
     there was a problem or it is not found.
@@ -510,6 +907,8 @@ def getline(file_or_script: str, line_number: int, opts=default_opts):
     lines = pyficache.getline("/tmp/myfile.py")
     """
     filename = unmap_file(file_or_script)
+    if filename not in file_cache and not cache_file(filename):
+        filename = decompiled_file(filename) or filename
 
     is_pyasm = opts.get("is_pyasm", is_python_assembly_file(filename))
     lines = getlines(filename, opts, is_pyasm=is_pyasm)
@@ -524,13 +923,36 @@ def getline(file_or_script: str, line_number: int, opts=default_opts):
     return None
 
 
-def getlines(filename, opts=default_opts, is_pyasm: Optional[bool] = None):
-    """Read lines of *filename* and cache the results. However, if
-    *filename* was previously cached use the results from the
-    cache. Return *None* if we can not get lines
+def decompiled_file(filename: str) -> Optional[str]:
+    """For a Python source file `filename` that does not exist, but whose
+    bytecode does, either next to where it would be or in __pycache__,
+    return the path of its decompiled source; see pyficache.decompiled.
+    `filename` is then remapped to that path, with line numbers mapped
+    by the decompiler's line map. None is returned if there is no such
+    bytecode file or it cannot be decompiled.
     """
-    if get_option("reload_on_change", opts):
-        checkcache(filename)
+    if not filename.endswith(".py") or osp.exists(filename):
+        return None
+    bytecode_path = filename + "c"
+    if not osp.isfile(bytecode_path):
+        bytecode_path = pycache_path(filename)
+        if bytecode_path is None:
+            return None
+    decompiled = decompile_bytecode(bytecode_path)
+    if decompiled is None:
+        return None
+    remap_file(decompiled.path, filename)
+    if decompiled.line_map:
+        file2file_remap_lines[decompiled.path] = RemapLineEntry(
+            decompiled.path, decompiled.line_map
+        )
+    return decompiled.path
+
+
+def highlight_format(opts) -> Tuple[str, dict]:
+    """Return the key that lines formatted according to `opts` are cached
+    under in LineCacheInfo.lines, and the options for highlight_array()
+    to format them with."""
     fmt = get_option("output", opts)
     if fmt == "plain":
         cs = "plain"
@@ -538,9 +960,6 @@ def getlines(filename, opts=default_opts, is_pyasm: Optional[bool] = None):
         cs = opts.get("style")
     highlight_opts = {}
 
-    if is_pyasm is None:
-        is_pyasm = is_python_assembly_file(filename)
-
     # Set list style based on "style" option passed
     # if no style given use "monokai" for dark backgrounds,
     # and "tango" for light backgrounds.
@@ -551,14 +970,105 @@ def getlines(filename, opts=default_opts, is_pyasm: Optional[bool] = None):
         highlight_opts["style"] = "monokai"
     else:
         highlight_opts["style"] = "tango"
+    return fmt, highlight_opts
+
+
+def getline_range(
+    file_or_script: str, start: int, end: int, opts=default_opts
+) -> Optional[List[RangeLine]]:
+    """Return lines `start` through `end` inclusive of `file_or_script`
+    in one call, each as getline() would return it. Each line is given
+    as a RangeLine: the line number asked for, the line number it is
+    remapped to, and the line. Lines past the end of the file are left
+    out. None is returned if there was a problem or the file is not found.
+
+    If the "lazy_highlight" option is set and the file has not already
+    been highlighted in the requested style, just these lines are
+    highlighted rather than the whole file. Since they are highlighted
+    without the lines before them, a construct such as a string that
+    starts before `start` may be colored differently.
+    """
+    filename = unmap_file(file_or_script)
+    if filename not in file_cache and not cache_file(filename):
+        filename = decompiled_file(filename) or filename
 
-    if filename not in file_cache:
-        filename = resolve_name_to_path(filename)
-        update_cache(filename, opts)
-        if filename not in file_cache:
+    is_pyasm = opts.get("is_pyasm", is_python_assembly_file(filename))
+    fmt, highlight_opts = highlight_format(opts)
+    lazy = fmt != "plain" and get_option("lazy_highlight", opts)
+    lines = getlines(
+        filename, dict(opts, output="plain") if lazy else opts, is_pyasm=is_pyasm
+    )
+    if lines is None:
+        return None
+    if lazy:
+        file_info = file_cache.get(filename) or file_cache.get(
+            resolve_name_to_path(filename)
+        )
+        if file_info is not None and fmt in file_info.lines:
+            lines = file_info.lines[fmt]
+            lazy = False
+        pass
+
+    max_line = maxline(filename) or 0
+    is_remapped = filename in file2file_remap_lines
+    range_lines = []
+    for line_number in range(max(start, 1), min(end, max_line) + 1):
+        mapped_line_number = (
+            unmap_file_line(filename, line_number)[1] if is_remapped else line_number
+        )
+        if 1 <= mapped_line_number <= len(lines):
+            text = lines[mapped_line_number - 1]
+            range_lines.append(RangeLine(line_number, mapped_line_number, text))
+        pass
+
+    if lazy and range_lines:
+        highlight_opts["lexer"] = range_pyasm_lexer if is_pyasm else range_python_lexer
+        highlighted = highlight_array(
+            [
+                line.text if line.text.endswith("\n") else line.text + "\n"
+                for line in range_lines
+            ],
+            **highlight_opts,
+        )
+        range_lines = [
+            line._replace(text=text) for line, text in zip(range_lines, highlighted)
+        ]
+    if get_option("strip_nl", opts):
+        range_lines = [
+            line._replace(text=line.text.rstrip("\n")) for line in range_lines
+        ]
+    return range_lines
+
+
+def getline_window(
+    file_or_script: str, center: int, before: int, after: int, opts=default_opts
+) -> Optional[List[RangeLine]]:
+    """Return the lines of `file_or_script` from `before` lines before line
+    `center` through `after` lines after it, as getline_range() does."""
+    return getline_range(file_or_script, center - before, center + after, opts)
+
+
+def getlines(filename, opts=default_opts, is_pyasm: Optional[bool] = None):
+    """Read lines of *filename* and cache the results. However, if
+    *filename* was previously cached use the results from the
+    cache. Return *None* if we can not get lines
+    """
+    if get_option("reload_on_change", opts):
+        checkcache(filename)
+    if is_pyasm is None:
+        is_pyasm = is_python_assembly_file(filename)
+    fmt, highlight_opts = highlight_format(opts)
+
+    file_info = file_cache.get(filename)
+    if file_info is None:
+        with cache_lock:
+            filename = resolve_name_to_path(filename)
+            update_cache(filename, opts)
+            file_info = file_cache.get(filename)
+        if file_info is None:
             return None
         pass
-    lines = file_cache[filename].lines
+    lines = file_info.lines
     if is_pyasm:
         highlight_opts["lexer"] = pyasm_lexer
     if fmt not in lines.keys():
@@ -578,9 +1088,14 @@ def highlight_array(array, trailing_nl=True, **options):
     return lines
 
 
-pyasm_lexer = PyasmLexer()
+pyasm_lexer = FastPyasmLexer()
 python_lexer = PythonLexer()
 
+# Lexers for highlighting part of a file: leading and trailing blank lines
+# are kept so that highlighted lines line up with the lines given.
+range_pyasm_lexer = FastPyasmLexer(stripnl=False)
+range_python_lexer = PythonLexer(stripnl=False)
+
 # TerminalFormatter uses a colorTHEME with light and dark pairs.
 # But Terminal256Formatter uses a colorSTYLE.  Ugh
 dark_terminal_formatter = TerminalFormatter(bg="dark")
@@ -700,10 +1215,10 @@ def size(filename, use_cache_only=False) -> Optional[int]:
             return None
         pass
     if filename in pyasm_files or is_python_assembly_file(filename):
-        lines = getlines(filename, opts={}, is_pyasm=True)
-        from_to_lines, _ = compute_pyasm_line_mapping(lines)
-        remap_file_lines(filename, filename, from_to_lines)
-        return max([line for line, offset in from_to_lines])
+        file_info = pyasm_file_info(filename)
+        if file_info is None:
+            return None
+        return file_info.pyasm_mapping.max_source_line
     return len(file_cache[filename].lines["plain"])
 
 
@@ -754,14 +1269,275 @@ def trace_line_numbers(filename: str, reload_on_change=False):
     if not fullname:
         return None
     linecache_info = file_cache[filename]
+    analysis = get_code_analysis(linecache_info, fullname)
     if not linecache_info.line_numbers:
-        linecache_info.line_numbers = code_linenumbers_in_file(fullname)
+        linecache_info.line_numbers = analysis.line_number_set
         pass
     if not linecache_info.line_info:
-        linecache_info.line_info = update_code_position_cache(fullname)
+        linecache_info.line_info = analysis.line_info
     return linecache_info.line_numbers
 
 
+def get_code_analysis(file_info: LineCacheInfo, fullname: str) -> CodeAnalysis:
+    """Return the CodeAnalysis of `file_info`, compiling `fullname` and
+    walking its code objects if that has not been done yet for this
+    version of the file."""
+    if file_info.code_analysis is None:
+        file_info.code_analysis = analyze_file(fullname)
+    return file_info.code_analysis
+
+
+def is_bytecode_file(filename: str) -> bool:
+    """Return True if `filename` names a Python bytecode file."""
+    return filename.endswith(BYTECODE_EXTENSIONS)
+
+
+def bytecode_file_info(filename: str) -> Optional[LineCacheInfo]:
+    """Return the line-number information for bytecode file `filename`,
+    which can be for any Python version that xdis supports, or None if it
+    cannot be read.
+
+    The code-analysis tables are kept until the file's modification time or
+    size changes, so the file is unmarshalled and its code objects walked
+    only once. If an analysis store is set, the tables are also saved
+    there, keyed by a hash of the file and its magic number.
+    """
+    path = osp.abspath(filename)
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+    file_info = bytecode_file_cache.get(path)
+    if (
+        file_info is not None
+        and file_info.stat.st_mtime == file_stat.st_mtime
+        and file_info.stat.st_size == file_stat.st_size
+    ):
+        return file_info
+    try:
+        tables = load_or_build_code_tables(path)
+    except (EOFError, ImportError, OSError, TypeError, ValueError):
+        bytecode_file_cache.pop(path, None)
+        return None
+    file_info = LineCacheInfo(
+        code_tables=tables,
+        linestarts=tables.linestarts,
+        path=path,
+        stat=file_stat,
+    )
+    bytecode_file_cache[path] = file_info
+    return file_info
+
+
+def get_code_tables(filename: str, reload_on_change=False) -> Optional[CodeTables]:
+    """Return the code-analysis tables of `filename`, with code objects
+    referred to by code key. If an analysis store is set, the tables are
+    read from there when it has them for the current contents of the
+    file, so that the file need not be compiled; see
+    pyficache.analysis_store.
+
+    `filename` can also be a bytecode file; see bytecode_file_info().
+    """
+    if is_bytecode_file(filename):
+        file_info = bytecode_file_info(filename)
+        return None if file_info is None else file_info.code_tables
+    fullname = cache_file(filename, reload_on_change)
+    if not fullname:
+        return None
+    file_info = file_cache[filename]
+    if file_info.code_tables is None:
+        file_info.code_tables = load_or_build_code_tables(
+            fullname, file_info.code_analysis
+        )
+    return file_info.code_tables
+
+
+def get_valid_lines(filename: str, reload_on_change=False) -> Optional[ValidLines]:
+    """Return the lines of `filename` that a breakpoint can stop at, the
+    same line numbers as trace_line_numbers() returns, as a ValidLines.
+    Use this to move a breakpoint on a line that has no code to the
+    nearest line that does.
+    """
+    tables = get_code_tables(filename, reload_on_change)
+    if tables is None:
+        return None
+    if tables.valid_lines is None:
+        tables.valid_lines = ValidLines(tables.line_numbers)
+    return tables.valid_lines
+
+
+def resolve_breakpoint_lines(
+    filename: str, line_numbers, forward=True, reload_on_change=False
+) -> Optional[Dict[int, Optional[int]]]:
+    """Return a dictionary mapping each of `line_numbers` in `filename` to
+    the line a breakpoint there would stop at: the line itself, or else
+    the next stoppable line, or the previous one if `forward` is False.
+    A line with no such stoppable line maps to None.
+
+    This is for validating many breakpoints at once, as when a
+    debugger session is restored.
+    """
+    valid_lines = get_valid_lines(filename, reload_on_change)
+    if valid_lines is None:
+        return None
+    return valid_lines.resolve_lines(line_numbers, forward)
+
+
+# The modules in sys.modules by the real path of their __file__, as
+# (sys.modules key, module) pairs. It is built again when the number of
+# modules in sys.modules changes, or when a module found in it has been
+# replaced there.
+_module_file_index: Dict[str, List[Tuple[str, ModuleType]]] = {}
+_module_file_index_size = -1
+
+# The real paths of the absolute module __file__ names seen so far.
+_module_realpaths: Dict[str, str] = {}
+
+
+def loaded_modules(realpath: str) -> List[ModuleType]:
+    """Return the modules in sys.modules that were loaded from the file
+    whose real path is `realpath`."""
+    global _module_file_index_size
+    entries = _module_file_index.get(realpath, [])
+    if len(sys.modules) != _module_file_index_size or any(
+        sys.modules.get(name) is not module for name, module in entries
+    ):
+        _module_file_index.clear()
+        _module_file_index_size = len(sys.modules)
+        for name, module in list(sys.modules.items()):
+            module_file = getattr(module, "__file__", None)
+            if not isinstance(module_file, str):
+                continue
+            module_realpath = _module_realpaths.get(module_file)
+            if module_realpath is None:
+                module_realpath = osp.realpath(module_file)
+                if osp.isabs(module_file):
+                    _module_realpaths[module_file] = module_realpath
+            _module_file_index.setdefault(module_realpath, []).append(
+                (name, module)
+            )
+            pass
+        entries = _module_file_index.get(realpath, [])
+    return [module for _, module in entries]
+
+
+def live_breakpoint_table(
+    filename: str, live, reload_on_change=False
+) -> Optional[Dict[int, List[Tuple[CodeType, Tuple[int, ...]]]]]:
+    """Return the breakpoint table of `filename` with the code objects of
+    the analysis replaced by the running program's own code objects,
+    found from `live`; see pyficache.analysis_store.live_code_objects().
+    Entries whose code object is not found are left out.
+
+    If `live` is None, the modules in sys.modules loaded from `filename`
+    are used, and the table is kept with the file's cache entry until
+    those modules are imported or reloaded again.
+    """
+    fullname = cache_file(filename, reload_on_change)
+    if not fullname:
+        return None
+    file_info = file_cache[filename]
+    if live is None:
+        realpath = (
+            file_info.identity[0]
+            if file_info.identity and file_info.stat
+            else osp.realpath(fullname)
+        )
+        modules = [
+            (module, getattr(module, "__spec__", None))
+            for module in loaded_modules(realpath)
+        ]
+        if file_info.live_breakpoint_table is not None:
+            built_from, table = file_info.live_breakpoint_table
+            if len(built_from) == len(modules) and all(
+                module is old_module and spec is old_spec
+                for (module, spec), (old_module, old_spec) in zip(
+                    modules, built_from
+                )
+            ):
+                return table
+            pass
+        live = [module for module, _ in modules]
+    else:
+        modules = None
+
+    live_codes = live_code_objects(live, fullname)
+    table = {}
+    for line_number, code_offsets in get_breakpoint_table(
+        get_code_analysis(file_info, fullname)
+    ).items():
+        live_offsets = []
+        for code, offsets in code_offsets:
+            candidates = live_codes.get(code_key(code), [])
+            if len(candidates) > 1:
+                # Code objects with the same name on the same line.
+                candidates = [c for c in candidates if c == code]
+            if candidates:
+                live_offsets.append((candidates[0], offsets))
+            pass
+        if live_offsets:
+            table[line_number] = live_offsets
+        pass
+    if modules is not None:
+        file_info.live_breakpoint_table = (modules, table)
+    return table
+
+
+def breakpoint_code_offsets(
+    filename: str, line_number: int, reload_on_change=False, live=None
+) -> Optional[List[Tuple[CodeType, Tuple[int, ...]]]]:
+    """Return the code objects of the running program for `filename` that
+    have instructions starting line `line_number`, as a list of (code
+    object, offsets) pairs. The list is empty if no instruction starts
+    that line, or no such code object is found.
+
+    Code objects are found from `live`, or from the modules loaded from
+    `filename` if `live` is None; see live_breakpoint_table(). As they are
+    the running program's own code objects, on Python 3.12 and later a
+    debugger can pass them to sys.monitoring.set_local_events() to get
+    LINE events for just the code that a breakpoint is in. For code that
+    is not loaded yet, use breakpoint_code_keys().
+    """
+    table = live_breakpoint_table(filename, live, reload_on_change)
+    if table is None:
+        return None
+    return table.get(line_number, [])
+
+
+def breakpoint_code_keys(
+    filename: str, line_number: int, reload_on_change=False
+) -> Optional[List[Tuple[Tuple[str, int], Tuple[int, ...]]]]:
+    """Like breakpoint_code_offsets(), but with code objects given by their
+    code key; see pyficache.analysis_store.code_key(). This can be answered
+    from the analysis store without compiling `filename`.
+    """
+    tables = get_code_tables(filename, reload_on_change)
+    if tables is None:
+        return None
+    return tables.breakpoint_table.get(line_number, [])
+
+
+def codes_to_instrument(
+    filename: str, line_numbers, reload_on_change=False, live=None
+) -> Optional[Dict[CodeType, Set[int]]]:
+    """Return the smallest set of the running program's code objects for
+    `filename` that need LINE events for breakpoints on `line_numbers`, as
+    a dictionary mapping each such code object to the offsets of the
+    instructions starting those lines. Code objects are found as
+    breakpoint_code_offsets() finds them.
+    """
+    table = live_breakpoint_table(filename, live, reload_on_change)
+    if table is None:
+        return None
+    codes: Dict[CodeType, Set[int]] = {}
+    for line_number in line_numbers:
+        for code, offsets in table.get(line_number, []):
+            codes.setdefault(code, set()).update(offsets)
+            pass
+        pass
+    return codes
+
+
 def get_linecache_info(
     filename: str, reload_on_change=False
 ) -> Optional[LineCacheInfo]:
@@ -770,13 +1546,15 @@ def get_linecache_info(
     if not fullname:
         return None
     linecache_info = file_cache[filename]
+    analysis = get_code_analysis(linecache_info, fullname)
     if not linecache_info.line_numbers:
-        linecache_info.line_numbers = code_linenumbers_in_file(fullname)
-        code_info = lineoffsets_in_file(fullname)
-        linecache_info.code_map = code_info.code_map
+        linecache_info.line_numbers = analysis.line_number_set
+        pass
+    if not linecache_info.code_map:
+        linecache_info.code_map = analysis.code_map
         pass
     if not linecache_info.line_info:
-        linecache_info.line_info = update_code_position_cache(fullname)
+        linecache_info.line_info = analysis.line_info
     return linecache_info
 
 
@@ -797,18 +1575,36 @@ def cache_code_lines(
 
     Internally the co_lineno table in the code to get this. But here,
     you don't need to know that. xdis does the heavy lifting.
+
+    `filename` can also be a bytecode file of any Python version that
+    xdis supports. Its code_map is then empty, since code objects are
+    not kept; see bytecode_file_info().
     """
+    if is_bytecode_file(filename):
+        file_info = bytecode_file_info(filename)
+        if file_info is not None:
+            file_info.line_numbers = code_tables_line_numbers(
+                file_info.code_tables,
+                toplevel_only=toplevel_only,
+                include_offsets=include_offsets,
+            )
+        return file_info
     fullname = cache_file(filename, reload_on_change)
     if not fullname:
         return None
     file_info = file_cache[filename]
     if not file_info.line_numbers:
-        code_info = lineoffsets_in_file(fullname, toplevel_only=toplevel_only)
-        file_info.line_numbers = code_info.line_numbers(include_offsets=include_offsets)
-        lineno_info = update_code_position_cache(fullname)
-        file_info.lineno_info = lineno_info
-        file_info.linestarts = code_info.linestarts
-        file_info.code_map = code_info.code_map
+        analysis = get_code_analysis(file_info, fullname)
+        file_info.line_numbers = analysis_line_numbers(
+            analysis, toplevel_only=toplevel_only, include_offsets=include_offsets
+        )
+        file_info.lineno_info = analysis.line_info
+        file_info.linestarts = analysis.linestarts
+        file_info.code_map = (
+            {analysis.code.co_name: analysis.code}
+            if toplevel_only
+            else analysis.code_map
+        )
         pass
     return file_info
 
@@ -868,7 +1664,10 @@ def code_offset_info(
     # information and want to cache information about the entire file,
     # even though we accept offsets for only toplevel.
     # Perhaps we should revise the API
-    file_info = code_lines(filename, toplevel_only=False, include_offsets=True)
+    if is_bytecode_file(filename):
+        file_info = bytecode_file_info(filename)
+    else:
+        file_info = code_lines(filename, toplevel_only=False, include_offsets=True)
 
     if file_info is None or file_info.linestarts is None:
         return None
@@ -956,6 +1755,7 @@ def filename_readlines(filename):
     return lines, eols
 
 
+@_with_cache_lock
 def update_cache(filename, opts=default_opts, module_globals=None) -> Optional[str]:
     """
     Update a file_cache entry if lines in in "filename" have changed.
@@ -972,14 +1772,14 @@ def update_cache(filename, opts=default_opts, module_globals=None) -> Optional[s
     orig_filename = filename
     filename = resolve_name_to_path(filename)
     if filename in file_cache:
-        # Delete old file_cache entry after saving.
-        # It might get reinstated though, if
-        # the linecache info indicates it has been
-        # unchanged.
+        # Delete old file_cache entry under all of its names after
+        # saving. It might get reinstated though, if the linecache
+        # info indicates it has been unchanged.
         old_cached_info = file_cache[filename]
-        del file_cache[filename]
+        old_aliases = _remove_cache_entry(old_cached_info)
     else:
         old_cached_info = None
+        old_aliases = []
 
     path = osp.abspath(filename)
     # stat contains stat info for the file we eventually read in
@@ -988,8 +1788,8 @@ def update_cache(filename, opts=default_opts, module_globals=None) -> Optional[s
     if get_option("use_linecache_lines", opts):
         fname_list = [filename]
         mapped_path = file2file_remap.get(path)
-        if mapped_path:
-            if mapped_path != path:
+        if mapped_path or old_cached_info:
+            if mapped_path and mapped_path != path:
                 fname_list.append(mapped_path)
             for filename in fname_list:
                 try:
@@ -1007,8 +1807,10 @@ def update_cache(filename, opts=default_opts, module_globals=None) -> Optional[s
                         # Info has not changed, so reinstate prior filcache info, but use recently-read
                         # stat info.
                         old_cached_info.stat = stat
-                        file_cache[filename] = file_cache[orig_filename] = (
-                            old_cached_info
+                        old_cached_info.identity = file_identity(path, stat)
+                        _add_cache_entry(
+                            old_cached_info,
+                            old_aliases + [filename, orig_filename],
                         )
                         if "style" in opts:
                             key = opts["style"]
@@ -1021,24 +1823,26 @@ def update_cache(filename, opts=default_opts, module_globals=None) -> Optional[s
                         formatted_line_list = {
                             "plain": stripped_lines,
                         }
-                        file_cache[filename] = file_cache[orig_filename] = (
+                        _add_cache_entry(
                             LineCacheInfo(
+                                identity=file_identity(path, stat),
                                 line_numbers=None,
                                 lines=formatted_line_list,
                                 linestarts=None,
                                 path=path,
                                 sha1=None,
                                 stat=stat,
-                            )
+                            ),
+                            old_aliases + [filename, orig_filename],
                         )
                 except Exception:
                     pass
                 pass
 
-            file2file_remap[orig_filename] = filename
-            file2file_remap[osp.abspath(orig_filename)] = filename
-            file2file_remap[path] = filename
             if filename in file_cache:
+                _add_cache_entry(
+                    file_cache[filename], [osp.abspath(orig_filename), path]
+                )
                 return filename
         pass
     pass
@@ -1073,10 +1877,17 @@ def update_cache(filename, opts=default_opts, module_globals=None) -> Optional[s
                 lines[key] = highlight_array(
                     raw_string.split("\n"), trailing_nl, **highlight_opts
                 )
-                file_cache[filename] = LineCacheInfo(
-                    stat=None, lines=lines, linestarts=None, path=filename, sha1=None
+                _add_cache_entry(
+                    LineCacheInfo(
+                        identity=file_identity(filename, None),
+                        stat=None,
+                        lines=lines,
+                        linestarts=None,
+                        path=filename,
+                        sha1=None,
+                    ),
+                    old_aliases + [filename, path],
                 )
-                file2file_remap[path] = filename
                 return filename
             pass
         pass
@@ -1084,15 +1895,10 @@ def update_cache(filename, opts=default_opts, module_globals=None) -> Optional[s
     if not osp.isabs(filename):
         # Try looking through the module search path, which is only useful
         # when handling a relative filename.
-        stat = None
-        for dirname in ["."] + sys.path:
-            path = osp.join(dirname, filename)
-            if osp.exists(path):
-                stat = os.stat(path)
-                break
-            pass
-        if not stat:
+        path = find_in_sys_path(filename)
+        if path is None:
             return None
+        stat = os.stat(path)
         pass
 
     try:
@@ -1114,23 +1920,21 @@ def update_cache(filename, opts=default_opts, module_globals=None) -> Optional[s
         highlight_opts = {}
 
     lines[key] = highlight_array(raw_string.split("\n"), trailing_nl, **highlight_opts)
-    if orig_filename != filename:
-        file2file_remap[orig_filename] = filename
-        file2file_remap[osp.abspath(orig_filename)] = filename
-        pass
-    pass
 
-    file_cache[filename] = LineCacheInfo(
-        code_map={},
-        eols=eols,
-        line_numbers=None,
-        lines=lines,
-        linestarts=None,
-        path=path,
-        sha1=None,
-        stat=stat,
+    _add_cache_entry(
+        LineCacheInfo(
+            code_map={},
+            eols=eols,
+            identity=file_identity(path, stat),
+            line_numbers=None,
+            lines=lines,
+            linestarts=None,
+            path=path,
+            sha1=None,
+            stat=stat,
+        ),
+        old_aliases + [filename, orig_filename, osp.abspath(orig_filename), path],
     )
-    file2file_remap[path] = filename
     return filename
 
 
@@ -1226,6 +2030,11 @@ if __name__ == "__main__":
 
     pp(lineno_info)
 
+    # Look up the code objects so that their positions are analyzed.
+    for offset_pairs in lineno_info.values():
+        for code, _ in offset_pairs:
+            code_position_cache[code]
+
     for code, code_position_info in code_position_cache.items():
         print(
             f"(line, offset): source positions for {code.co_name}:"
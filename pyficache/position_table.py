@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2026 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Compact, column-wise source-position tables for code objects.
+
+Dictionaries with tuple keys and values cost a few hundred bytes per
+position. A CodePositionTable instead keeps the positions of a code
+object's instructions in parallel arrays of C ints: bytecode offset,
+start line, end line, start column and end column. Runs of instructions
+with the same position are stored once, so for each instruction the
+table holds at most 20 bytes. The entries of code_position_cache in
+pyficache.code_positions are backed by these tables, and build the
+dictionaries of CodePositionInfo from them only when those are used.
+
+The offset column is sorted, so the position of an offset is found by
+binary search; position_for_offset() does this for a code object and
+offset, such as a frame's f_code and f_lasti, building the table for
+the code object the first time it is asked for. If NumPy is installed,
+numpy_views() gives the columns as NumPy arrays without copying, for
+vectorized range queries.
+"""
+
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from types import CodeType
+from typing import Dict, Iterator, Optional, Tuple
+from weakref import WeakKeyDictionary
+
+# Stands for None in the integer columns.
+NO_POSITION = -1
+
+# The number of bytes in a bytecode code unit. co_positions() gives one
+# position per code unit.
+CODE_UNIT_SIZE = 2
+
+COLUMN_NAMES = ("offsets", "start_lines", "end_lines", "start_columns", "end_columns")
+
+SourceSpan = Tuple[Optional[int], Optional[int], Optional[int], Optional[int]]
+
+
+class CodePositionTable:
+    """The source positions of the instructions of a code object, stored
+    column-wise.
+
+    Row i gives the position of the instructions from offsets[i] up to
+    offsets[i + 1] (or code_size for the last row):
+    (start_lines[i], start_columns[i], end_lines[i], end_columns[i]).
+    Values that are missing are NO_POSITION.
+    """
+
+    __slots__ = (
+        "code_size",
+        "end_columns",
+        "end_lines",
+        "offsets",
+        "start_columns",
+        "start_lines",
+    )
+
+    def __init__(self, code: CodeType):
+        self.offsets = array("i")
+        self.start_lines = array("i")
+        self.end_lines = array("i")
+        self.start_columns = array("i")
+        self.end_columns = array("i")
+        self.code_size = len(code.co_code)
+
+        last_position = None
+        offset = 0
+        for position in code.co_positions():
+            if position != last_position:
+                start_line, end_line, start_column, end_column = (
+                    NO_POSITION if value is None else value for value in position
+                )
+                self.offsets.append(offset)
+                self.start_lines.append(start_line)
+                self.end_lines.append(end_line)
+                self.start_columns.append(start_column)
+                self.end_columns.append(end_column)
+                last_position = position
+            offset += CODE_UNIT_SIZE
+            pass
+        return
+
+    @classmethod
+    def from_columns(cls, code_size: int, *columns: bytes) -> "CodePositionTable":
+        """Return a table from `code_size` and the bytes of its offset,
+        start line, end line, start column and end column columns, as
+        given by columns()."""
+        table = cls.__new__(cls)
+        table.code_size = code_size
+        for name, data in zip(COLUMN_NAMES, columns):
+            column = array("i")
+            column.frombytes(data)
+            setattr(table, name, column)
+            pass
+        return table
+
+    def columns(self) -> Tuple[bytes, ...]:
+        """Return the bytes of the columns in the order of COLUMN_NAMES."""
+        return tuple(getattr(self, name).tobytes() for name in COLUMN_NAMES)
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __iter__(self) -> Iterator[Tuple[int, SourceSpan]]:
+        """Yield (offset, source span) for each row."""
+        for i in range(len(self.offsets)):
+            yield self.offsets[i], self.span(i)
+
+    def span(self, i: int) -> SourceSpan:
+        """Return row `i` as (start line, start column, end line, end column)
+        with None for missing values."""
+        return tuple(
+            None if value == NO_POSITION else value
+            for value in (
+                self.start_lines[i],
+                self.start_columns[i],
+                self.end_lines[i],
+                self.end_columns[i],
+            )
+        )
+
+    def row_for_offset(self, offset: int) -> int:
+        """Return the row holding the instruction at `offset`, or -1 if
+        `offset` is not in the code."""
+        if not 0 <= offset < self.code_size:
+            return -1
+        return bisect_right(self.offsets, offset) - 1
+
+    def span_for_offset(self, offset: int) -> Optional[SourceSpan]:
+        """Return the source span of the instruction at `offset`, or None
+        if `offset` is not in the code."""
+        i = self.row_for_offset(offset)
+        return None if i < 0 else self.span(i)
+
+    def rows_between(self, start_offset: int, end_offset: int) -> range:
+        """Return the range of rows for the instructions at offsets from
+        `start_offset` up to, but not including, `end_offset`."""
+        start = max(self.row_for_offset(max(start_offset, 0)), 0)
+        end = bisect_left(self.offsets, end_offset)
+        return range(start, max(start, end))
+
+    def nbytes(self) -> int:
+        """Return an estimate of the memory in bytes used by the table."""
+        return sys.getsizeof(self) + sum(
+            sys.getsizeof(getattr(self, name)) for name in COLUMN_NAMES
+        )
+
+    def numpy_views(self) -> Dict[str, "numpy.ndarray"]:  # noqa: F821
+        """Return the columns as NumPy arrays that share memory with the
+        table. NumPy is needed for this; ImportError is raised if it is not
+        installed."""
+        import numpy
+
+        return {
+            name: numpy.frombuffer(getattr(self, name), dtype=numpy.intc)
+            for name in COLUMN_NAMES
+        }
+
+
+# Position tables keyed by code object. A table does not refer to its code
+# object, so entries go away when the code object does.
+code_position_tables: "WeakKeyDictionary[CodeType, CodePositionTable]" = (
+    WeakKeyDictionary()
+)
+
+
+def code_position_table(code: CodeType) -> CodePositionTable:
+    """Return the CodePositionTable for `code`, building it the first time
+    `code` is asked for."""
+    try:
+        table = code_position_tables.get(code)
+    except TypeError:
+        # Not weak-referenceable
+        return CodePositionTable(code)
+    if table is None:
+        table = CodePositionTable(code)
+        code_position_tables[code] = table
+    return table
+
+
+def position_for_offset(code: CodeType, offset: int) -> Optional[SourceSpan]:
+    """Return the source span (start line, start column, end line, end
+    column) of the instruction at bytecode `offset` in `code`, or None if
+    `offset` is not in `code`. Parts of the span that are not known are
+    None.
+
+    For a frame, use `frame.f_code` and `frame.f_lasti`.
+    """
+    return code_position_table(code).span_for_offset(offset)
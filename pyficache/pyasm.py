@@ -3,9 +3,12 @@ Lexer for Python Disassembler Pyasm
 """
 
 import re
-from typing import Dict, List, Tuple
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
 
 from pygments.lexer import (
+    Lexer,
     RegexLexer,
     include,
     words,
@@ -14,8 +17,307 @@ from pygments.token import (
     Comment,
     Keyword,
     Name,
+    Text,
     Whitespace,
 )
+from pygments.util import get_bool_opt
+
+
+# Opcode names from Python 1.0 to 3.13
+PYASM_OPCODES = (
+    "ASYNC_GEN_WRAP",
+    "BEFORE_ASYNC_WITH",
+    "BEFORE_WITH",
+    "BEGIN_FINALLY",
+    "BINARY_ADD",
+    "BINARY_AND",
+    "BINARY_CALL",
+    "BINARY_DIVIDE",
+    "BINARY_FLOOR_DIVIDE",
+    "BINARY_LSHIFT",
+    "BINARY_MATRIX_MULTIPLY",
+    "BINARY_MODULO",
+    "BINARY_MULTIPLY",
+    "BINARY_OP",
+    "BINARY_OR",
+    "BINARY_POWER",
+    "BINARY_RSHIFT",
+    "BINARY_SLICE",
+    "BINARY_SUBSCR",
+    "BINARY_SUBTRACT",
+    "BINARY_TRUE_DIVIDE",
+    "BINARY_XOR",
+    "BREAK_LOOP",
+    "BUILD_CLASS",
+    "BUILD_CONST_KEY_MAP",
+    "BUILD_FUNCTION",
+    "BUILD_LIST",
+    "BUILD_LIST_FROM_ARG",
+    "BUILD_LIST_UNPACK",
+    "BUILD_MAP",
+    "BUILD_MAP_UNPACK",
+    "BUILD_MAP_UNPACK_WITH_CALL",
+    "BUILD_SET",
+    "BUILD_SET_UNPACK",
+    "BUILD_SLICE",
+    "BUILD_STRING",
+    "BUILD_TUPLE",
+    "BUILD_TUPLE_UNPACK",
+    "BUILD_TUPLE_UNPACK_WITH_CALL",
+    "CACHE",
+    "CALL",
+    "CALL_FINALLY",
+    "CALL_FUNCTION",
+    "CALL_FUNCTION_EX",
+    "CALL_FUNCTION_KW",
+    "CALL_FUNCTION_VAR",
+    "CALL_FUNCTION_VAR_KW",
+    "CALL_INTRINSIC_1",
+    "CALL_INTRINSIC_2",
+    "CALL_KW",
+    "CALL_METHOD",
+    "CALL_METHOD_KW",
+    "CHECK_EG_MATCH",
+    "CHECK_EXC_MATCH",
+    "CLEANUP_THROW",
+    "COMPARE_OP",
+    "CONTAINS_OP",
+    "CONTINUE_LOOP",
+    "CONVERT_VALUE",
+    "COPY",
+    "COPY_DICT_WITHOUT_KEYS",
+    "COPY_FREE_VARS",
+    "DELETE_ATTR",
+    "DELETE_DEREF",
+    "DELETE_FAST",
+    "DELETE_GLOBAL",
+    "DELETE_NAME",
+    "DELETE_SLICE+0",
+    "DELETE_SLICE+1",
+    "DELETE_SLICE+2",
+    "DELETE_SLICE+3",
+    "DELETE_SLICE_0",
+    "DELETE_SLICE_1",
+    "DELETE_SLICE_2",
+    "DELETE_SLICE_3",
+    "DELETE_SUBSCR",
+    "DICT_MERGE",
+    "DICT_UPDATE",
+    "DUP_TOP",
+    "DUP_TOPX",
+    "DUP_TOP_TWO",
+    "END_ASYNC_FOR",
+    "END_FINALLY",
+    "END_FOR",
+    "END_SEND",
+    "ENTER_EXECUTOR",
+    "EXEC_STMT",
+    "EXIT_INIT_CHECK",
+    "EXTENDED_ARG",
+    "FORMAT_SIMPLE",
+    "FORMAT_VALUE",
+    "FORMAT_WITH_SPEC",
+    "FOR_ITER",
+    "FOR_LOOP",
+    "GEN_START",
+    "GET_AITER",
+    "GET_ANEXT",
+    "GET_AWAITABLE",
+    "GET_ITER",
+    "GET_LEN",
+    "GET_YIELD_FROM_ITER",
+    "IMPORT_FROM",
+    "IMPORT_NAME",
+    "IMPORT_STAR",
+    "INPLACE_ADD",
+    "INPLACE_AND",
+    "INPLACE_DIVIDE",
+    "INPLACE_FLOOR_DIVIDE",
+    "INPLACE_LSHIFT",
+    "INPLACE_MATRIX_MULTIPLY",
+    "INPLACE_MODULO",
+    "INPLACE_MULTIPLY",
+    "INPLACE_OR",
+    "INPLACE_POWER",
+    "INPLACE_RSHIFT",
+    "INPLACE_SUBTRACT",
+    "INPLACE_TRUE_DIVIDE",
+    "INPLACE_XOR",
+    "INSTRUMENTED_CALL",
+    "INSTRUMENTED_CALL_FUNCTION_EX",
+    "INSTRUMENTED_CALL_KW",
+    "INSTRUMENTED_END_FOR",
+    "INSTRUMENTED_END_SEND",
+    "INSTRUMENTED_FOR_ITER",
+    "INSTRUMENTED_INSTRUCTION",
+    "INSTRUMENTED_JUMP_BACKWARD",
+    "INSTRUMENTED_JUMP_FORWARD",
+    "INSTRUMENTED_LINE",
+    "INSTRUMENTED_LOAD_SUPER_ATTR",
+    "INSTRUMENTED_POP_JUMP_IF_FALSE",
+    "INSTRUMENTED_POP_JUMP_IF_NONE",
+    "INSTRUMENTED_POP_JUMP_IF_NOT_NONE",
+    "INSTRUMENTED_POP_JUMP_IF_TRUE",
+    "INSTRUMENTED_RESUME",
+    "INSTRUMENTED_RETURN_CONST",
+    "INSTRUMENTED_RETURN_VALUE",
+    "INSTRUMENTED_YIELD_VALUE",
+    "INTERPRETER_EXIT",
+    "IS_OP",
+    "JUMP",
+    "JUMP_ABSOLUTE",
+    "JUMP_BACKWARD",
+    "JUMP_BACKWARD_NO_INTERRUPT",
+    "JUMP_FORWARD",
+    "JUMP_IF_FALSE",
+    "JUMP_IF_FALSE_OR_POP",
+    "JUMP_IF_NOT_DEBUG",
+    "JUMP_IF_NOT_EXC_MATCH",
+    "JUMP_IF_TRUE",
+    "JUMP_IF_TRUE_OR_POP",
+    "JUMP_NO_INTERRUPT",
+    "KW_NAMES",
+    "LIST_APPEND",
+    "LIST_EXTEND",
+    "LIST_TO_TUPLE",
+    "LOAD_ASSERTION_ERROR",
+    "LOAD_ATTR",
+    "LOAD_BUILD_CLASS",
+    "LOAD_CLASSDEREF",
+    "LOAD_CLOSURE",
+    "LOAD_CONST",
+    "LOAD_DEREF",
+    "LOAD_FAST",
+    "LOAD_FAST_AND_CLEAR",
+    "LOAD_FAST_CHECK",
+    "LOAD_FAST_LOAD_FAST",
+    "LOAD_FROM_DICT_OR_DEREF",
+    "LOAD_FROM_DICT_OR_GLOBALS",
+    "LOAD_GLOBAL",
+    "LOAD_GLOBALS",
+    "LOAD_LOCAL",
+    "LOAD_LOCALS",
+    "LOAD_METHOD",
+    "LOAD_NAME",
+    "LOAD_REVDB_VAR",
+    "LOAD_SMALL_INT",
+    "LOAD_SUPER_ATTR",
+    "LOAD_SUPER_METHOD",
+    "LOAD_ZERO_SUPER_ATTR",
+    "LOAD_ZERO_SUPER_METHOD",
+    "LOOKUP_METHOD",
+    "MAKE_CELL",
+    "MAKE_CLOSURE",
+    "MAKE_FUNCTION",
+    "MAP_ADD",
+    "MATCH_CLASS",
+    "MATCH_KEYS",
+    "MATCH_MAPPING",
+    "MATCH_SEQUENCE",
+    "NOP",
+    "NOT_TAKEN",
+    "POP_BLOCK",
+    "POP_EXCEPT",
+    "POP_FINALLY",
+    "POP_JUMP_BACKWARD_IF_FALSE",
+    "POP_JUMP_BACKWARD_IF_NONE",
+    "POP_JUMP_BACKWARD_IF_NOT_NONE",
+    "POP_JUMP_BACKWARD_IF_TRUE",
+    "POP_JUMP_FORWARD_IF_FALSE",
+    "POP_JUMP_FORWARD_IF_NONE",
+    "POP_JUMP_FORWARD_IF_NOT_NONE",
+    "POP_JUMP_FORWARD_IF_TRUE",
+    "POP_JUMP_IF_FALSE",
+    "POP_JUMP_IF_NONE",
+    "POP_JUMP_IF_NOT_NONE",
+    "POP_JUMP_IF_TRUE",
+    "POP_TOP",
+    "PRECALL",
+    "PREP_RERAISE_STAR",
+    "PRINT_EXPR",
+    "PRINT_ITEM",
+    "PRINT_ITEM_TO",
+    "PRINT_NEWLINE",
+    "PRINT_NEWLINE_TO",
+    "PUSH_EXC_INFO",
+    "PUSH_NULL",
+    "RAISE_EXCEPTION",
+    "RAISE_VARARGS",
+    "RERAISE",
+    "RESERVED",
+    "RESERVE_FAST",
+    "RESUME",
+    "RETURN_CONST",
+    "RETURN_GENERATOR",
+    "RETURN_VALUE",
+    "ROT_FOUR",
+    "ROT_N",
+    "ROT_THREE",
+    "ROT_TWO",
+    "SEND",
+    "SETUP_ANNOTATIONS",
+    "SETUP_ASYNC_WITH",
+    "SETUP_CLEANUP",
+    "SETUP_EXCEPT",
+    "SETUP_FINALLY",
+    "SETUP_LOOP",
+    "SETUP_WITH",
+    "SET_ADD",
+    "SET_FUNCTION_ATTRIBUTE",
+    "SET_FUNC_ARGS",
+    "SET_LINENO",
+    "SET_UPDATE",
+    "SLICE+0",
+    "SLICE+1",
+    "SLICE+2",
+    "SLICE+3",
+    "SLICE_0",
+    "SLICE_1",
+    "SLICE_2",
+    "SLICE_3",
+    "STOP_CODE",
+    "STORE_ANNOTATION",
+    "STORE_ATTR",
+    "STORE_DEREF",
+    "STORE_FAST",
+    "STORE_FAST_LOAD_FAST",
+    "STORE_FAST_MAYBE_NULL",
+    "STORE_FAST_STORE_FAST",
+    "STORE_GLOBAL",
+    "STORE_LOCALS",
+    "STORE_MAP",
+    "STORE_NAME",
+    "STORE_SLICE",
+    "STORE_SLICE+0",
+    "STORE_SLICE+1",
+    "STORE_SLICE+2",
+    "STORE_SLICE+3",
+    "STORE_SLICE_0",
+    "STORE_SLICE_1",
+    "STORE_SLICE_2",
+    "STORE_SLICE_3",
+    "STORE_SUBSCR",
+    "SWAP",
+    "TO_BOOL",
+    "UNARY_CALL",
+    "UNARY_CONVERT",
+    "UNARY_INVERT",
+    "UNARY_NEGATIVE",
+    "UNARY_NOT",
+    "UNARY_POSITIVE",
+    "UNPACK_ARG",
+    "UNPACK_EX",
+    "UNPACK_LIST",
+    "UNPACK_SEQUENCE",
+    "UNPACK_TUPLE",
+    "UNPACK_VARARG",
+    "WITH_CLEANUP",
+    "WITH_CLEANUP_FINISH",
+    "WITH_CLEANUP_START",
+    "WITH_EXCEPT_START",
+    "YIELD_FROM",
+    "YIELD_VALUE",
+)
 
 
 class PyasmLexer(RegexLexer):
@@ -47,307 +349,7 @@ class PyasmLexer(RegexLexer):
             #   bygroups(Text, Name.Label, Punctuation)),
         ],
         "OPCODES": [
-            (
-                words(
-                    # Keywords from Python 1.0 to 3.13
-                    (
-                        "ASYNC_GEN_WRAP",
-                        "BEFORE_ASYNC_WITH",
-                        "BEFORE_WITH",
-                        "BEGIN_FINALLY",
-                        "BINARY_ADD",
-                        "BINARY_AND",
-                        "BINARY_CALL",
-                        "BINARY_DIVIDE",
-                        "BINARY_FLOOR_DIVIDE",
-                        "BINARY_LSHIFT",
-                        "BINARY_MATRIX_MULTIPLY",
-                        "BINARY_MODULO",
-                        "BINARY_MULTIPLY",
-                        "BINARY_OP",
-                        "BINARY_OR",
-                        "BINARY_POWER",
-                        "BINARY_RSHIFT",
-                        "BINARY_SLICE",
-                        "BINARY_SUBSCR",
-                        "BINARY_SUBTRACT",
-                        "BINARY_TRUE_DIVIDE",
-                        "BINARY_XOR",
-                        "BREAK_LOOP",
-                        "BUILD_CLASS",
-                        "BUILD_CONST_KEY_MAP",
-                        "BUILD_FUNCTION",
-                        "BUILD_LIST",
-                        "BUILD_LIST_FROM_ARG",
-                        "BUILD_LIST_UNPACK",
-                        "BUILD_MAP",
-                        "BUILD_MAP_UNPACK",
-                        "BUILD_MAP_UNPACK_WITH_CALL",
-                        "BUILD_SET",
-                        "BUILD_SET_UNPACK",
-                        "BUILD_SLICE",
-                        "BUILD_STRING",
-                        "BUILD_TUPLE",
-                        "BUILD_TUPLE_UNPACK",
-                        "BUILD_TUPLE_UNPACK_WITH_CALL",
-                        "CACHE",
-                        "CALL",
-                        "CALL_FINALLY",
-                        "CALL_FUNCTION",
-                        "CALL_FUNCTION_EX",
-                        "CALL_FUNCTION_KW",
-                        "CALL_FUNCTION_VAR",
-                        "CALL_FUNCTION_VAR_KW",
-                        "CALL_INTRINSIC_1",
-                        "CALL_INTRINSIC_2",
-                        "CALL_KW",
-                        "CALL_METHOD",
-                        "CALL_METHOD_KW",
-                        "CHECK_EG_MATCH",
-                        "CHECK_EXC_MATCH",
-                        "CLEANUP_THROW",
-                        "COMPARE_OP",
-                        "CONTAINS_OP",
-                        "CONTINUE_LOOP",
-                        "CONVERT_VALUE",
-                        "COPY",
-                        "COPY_DICT_WITHOUT_KEYS",
-                        "COPY_FREE_VARS",
-                        "DELETE_ATTR",
-                        "DELETE_DEREF",
-                        "DELETE_FAST",
-                        "DELETE_GLOBAL",
-                        "DELETE_NAME",
-                        "DELETE_SLICE+0",
-                        "DELETE_SLICE+1",
-                        "DELETE_SLICE+2",
-                        "DELETE_SLICE+3",
-                        "DELETE_SLICE_0",
-                        "DELETE_SLICE_1",
-                        "DELETE_SLICE_2",
-                        "DELETE_SLICE_3",
-                        "DELETE_SUBSCR",
-                        "DICT_MERGE",
-                        "DICT_UPDATE",
-                        "DUP_TOP",
-                        "DUP_TOPX",
-                        "DUP_TOP_TWO",
-                        "END_ASYNC_FOR",
-                        "END_FINALLY",
-                        "END_FOR",
-                        "END_SEND",
-                        "ENTER_EXECUTOR",
-                        "EXEC_STMT",
-                        "EXIT_INIT_CHECK",
-                        "EXTENDED_ARG",
-                        "FORMAT_SIMPLE",
-                        "FORMAT_VALUE",
-                        "FORMAT_WITH_SPEC",
-                        "FOR_ITER",
-                        "FOR_LOOP",
-                        "GEN_START",
-                        "GET_AITER",
-                        "GET_ANEXT",
-                        "GET_AWAITABLE",
-                        "GET_ITER",
-                        "GET_LEN",
-                        "GET_YIELD_FROM_ITER",
-                        "IMPORT_FROM",
-                        "IMPORT_NAME",
-                        "IMPORT_STAR",
-                        "INPLACE_ADD",
-                        "INPLACE_AND",
-                        "INPLACE_DIVIDE",
-                        "INPLACE_FLOOR_DIVIDE",
-                        "INPLACE_LSHIFT",
-                        "INPLACE_MATRIX_MULTIPLY",
-                        "INPLACE_MODULO",
-                        "INPLACE_MULTIPLY",
-                        "INPLACE_OR",
-                        "INPLACE_POWER",
-                        "INPLACE_RSHIFT",
-                        "INPLACE_SUBTRACT",
-                        "INPLACE_TRUE_DIVIDE",
-                        "INPLACE_XOR",
-                        "INSTRUMENTED_CALL",
-                        "INSTRUMENTED_CALL_FUNCTION_EX",
-                        "INSTRUMENTED_CALL_KW",
-                        "INSTRUMENTED_END_FOR",
-                        "INSTRUMENTED_END_SEND",
-                        "INSTRUMENTED_FOR_ITER",
-                        "INSTRUMENTED_INSTRUCTION",
-                        "INSTRUMENTED_JUMP_BACKWARD",
-                        "INSTRUMENTED_JUMP_FORWARD",
-                        "INSTRUMENTED_LINE",
-                        "INSTRUMENTED_LOAD_SUPER_ATTR",
-                        "INSTRUMENTED_POP_JUMP_IF_FALSE",
-                        "INSTRUMENTED_POP_JUMP_IF_NONE",
-                        "INSTRUMENTED_POP_JUMP_IF_NOT_NONE",
-                        "INSTRUMENTED_POP_JUMP_IF_TRUE",
-                        "INSTRUMENTED_RESUME",
-                        "INSTRUMENTED_RETURN_CONST",
-                        "INSTRUMENTED_RETURN_VALUE",
-                        "INSTRUMENTED_YIELD_VALUE",
-                        "INTERPRETER_EXIT",
-                        "IS_OP",
-                        "JUMP",
-                        "JUMP_ABSOLUTE",
-                        "JUMP_BACKWARD",
-                        "JUMP_BACKWARD_NO_INTERRUPT",
-                        "JUMP_FORWARD",
-                        "JUMP_IF_FALSE",
-                        "JUMP_IF_FALSE_OR_POP",
-                        "JUMP_IF_NOT_DEBUG",
-                        "JUMP_IF_NOT_EXC_MATCH",
-                        "JUMP_IF_TRUE",
-                        "JUMP_IF_TRUE_OR_POP",
-                        "JUMP_NO_INTERRUPT",
-                        "KW_NAMES",
-                        "LIST_APPEND",
-                        "LIST_EXTEND",
-                        "LIST_TO_TUPLE",
-                        "LOAD_ASSERTION_ERROR",
-                        "LOAD_ATTR",
-                        "LOAD_BUILD_CLASS",
-                        "LOAD_CLASSDEREF",
-                        "LOAD_CLOSURE",
-                        "LOAD_CONST",
-                        "LOAD_DEREF",
-                        "LOAD_FAST",
-                        "LOAD_FAST_AND_CLEAR",
-                        "LOAD_FAST_CHECK",
-                        "LOAD_FAST_LOAD_FAST",
-                        "LOAD_FROM_DICT_OR_DEREF",
-                        "LOAD_FROM_DICT_OR_GLOBALS",
-                        "LOAD_GLOBAL",
-                        "LOAD_GLOBALS",
-                        "LOAD_LOCAL",
-                        "LOAD_LOCALS",
-                        "LOAD_METHOD",
-                        "LOAD_NAME",
-                        "LOAD_REVDB_VAR",
-                        "LOAD_SMALL_INT",
-                        "LOAD_SUPER_ATTR",
-                        "LOAD_SUPER_METHOD",
-                        "LOAD_ZERO_SUPER_ATTR",
-                        "LOAD_ZERO_SUPER_METHOD",
-                        "LOOKUP_METHOD",
-                        "MAKE_CELL",
-                        "MAKE_CLOSURE",
-                        "MAKE_FUNCTION",
-                        "MAP_ADD",
-                        "MATCH_CLASS",
-                        "MATCH_KEYS",
-                        "MATCH_MAPPING",
-                        "MATCH_SEQUENCE",
-                        "NOP",
-                        "NOT_TAKEN",
-                        "POP_BLOCK",
-                        "POP_EXCEPT",
-                        "POP_FINALLY",
-                        "POP_JUMP_BACKWARD_IF_FALSE",
-                        "POP_JUMP_BACKWARD_IF_NONE",
-                        "POP_JUMP_BACKWARD_IF_NOT_NONE",
-                        "POP_JUMP_BACKWARD_IF_TRUE",
-                        "POP_JUMP_FORWARD_IF_FALSE",
-                        "POP_JUMP_FORWARD_IF_NONE",
-                        "POP_JUMP_FORWARD_IF_NOT_NONE",
-                        "POP_JUMP_FORWARD_IF_TRUE",
-                        "POP_JUMP_IF_FALSE",
-                        "POP_JUMP_IF_NONE",
-                        "POP_JUMP_IF_NOT_NONE",
-                        "POP_JUMP_IF_TRUE",
-                        "POP_TOP",
-                        "PRECALL",
-                        "PREP_RERAISE_STAR",
-                        "PRINT_EXPR",
-                        "PRINT_ITEM",
-                        "PRINT_ITEM_TO",
-                        "PRINT_NEWLINE",
-                        "PRINT_NEWLINE_TO",
-                        "PUSH_EXC_INFO",
-                        "PUSH_NULL",
-                        "RAISE_EXCEPTION",
-                        "RAISE_VARARGS",
-                        "RERAISE",
-                        "RESERVED",
-                        "RESERVE_FAST",
-                        "RESUME",
-                        "RETURN_CONST",
-                        "RETURN_GENERATOR",
-                        "RETURN_VALUE",
-                        "ROT_FOUR",
-                        "ROT_N",
-                        "ROT_THREE",
-                        "ROT_TWO",
-                        "SEND",
-                        "SETUP_ANNOTATIONS",
-                        "SETUP_ASYNC_WITH",
-                        "SETUP_CLEANUP",
-                        "SETUP_EXCEPT",
-                        "SETUP_FINALLY",
-                        "SETUP_LOOP",
-                        "SETUP_WITH",
-                        "SET_ADD",
-                        "SET_FUNCTION_ATTRIBUTE",
-                        "SET_FUNC_ARGS",
-                        "SET_LINENO",
-                        "SET_UPDATE",
-                        "SLICE+0",
-                        "SLICE+1",
-                        "SLICE+2",
-                        "SLICE+3",
-                        "SLICE_0",
-                        "SLICE_1",
-                        "SLICE_2",
-                        "SLICE_3",
-                        "STOP_CODE",
-                        "STORE_ANNOTATION",
-                        "STORE_ATTR",
-                        "STORE_DEREF",
-                        "STORE_FAST",
-                        "STORE_FAST_LOAD_FAST",
-                        "STORE_FAST_MAYBE_NULL",
-                        "STORE_FAST_STORE_FAST",
-                        "STORE_GLOBAL",
-                        "STORE_LOCALS",
-                        "STORE_MAP",
-                        "STORE_NAME",
-                        "STORE_SLICE",
-                        "STORE_SLICE+0",
-                        "STORE_SLICE+1",
-                        "STORE_SLICE+2",
-                        "STORE_SLICE+3",
-                        "STORE_SLICE_0",
-                        "STORE_SLICE_1",
-                        "STORE_SLICE_2",
-                        "STORE_SLICE_3",
-                        "STORE_SUBSCR",
-                        "SWAP",
-                        "TO_BOOL",
-                        "UNARY_CALL",
-                        "UNARY_CONVERT",
-                        "UNARY_INVERT",
-                        "UNARY_NEGATIVE",
-                        "UNARY_NOT",
-                        "UNARY_POSITIVE",
-                        "UNPACK_ARG",
-                        "UNPACK_EX",
-                        "UNPACK_LIST",
-                        "UNPACK_SEQUENCE",
-                        "UNPACK_TUPLE",
-                        "UNPACK_VARARG",
-                        "WITH_CLEANUP",
-                        "WITH_CLEANUP_FINISH",
-                        "WITH_CLEANUP_START",
-                        "WITH_EXCEPT_START",
-                        "YIELD_FROM",
-                        "YIELD_VALUE",
-                    ),
-                    suffix=r"\b",
-                ),
-                Keyword,
-            ),
+            (words(PYASM_OPCODES, suffix=r"\b"), Keyword),
             (words(("True", "False", "None"), suffix=r"\b"), Keyword.Constant),
         ],
         "builtins": [
@@ -373,6 +375,276 @@ class PyasmLexer(RegexLexer):
             return True
 
 
+PYASM_OPCODE_SET: FrozenSet[str] = frozenset(PYASM_OPCODES)
+
+# The header line giving the bytecode version, e.g.
+#   "# Python bytecode 3.13.0 (3571)"
+PYASM_BYTECODE_VERSION_RE = re.compile(
+    r"^# Python bytecode (\d+)\.(\d+)(?:\.(\d+))?(.*)$", re.M
+)
+
+# An instruction line in the column layout that pydisasm uses:
+#    optional line-number label, offset, optional instruction bytes,
+#    opcode name, and then the operand.
+# For example:
+#   "  4:          16 |5c 02| LOAD_NAME            (print)"
+PYASM_INSTRUCTION_RE = re.compile(
+    r"(\s*)(\d+:)?(\s+(?:>>\s+)?\d+ )((?:[|][0-9a-fA-F ]+[|] )?)([A-Z][A-Z0-9_+]*)(.*)"
+)
+
+# Tokens of lines other than comments and the instruction prefix above.
+PYASM_WORD_RE = re.compile(r"(\d+:)|(\w+(?:[+]\d)?)|(\s+)|([^\w\s]+)")
+
+
+def pyasm_bytecode_version(text: str) -> Optional[Tuple[Tuple[int, ...], bool]]:
+    """
+    Return the bytecode version tuple named in the header of pyasm `text` and
+    whether that is PyPy bytecode. None is returned if there is no such header.
+    """
+    if not (version_match := PYASM_BYTECODE_VERSION_RE.search(text)):
+        return None
+    version = tuple(int(v) for v in version_match.groups()[:3] if v is not None)
+    return version, "pypy" in version_match.group(4).lower()
+
+
+@lru_cache(maxsize=None)
+def opcodes_for_version(version: Tuple[int, ...], is_pypy: bool) -> FrozenSet[str]:
+    """
+    Return the set of opcode names for bytecode `version` as xdis knows it.
+    If xdis does not know about `version`, all opcode names are returned.
+    """
+    from xdis.op_imports import get_opcode_module
+    from xdis.version_info import PythonImplementation
+
+    implementation = (
+        PythonImplementation.PyPy if is_pypy else PythonImplementation.CPython
+    )
+    try:
+        opc = get_opcode_module(version, implementation)
+    except Exception:
+        return PYASM_OPCODE_SET
+    return frozenset(name for name in opc.opname if not name.startswith("<"))
+
+
+class FastPyasmLexer(Lexer):
+    """
+    For xdis's pydisasm. This produces the same kinds of tokens as PyasmLexer
+    but instead of matching a large regular expression at each position,
+    it splits each line according to the pydisasm column layout and looks up
+    opcode names in a set. This makes it suitable for large disassembly dumps.
+
+    Text that PyasmLexer does not recognize, and so marks as an error,
+    is given as Whitespace or Text.
+
+    Options:
+
+    `restrict_to_version`: If true, only the opcodes of the bytecode version
+        given in the "# Python bytecode" header of the text are considered
+        opcodes. Default is False.
+    """
+
+    name = "Pyasm (fast)"
+    aliases = ["pyasm-fast"]
+    filenames = []
+    mimetypes = []
+    url = "https://pypi.org/project/xdis/"
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.restrict_to_version = get_bool_opt(options, "restrict_to_version", False)
+
+    def analyse_text(text: str):
+        if re.search(r"^# pydisasm", text, re.M):
+            return True
+
+    def get_tokens_unprocessed(self, text: str):
+        opcodes = PYASM_OPCODE_SET
+        if self.restrict_to_version and (version := pyasm_bytecode_version(text)):
+            opcodes = opcodes_for_version(*version)
+
+        pos = 0
+        for line in text.splitlines(keepends=True):
+            eol = len(line.rstrip("\n"))
+            if line.startswith("#"):
+                yield pos, Comment.Single, line[:eol]
+            elif instruction_match := PYASM_INSTRUCTION_RE.match(line, 0, eol):
+                leading, label, offset, code_bytes, opname, operand = (
+                    instruction_match.groups()
+                )
+                if leading:
+                    yield pos, Whitespace, leading
+                column = pos + len(leading)
+                if label:
+                    yield column, Name.Label, label
+                    column += len(label)
+                yield column, Text, offset + code_bytes
+                column += len(offset) + len(code_bytes)
+                yield column, Keyword if opname in opcodes else Text, opname
+                column += len(opname)
+                yield from self._words(operand, column, opcodes)
+            else:
+                yield from self._words(line[:eol], pos, opcodes)
+            if eol < len(line):
+                yield pos + eol, Whitespace, line[eol:]
+            pos += len(line)
+
+    @staticmethod
+    def _words(text: str, pos: int, opcodes: FrozenSet[str]):
+        for word_match in PYASM_WORD_RE.finditer(text):
+            label, word, space, other = word_match.groups()
+            if label:
+                yield pos + word_match.start(), Name.Label, label
+            elif word:
+                if word in ("True", "False", "None"):
+                    token_type = Keyword.Constant
+                elif word == "TOS":
+                    token_type = Name.Builtin
+                elif word in opcodes:
+                    token_type = Keyword
+                else:
+                    token_type = Text
+                yield pos + word_match.start(), token_type, word
+            elif space:
+                yield pos + word_match.start(), Whitespace, space
+            else:
+                yield pos + word_match.start(), Text, other
+
+
+# A pyasm line that starts a new Python source line, e.g.
+#   "  4:          16 |5c 02| LOAD_NAME            (print)"
+# Line numbers of three or more digits have no space before them.
+PYASM_LINE_NUMBER_RE = re.compile(r"^\s*(\d+):")
+
+# The offset part of a pyasm instruction line after any line-number prefix
+# has been removed. A jump target has a ">>" marker before the offset. e.g.
+#   "          16 |5c 02| LOAD_NAME            (print)"
+#   "     >>   14 LOAD_CONST           (None)"
+PYASM_OFFSET_RE = re.compile(r"\s+(?:>>\s+)?(\d+) (:?[|][0-9a-fA-F ]+[|] )?[A-Z]+")
+
+# The comment line giving the name of the code object whose disassembly follows, e.g.
+#   "# Method Name:       seven"
+PYASM_METHOD_NAME_RE = re.compile(r"^# Method Name:\s+(.*?)\s*$")
+
+
+@dataclass
+class PyasmLineMapping:
+    """
+    Line-number information for a pyasm file, as computed by
+    build_pyasm_line_mapping().
+
+    from_to_pairs: (source line, pyasm line) pairs sorted by source line,
+          the first value returned by compute_pyasm_line_mapping().
+
+    line_offset_to_remapped_line: a dictionary mapping a (source line, offset)
+          pair to a pyasm line, the second value returned by
+          compute_pyasm_line_mapping().
+
+    source_line_to_pyasm_line: a dictionary mapping a source line to the
+          first pyasm line that starts it.
+
+    max_source_line: the largest source line number seen, or 0 if there
+          were none.
+
+    pyasm_line_to_location: a dictionary mapping a pyasm instruction line to its
+          (source line, offset, code object name) triple. This is the reverse of
+          line_offset_to_remapped_line.
+
+    source_line_to_pyasm_lines: a dictionary mapping a source line to the
+          list of all pyasm instruction lines for it, in order. Note that a
+          source line can appear in more than one code object.
+    """
+
+    from_to_pairs: Tuple[Tuple[int, int], ...] = ()
+    line_offset_to_remapped_line: Dict[Tuple[int, int], int] = field(
+        default_factory=dict
+    )
+    source_line_to_pyasm_line: Dict[int, int] = field(default_factory=dict)
+    max_source_line: int = 0
+    pyasm_line_to_location: Dict[int, Tuple[int, int, str]] = field(
+        default_factory=dict
+    )
+    source_line_to_pyasm_lines: Dict[int, List[int]] = field(default_factory=dict)
+
+
+class PyasmLineScanner:
+    """
+    Collects the mappings of a PyasmLineMapping one pyasm line at a time.
+    Since the scan state is kept between calls to scan_line(), a scan can
+    be stopped and resumed later, and the mappings for the lines scanned so far
+    can be used in the meantime.
+    """
+
+    def __init__(self):
+        self.from_to_pairs: List[Tuple[int, int]] = []
+        self.line_offset_to_remapped_line: Dict[Tuple[int, int], int] = {}
+        self.source_line_to_pyasm_line: Dict[int, int] = {}
+        self.max_source_line = 0
+        self.pyasm_line_to_location: Dict[int, Tuple[int, int, str]] = {}
+        self.source_line_to_pyasm_lines: Dict[int, List[int]] = {}
+
+        # Scan state: the number of lines scanned so far, and the source line
+        # and code object name in effect at that point.
+        self.pyasm_line = 0
+        self.line_number = -1
+        self.code_name = "?"
+
+    def scan_line(self, line: str) -> None:
+        """Add the information for `line`, the next line of the pyasm text."""
+        self.pyasm_line += 1
+        pyasm_line = self.pyasm_line
+        if line.startswith("#"):
+            if name_match := PYASM_METHOD_NAME_RE.match(line):
+                self.code_name = name_match.group(1)
+            return
+        if line_match := PYASM_LINE_NUMBER_RE.match(line):
+            line_number = self.line_number = int(line_match.group(1))
+            self.from_to_pairs.append((line_number, pyasm_line))
+            self.source_line_to_pyasm_line.setdefault(line_number, pyasm_line)
+            if line_number > self.max_source_line:
+                self.max_source_line = line_number
+            line = line[line_match.span()[-1] :]
+        if offset_match := PYASM_OFFSET_RE.match(line):
+            offset = int(offset_match.group(1))
+            line_number = self.line_number
+            self.line_offset_to_remapped_line[line_number, offset] = pyasm_line
+            self.pyasm_line_to_location[pyasm_line] = (
+                line_number,
+                offset,
+                self.code_name,
+            )
+            self.source_line_to_pyasm_lines.setdefault(line_number, []).append(
+                pyasm_line
+            )
+
+    def scan(self, pyasm_lines) -> None:
+        for line in pyasm_lines:
+            self.scan_line(line)
+
+    def mapping(self) -> PyasmLineMapping:
+        """Return a PyasmLineMapping for the lines scanned so far."""
+        return PyasmLineMapping(
+            from_to_pairs=tuple(sorted(self.from_to_pairs, key=lambda t: t[0])),
+            line_offset_to_remapped_line=self.line_offset_to_remapped_line,
+            source_line_to_pyasm_line=self.source_line_to_pyasm_line,
+            max_source_line=self.max_source_line,
+            pyasm_line_to_location=self.pyasm_line_to_location,
+            source_line_to_pyasm_lines=self.source_line_to_pyasm_lines,
+        )
+
+
+def build_pyasm_line_mapping(pyasm_lines: List[str]) -> PyasmLineMapping:
+    """
+    Return a PyasmLineMapping for `pyasm_lines`. The forward and reverse
+    mappings are collected in a single pass over `pyasm_lines`; see
+    compute_pyasm_line_mapping() for the forward direction.
+    Lookup tables are added so that finding the pyasm line for a source
+    line does not require a scan.
+    """
+    scanner = PyasmLineScanner()
+    scanner.scan(pyasm_lines)
+    return scanner.mapping()
+
+
 def compute_pyasm_line_mapping(
     pyasm_lines: List[str],
 ) -> Tuple[Tuple[Tuple[int, int]], Dict[Tuple[int, int], int]]:
@@ -381,7 +653,7 @@ def compute_pyasm_line_mapping(
 
     The mapping is remapping tuple for lines indicated by
     line marks inside pyasm_lines. These are pyasm lines that start with
-       ^\s+\d+:
+       ^\s*\d+:
     For example assuming the next line of the pyasm file is line 10:
         0:           0 |97 00| RESUME               0
         4:           2 |64 00| LOAD_CONST           ("a") ; TOS = "a"
@@ -394,24 +666,13 @@ def compute_pyasm_line_mapping(
     For the above we would get:
     {(0, 0): 10, (4, 2): 11}
       l1,o : l2   l1,o : l2
+
+    Instructions that are jump targets, whose offset has a ">>" marker
+    before it, are included in the second mapping.
     """
-    from_to_pairs = []
-    line_offset_to_remapped_line = {}
-    line_number = -1
-    for i, line in enumerate(pyasm_lines):
-        if line.startswith("#"):
-            continue
-        if line_match := re.match(r"^\s+(\d+):", line):
-            line_match_str = line_match.group(1)
-            line_number = int(line_match_str)
-            # enumerate() is 0 origin, but lines are 1 origin
-            from_to_pairs.append((line_number, i + 1))
-            line = line[line_match.span()[-1] :]
-        if offset_match := re.match(r"\s+(\d+) (:?[|][0-9a-fA-F ]+[|] )?[A-Z]+", line):
-            offset = int(offset_match.group(1))
-            # enumerate() is 0 origin, but lines are 1 origin
-            line_offset_to_remapped_line[line_number, offset] = i + 1
-    return (tuple(from_to_pairs), line_offset_to_remapped_line)
+    scanner = PyasmLineScanner()
+    scanner.scan(pyasm_lines)
+    return (tuple(scanner.from_to_pairs), scanner.line_offset_to_remapped_line)
 
 
 # example usage
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2026 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Streaming access to very large Python assembly (pyasm) files.
+
+A whole-program disassembly can be hundreds of megabytes. Rather than
+reading all of its lines into the file cache, a StreamingPyasmFile
+memory-maps the file and builds its line-number mapping a chunk at a
+time, optionally in a background thread. Lookups for the part of the
+file already indexed can be answered while indexing continues.
+Indexing that has been stopped can be resumed from where it left off.
+"""
+
+import mmap
+import os.path as osp
+import threading
+from array import array
+from typing import Dict, Optional
+
+from pyficache.pyasm import PyasmLineScanner
+
+# Streaming pyasm files by name. get_pyasm_line() consults this.
+streaming_pyasm_files: Dict[str, "StreamingPyasmFile"] = {}
+
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+
+class StreamingPyasmFile:
+    """A memory-mapped pyasm file whose line-number mapping is built
+    incrementally.
+
+    `line_starts` holds the byte position of each line indexed so far,
+    and `scanner` holds the PyasmLineScanner mappings for those lines.
+    """
+
+    def __init__(
+        self, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE, encoding="utf-8"
+    ):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        with open(path, "rb") as fp:
+            self.size = osp.getsize(path)
+            self.mm = (
+                mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+                if self.size > 0
+                else b""
+            )
+        self.line_starts = array("q")
+        self.scanner = PyasmLineScanner()
+        # The number of lines indexed so far, and the byte position they end
+        # at. `line_starts` and `scanner` can be ahead of these while a chunk
+        # is being indexed. The two are set together, as one tuple, so that
+        # line() can read them without taking the lock.
+        self.indexed = (0, 0)
+
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        if self.size == 0:
+            self.done.set()
+        self.stop_requested = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def index_chunk(self) -> bool:
+        """Index the next chunk of about `chunk_size` bytes, ending on a line
+        boundary. Return True if there is more left to index."""
+        with self.lock:
+            start = self.indexed[1]
+            if start >= self.size:
+                self.done.set()
+                return False
+            end = start + self.chunk_size
+            if end >= self.size:
+                end = self.size
+            else:
+                newline = self.mm.find(b"\n", end - 1)
+                end = self.size if newline < 0 else newline + 1
+
+            mm, line_starts, scanner = self.mm, self.line_starts, self.scanner
+            pos = start
+            while pos < end:
+                newline = mm.find(b"\n", pos, end)
+                stop = end if newline < 0 else newline + 1
+                line_starts.append(pos)
+                scanner.scan_line(self.decode(mm[pos:stop]))
+                pos = stop
+            self.indexed = (len(line_starts), end)
+            if end >= self.size:
+                self.done.set()
+                return False
+            return True
+
+    def index_all(self) -> None:
+        """Index the rest of the file in the current thread."""
+        while self.index_chunk():
+            if self.stop_requested.is_set():
+                break
+
+    def start(self) -> threading.Thread:
+        """Index the rest of the file in a background thread. Calling this
+        after stop() resumes indexing where it stopped."""
+        if self.thread is not None and self.thread.is_alive():
+            return self.thread
+        self.stop_requested.clear()
+        self.thread = threading.Thread(
+            target=self.index_all, name=f"pyasm-index {self.path}", daemon=True
+        )
+        self.thread.start()
+        return self.thread
+
+    def stop(self) -> None:
+        """Stop background indexing after the chunk in progress."""
+        self.stop_requested.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until the file is fully indexed or `timeout` seconds pass.
+        Return True if the file is fully indexed."""
+        return self.done.wait(timeout)
+
+    def decode(self, data: bytes) -> str:
+        """Return line `data` as text, with a "\r\n" line ending turned into
+        "\n", as reading the file in text mode does."""
+        if data.endswith(b"\r\n"):
+            data = data[:-2] + b"\n"
+        return data.decode(self.encoding, "replace")
+
+    def line(self, pyasm_line: int) -> Optional[str]:
+        """Return line `pyasm_line` (1-origin) if it has been indexed."""
+        indexed_lines, position = self.indexed
+        if not 1 <= pyasm_line <= indexed_lines:
+            return None
+        start = self.line_starts[pyasm_line - 1]
+        if pyasm_line < indexed_lines:
+            stop = self.line_starts[pyasm_line]
+        else:
+            stop = position
+        return self.decode(self.mm[start:stop])
+
+    def pyasm_line_for(self, location: int, offset: int = -1) -> int:
+        """Return the pyasm line for source line `location` and bytecode
+        `offset`, or -1 if it is not in the part of the file indexed so
+        far. If `offset` is negative or not found, the first pyasm line for
+        `location` is used."""
+        scanner = self.scanner
+        if offset >= 0 and (
+            pyasm_line := scanner.line_offset_to_remapped_line.get((location, offset))
+        ):
+            return pyasm_line
+        return scanner.source_line_to_pyasm_line.get(location, -1)
+
+    def close(self) -> None:
+        self.stop()
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+
+
+def stream_pyasm_file(
+    path: str, background: bool = True, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> StreamingPyasmFile:
+    """Register `path` as a streaming pyasm file and start indexing it, in a
+    background thread if `background` is True. get_pyasm_line() on `path`
+    then reads from the memory-mapped file and answers lookups for the
+    part indexed so far.
+    """
+    streaming = streaming_pyasm_files.get(path)
+    if streaming is None:
+        streaming = StreamingPyasmFile(path, chunk_size)
+        streaming_pyasm_files[path] = streaming
+        streaming_pyasm_files[osp.abspath(path)] = streaming
+    if background:
+        streaming.start()
+    else:
+        streaming.index_all()
+    return streaming
+
+
+def unstream_pyasm_file(path: str) -> None:
+    """Stop streaming `path`, and release its memory map."""
+    streaming = streaming_pyasm_files.pop(path, None)
+    if streaming is None:
+        return
+    for name in [name for name, s in streaming_pyasm_files.items() if s is streaming]:
+        del streaming_pyasm_files[name]
+    streaming.close()
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2026 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Get the code object for a Python source file from its __pycache__
+bytecode file when that is up to date.
+
+Unmarshalling a .pyc file is much cheaper than compiling a large
+module. The .pyc file is used only if it was written by the running
+Python (its magic number matches) and it is valid for the current
+source: for a timestamp-based .pyc, the source mtime and size recorded
+in it must match; for a hash-based .pyc (PEP 552), the source hash
+recorded in it must match. Otherwise the source is compiled.
+"""
+
+import marshal
+import os
+from importlib.util import MAGIC_NUMBER, cache_from_source, source_hash
+from typing import Optional
+
+from xdis import load_file
+
+# PEP 552 flags in the second word of a .pyc header
+PYC_HASH_BASED = 0x1
+
+
+def pycache_path(filename: str) -> Optional[str]:
+    """Return the path of the __pycache__ bytecode file for source
+    `filename`, or None if there is none or it cannot be determined."""
+    if not filename.endswith(".py"):
+        return None
+    try:
+        bytecode_path = cache_from_source(filename)
+    except (NotImplementedError, ValueError):
+        return None
+    return bytecode_path if os.path.isfile(bytecode_path) else None
+
+
+def load_pycache_code(filename: str):
+    """Return the module code object for source `filename` from its
+    __pycache__ bytecode file, or None if there is no such file or it
+    is not valid for the current source."""
+    bytecode_path = pycache_path(filename)
+    if bytecode_path is None:
+        return None
+    try:
+        with open(bytecode_path, "rb") as fp:
+            data = fp.read()
+        if len(data) < 16 or data[:4] != MAGIC_NUMBER:
+            return None
+        flags = int.from_bytes(data[4:8], "little")
+        if flags & PYC_HASH_BASED:
+            with open(filename, "rb") as fp:
+                if data[8:16] != source_hash(fp.read()):
+                    return None
+        else:
+            stat = os.stat(filename)
+            if int.from_bytes(data[8:12], "little") != (
+                int(stat.st_mtime) & 0xFFFFFFFF
+            ) or int.from_bytes(data[12:16], "little") != (stat.st_size & 0xFFFFFFFF):
+                return None
+            pass
+        code = marshal.loads(data[16:])
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    return code
+
+
+def load_source_code(filename: str):
+    """Return the module code object for Python source `filename`, using
+    its __pycache__ bytecode file if that is valid and compiling the
+    source otherwise."""
+    code = load_pycache_code(filename)
+    if code is None:
+        code = load_file(filename)
+    return code
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2026 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""Save and restore the file and line remapping registries.
+
+A debugger front end that attaches to a remote process may need to
+register thousands of mappings via remap_file(), add_remap_pat() and
+remap_file_lines() before it can show source. Instead of replaying
+those calls, the registries can be written once with
+save_remap_snapshot() and later read back with load_remap_snapshot().
+
+The snapshot file is laid out as:
+
+    header: magic, format version, index offset, index length
+    blobs:  marshal'd file2file_remap, remap patterns, and pyasm files,
+            followed by one array of line-number pairs per line-remapped file
+    index:  marshal'd dictionary locating each of the blobs above
+
+Loading reads just the header and the index. The line-number pairs for
+a remapped file are decoded from the memory-mapped file the first time
+that file is looked up.
+"""
+
+import marshal
+import mmap
+import re
+import struct
+import sys
+from array import array
+from typing import Dict, Optional, Tuple
+
+import pyficache.main as main
+from pyficache.main import RemapLineEntry
+
+SNAPSHOT_MAGIC = b"PYFCRMAP"
+SNAPSHOT_VERSION = 1
+
+# magic, version, index offset, index length
+_header = struct.Struct("<8sHQQ")
+
+
+def _pairs_to_bytes(from_to_pairs) -> bytes:
+    flat = array("i", [line for pair in from_to_pairs for line in pair])
+    if sys.byteorder != "little":
+        flat.byteswap()
+    return flat.tobytes()
+
+
+def _bytes_to_pairs(data) -> tuple:
+    flat = array("i")
+    flat.frombytes(data)
+    if sys.byteorder != "little":
+        flat.byteswap()
+    return tuple(zip(flat[0::2], flat[1::2]))
+
+
+def save_remap_snapshot(snapshot_path: str) -> None:
+    """Write the current file2file_remap, remap pattern, pyasm file, and
+    file2file_remap_lines registries to `snapshot_path`."""
+    blobs = []
+    position = _header.size
+
+    def add_blob(data: bytes) -> Tuple[int, int]:
+        nonlocal position
+        blobs.append(data)
+        location = (position, len(data))
+        position += len(data)
+        return location
+
+    index = {
+        "file2file_remap": add_blob(marshal.dumps(dict(main.file2file_remap))),
+        "remap_patterns": add_blob(
+            marshal.dumps(list(main.remap_re_hash.values()))
+        ),
+        "pyasm_files": add_blob(marshal.dumps(sorted(main.pyasm_files))),
+    }
+
+    line_index = {}
+    for to_path, remap_entry in list(main.file2file_remap_lines.items()):
+        offset, length = add_blob(_pairs_to_bytes(remap_entry.from_to_pairs))
+        line_index[to_path] = (remap_entry.mapped_path, offset, length)
+        pass
+    index["file2file_remap_lines"] = line_index
+
+    index_data = marshal.dumps(index)
+    with open(snapshot_path, "wb") as fp:
+        fp.write(
+            _header.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, position, len(index_data))
+        )
+        for data in blobs:
+            fp.write(data)
+        fp.write(index_data)
+    return
+
+
+class RemapSnapshot:
+    """A read-only, memory-mapped remap snapshot file."""
+
+    def __init__(self, snapshot_path: str):
+        with open(snapshot_path, "rb") as fp:
+            if fp.seek(0, 2) == 0:
+                raise ValueError(f"{snapshot_path} is not a remap snapshot")
+            self.mm = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.mm) < _header.size:
+            raise ValueError(f"{snapshot_path} is not a remap snapshot")
+        magic, version, index_offset, index_length = _header.unpack_from(self.mm)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError(f"{snapshot_path} is not a remap snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(
+                f"{snapshot_path} has remap snapshot version {version}; "
+                f"expecting version {SNAPSHOT_VERSION}"
+            )
+        self.index = marshal.loads(
+            self.mm[index_offset : index_offset + index_length]
+        )
+        self.line_index: Dict[str, tuple] = self.index["file2file_remap_lines"]
+
+    def _blob(self, name: str):
+        offset, length = self.index[name]
+        return marshal.loads(self.mm[offset : offset + length])
+
+    def file2file_remap(self) -> dict:
+        return self._blob("file2file_remap")
+
+    def remap_patterns(self) -> list:
+        return self._blob("remap_patterns")
+
+    def pyasm_files(self) -> list:
+        return self._blob("pyasm_files")
+
+    def remap_line_entry(self, to_path: str) -> Optional[RemapLineEntry]:
+        """Decode and return the line remapping for `to_path`, or None
+        if the snapshot has none."""
+        location = self.line_index.get(to_path)
+        if location is None:
+            return None
+        mapped_path, offset, length = location
+        return RemapLineEntry(
+            mapped_path, _bytes_to_pairs(self.mm[offset : offset + length])
+        )
+
+
+class SnapshotRemapLines(dict):
+    """A file2file_remap_lines dictionary whose entries not explicitly
+    set are read from a RemapSnapshot when they are first looked up."""
+
+    def __init__(self, snapshot: RemapSnapshot, entries=()):
+        super().__init__(entries)
+        self.snapshot = snapshot
+        self.pending = set(snapshot.line_index.keys()) - set(dict.keys(self))
+
+    def _load(self, key) -> Optional[RemapLineEntry]:
+        if key not in self.pending:
+            return None
+        self.pending.discard(key)
+        remap_entry = self.snapshot.remap_line_entry(key)
+        dict.__setitem__(self, key, remap_entry)
+        return remap_entry
+
+    def _load_all(self) -> None:
+        for key in list(self.pending):
+            self._load(key)
+
+    def __contains__(self, key) -> bool:
+        return dict.__contains__(self, key) or key in self.pending
+
+    def __getitem__(self, key):
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        remap_entry = self._load(key)
+        if remap_entry is None:
+            raise KeyError(key)
+        return remap_entry
+
+    def __setitem__(self, key, value) -> None:
+        self.pending.discard(key)
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key) -> None:
+        if key in self.pending:
+            self.pending.discard(key)
+        else:
+            dict.__delitem__(self, key)
+
+    def get(self, key, default=None):
+        if dict.__contains__(self, key):
+            return dict.__getitem__(self, key)
+        remap_entry = self._load(key)
+        return default if remap_entry is None else remap_entry
+
+    def __iter__(self):
+        self._load_all()
+        return dict.__iter__(self)
+
+    def __len__(self) -> int:
+        return dict.__len__(self) + len(self.pending)
+
+    def keys(self):
+        self._load_all()
+        return dict.keys(self)
+
+    def items(self):
+        self._load_all()
+        return dict.items(self)
+
+    def values(self):
+        self._load_all()
+        return dict.values(self)
+
+
+def load_remap_snapshot(snapshot_path: str) -> RemapSnapshot:
+    """Add the mappings saved in `snapshot_path` by save_remap_snapshot()
+    to the remapping registries. Mappings already registered take
+    precedence over those in the snapshot.
+
+    File remappings and remap patterns are installed right away;
+    line remappings are decoded only when the file they are for is
+    looked up.
+    """
+    snapshot = RemapSnapshot(snapshot_path)
+    for to_file, from_file in snapshot.file2file_remap().items():
+        main.file2file_remap.setdefault(to_file, from_file)
+    for pat, replace in snapshot.remap_patterns():
+        main.remap_re_hash.setdefault(re.compile(pat), (pat, replace))
+    main.pyasm_files.update(snapshot.pyasm_files())
+    main.file2file_remap_lines = SnapshotRemapLines(
+        snapshot, main.file2file_remap_lines.items()
+    )
+    return snapshot
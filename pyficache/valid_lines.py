@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2026 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+The lines of a file that a breakpoint can stop at.
+
+When a breakpoint is asked for on a line that no bytecode starts on,
+such as a blank line, a comment, or the continuation of a long
+statement, a debugger will want to move it to the nearest line that
+does. ValidLines holds the stoppable lines of a file both as a bitmap,
+for constant-time membership tests, and as a sorted array, for
+binary-search queries for the next or previous stoppable line.
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Optional
+
+
+class ValidLines:
+    """The line numbers of a file that a breakpoint can stop at."""
+
+    __slots__ = ("bitmap", "lines")
+
+    def __init__(self, line_numbers: Iterable[int]):
+        self.lines = array("i", sorted(set(line_numbers)))
+        self.bitmap = bytearray(self.lines[-1] + 1 if self.lines else 0)
+        for line_number in self.lines:
+            self.bitmap[line_number] = 1
+            pass
+        return
+
+    def __contains__(self, line_number: int) -> bool:
+        return 0 <= line_number < len(self.bitmap) and self.bitmap[line_number] == 1
+
+    def __iter__(self):
+        return iter(self.lines)
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def next_valid_line(self, line_number: int) -> Optional[int]:
+        """Return the first stoppable line at or after `line_number`, or
+        None if there is none."""
+        if line_number in self:
+            return line_number
+        i = bisect_left(self.lines, line_number)
+        return self.lines[i] if i < len(self.lines) else None
+
+    def previous_valid_line(self, line_number: int) -> Optional[int]:
+        """Return the last stoppable line at or before `line_number`, or
+        None if there is none."""
+        if line_number in self:
+            return line_number
+        i = bisect_right(self.lines, line_number)
+        return self.lines[i - 1] if i > 0 else None
+
+    def resolve_lines(
+        self, line_numbers: Iterable[int], forward=True
+    ) -> Dict[int, Optional[int]]:
+        """Return a dictionary mapping each of `line_numbers` to the
+        stoppable line it resolves to: the line itself if it is stoppable,
+        otherwise the next stoppable line, or the previous one if `forward`
+        is False. A line that resolves to nothing maps to None.
+        """
+        resolve = self.next_valid_line if forward else self.previous_valid_line
+        return {line_number: resolve(line_number) for line_number in line_numbers}
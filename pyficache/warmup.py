@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+#
+#   Copyright (C) 2026 Rocky Bernstein <rocky@gnu.org>
+#
+#   This program is free software: you can redistribute it and/or modify
+#   it under the terms of the GNU General Public License as published by
+#   the Free Software Foundation, either version 3 of the License, or
+#   (at your option) any later version.
+#
+#   This program is distributed in the hope that it will be useful,
+#   but WITHOUT ANY WARRANTY; without even the implied warranty of
+#   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#   GNU General Public License for more details.
+#
+#   You should have received a copy of the GNU General Public License
+#   along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+Warm up the code-analysis tables of all the Python files under a
+directory before a debugging session.
+
+Files whose tables are already in the analysis store (see
+pyficache.analysis_store) are read from there. The rest are compiled
+and analyzed in a pool of worker processes, which send back the
+serialized CodeTables. These are saved to the analysis store, if one is
+set, and can be put into the file cache.
+
+From the command line:
+
+    python -m pyficache.warmup [--jobs N] [--store DIRECTORY] PATH...
+"""
+
+import argparse
+import os
+import os.path as osp
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pyficache.analysis_store as analysis_store
+import pyficache.main as main
+from pyficache.analysis_store import (
+    code_tables_from_analysis,
+    code_tables_from_data,
+    code_tables_to_data,
+    file_source_hash,
+    load_code_tables,
+    save_code_tables,
+    set_analysis_store,
+)
+from pyficache.code_analysis import analyze_file
+
+
+@dataclass
+class WarmUpStats:
+    """
+    What warm_up() did.
+
+    analyzed: the number of files compiled and analyzed.
+
+    failed: a dictionary mapping the path of each file that could not be
+          analyzed to the error message.
+
+    files: the number of files warmed up, including those that failed.
+
+    from_store: the number of files whose tables were read from the
+          analysis store.
+
+    seconds: the elapsed time.
+    """
+
+    analyzed: int = 0
+    failed: Dict[str, str] = field(default_factory=dict)
+    files: int = 0
+    from_store: int = 0
+    seconds: float = 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files / self.seconds if self.seconds > 0 else 0.0
+
+
+def iter_python_files(paths: Iterable[str]) -> Iterator[str]:
+    """Yield the absolute paths of the Python source files in `paths`, which
+    can be files or directories. Directories are searched recursively,
+    skipping __pycache__ and hidden directories."""
+    for path in paths:
+        if not osp.isdir(path):
+            yield osp.abspath(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames[:] = sorted(
+                name
+                for name in dirnames
+                if name != "__pycache__" and not name.startswith(".")
+            )
+            for filename in sorted(filenames):
+                if filename.endswith(".py"):
+                    yield osp.abspath(osp.join(dirpath, filename))
+            pass
+        pass
+    return
+
+
+def analyze_for_warm_up(path: str, source_hash: str) -> Tuple[str, bytes]:
+    """Analyze `path` and return it along with its serialized CodeTables.
+    This runs in a worker process."""
+    tables = code_tables_from_analysis(analyze_file(path), source_hash)
+    return path, code_tables_to_data(tables)
+
+
+def warm_up(
+    paths: Iterable[str],
+    jobs: Optional[int] = None,
+    progress: Optional[Callable[[int, int, str], None]] = None,
+    update_file_cache=True,
+) -> WarmUpStats:
+    """Compute the code-analysis tables of the Python files in `paths`,
+    which can be files or directories, using up to `jobs` worker processes
+    (by default, one per CPU).
+
+    The tables are saved to the analysis store if one is set. If
+    `update_file_cache` is True, the files are also put in the file cache
+    along with their tables, so that get_code_tables(), get_valid_lines()
+    and breakpoint_code_keys() do not analyze them again.
+
+    `progress`, if given, is called as progress(done, total, path) after
+    each file.
+    """
+    start_time = time.perf_counter()
+    stats = WarmUpStats()
+    file_paths = list(iter_python_files(paths))
+    total = len(file_paths)
+
+    def finish(path: str, tables) -> None:
+        stats.files += 1
+        if tables is not None and update_file_cache and main.cache_file(path):
+            main.file_cache[path].code_tables = tables
+        if progress is not None:
+            progress(stats.files, total, path)
+        return
+
+    to_analyze: List[Tuple[str, str]] = []
+    for path in file_paths:
+        try:
+            source_hash = file_source_hash(path)
+        except OSError as exc:
+            stats.failed[path] = str(exc)
+            finish(path, None)
+            continue
+        tables = load_code_tables(source_hash)
+        if tables is None:
+            to_analyze.append((path, source_hash))
+        else:
+            stats.from_store += 1
+            finish(path, tables)
+        pass
+
+    if to_analyze:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            futures = {
+                executor.submit(analyze_for_warm_up, path, source_hash): (
+                    path,
+                    source_hash,
+                )
+                for path, source_hash in to_analyze
+            }
+            for future in as_completed(futures):
+                path, source_hash = futures[future]
+                try:
+                    _, data = future.result()
+                except Exception as exc:
+                    stats.failed[path] = f"{exc.__class__.__name__}: {exc}"
+                    finish(path, None)
+                    continue
+                tables = code_tables_from_data(source_hash, data)
+                if tables is None:
+                    stats.failed[path] = "worker tables are for a different Python"
+                else:
+                    save_code_tables(tables, data)
+                    stats.analyzed += 1
+                finish(path, tables)
+                pass
+            pass
+        pass
+
+    stats.seconds = time.perf_counter() - start_time
+    return stats
+
+
+def main_cli(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m pyficache.warmup",
+        description="Compute the code-analysis tables of Python files ahead of "
+        "a debugging session.",
+    )
+    parser.add_argument("paths", nargs="+", help="files or directories to warm up")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=None, help="number of worker processes"
+    )
+    parser.add_argument(
+        "--store",
+        default=None,
+        help="analysis store directory; by default $PYFICACHE_ANALYSIS_STORE",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="do not show progress"
+    )
+    args = parser.parse_args(argv)
+
+    if args.store is not None:
+        set_analysis_store(args.store)
+    elif analysis_store.analysis_store_dir is None:
+        # The tables would be computed and then thrown away.
+        parser.error("no analysis store: give --store or set PYFICACHE_ANALYSIS_STORE")
+
+    def show_progress(done: int, total: int, path: str) -> None:
+        sys.stderr.write(f"\r[{done}/{total}] {path[-60:]:<60}")
+        sys.stderr.flush()
+
+    stats = warm_up(
+        args.paths,
+        jobs=args.jobs,
+        progress=None if args.quiet else show_progress,
+        update_file_cache=False,
+    )
+    if not args.quiet:
+        sys.stderr.write("\n")
+    print(
+        f"{stats.files} files in {stats.seconds:.2f}s "
+        f"({stats.files_per_second:.1f} files/s): "
+        f"{stats.analyzed} analyzed, {stats.from_store} from store, "
+        f"{len(stats.failed)} failed"
+    )
+    for path, message in sorted(stats.failed.items()):
+        print(f"  {path}: {message}")
+    return 1 if stats.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
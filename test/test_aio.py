@@ -0,0 +1,155 @@
+"Unit test for the asyncio line-cache API (pytest version)"
+
+import asyncio
+import threading
+import os.path as osp
+
+import pytest
+
+import pyficache
+import pyficache.aio as aio
+import pyficache.main as main
+
+TEST_DIR = osp.abspath(osp.dirname(__file__))
+
+
+@pytest.fixture(autouse=True)
+def clear_file_cache():
+    pyficache.clear_file_cache()
+    yield
+
+
+def test_getline():
+    test_file = osp.join(TEST_DIR, "devious.py")
+    opts = {"style": "emacs", "output": "terminal"}
+
+    async def get_lines():
+        return await asyncio.gather(
+            *(aio.getline(test_file, line_number, opts) for line_number in range(1, 6))
+        )
+
+    assert asyncio.run(get_lines()) == [
+        pyficache.getline(test_file, line_number, opts) for line_number in range(1, 6)
+    ]
+    assert asyncio.run(aio.getline("missing-file.py", 1)) is None
+
+    range_lines = asyncio.run(aio.getline_window(test_file, 3, 1, 1))
+    assert [line.line_number for line in range_lines] == [2, 3, 4]
+    assert asyncio.run(aio.cache_file(test_file)) == test_file
+    assert asyncio.run(aio.checkcache(test_file)) == [test_file]
+
+
+def test_loads_coalesced(monkeypatch):
+    test_file = osp.join(TEST_DIR, "devious.py")
+    calls = []
+    getline = main.getline
+
+    def counting_getline(*args):
+        calls.append(args[0])
+        return getline(*args)
+
+    monkeypatch.setattr(main, "getline", counting_getline)
+
+    async def get_lines():
+        return await asyncio.gather(
+            *(aio.load(test_file, {"output": "plain"}) for _ in range(10))
+        )
+
+    assert asyncio.run(get_lines()) == [test_file] * 10
+    assert calls == [test_file]
+
+    # Once loaded, getline() reads from the cache without another load.
+    asyncio.run(aio.getline(test_file, 2))
+    assert len(calls) == 2 and aio.is_loaded(test_file, {"output": "plain"})
+
+
+def test_missing_file_not_reread(monkeypatch):
+    calls = []
+    update_cache = main.update_cache
+
+    def counting_update_cache(*args):
+        calls.append(args[0])
+        return update_cache(*args)
+
+    monkeypatch.setattr(main, "update_cache", counting_update_cache)
+    assert pyficache.getline("missing-file.py", 1) is None
+    sync_calls = len(calls)
+    assert sync_calls > 0
+    del calls[:]
+
+    # The failed load is not done again on the event loop.
+    assert asyncio.run(aio.getline("missing-file.py", 1)) is None
+    assert asyncio.run(aio.getline_range("missing-file.py", 1, 2)) is None
+    assert len(calls) == 2 * sync_calls
+
+
+def test_update_cache_keys(monkeypatch):
+    test_file = osp.join(TEST_DIR, "devious.py")
+    calls = []
+    update_cache = main.update_cache
+
+    def counting_update_cache(*args):
+        calls.append(args[1])
+        return update_cache(*args)
+
+    monkeypatch.setattr(main, "update_cache", counting_update_cache)
+
+    async def update():
+        return await asyncio.gather(
+            aio.update_cache(test_file, {"output": "plain"}),
+            aio.update_cache(test_file, {"output": "plain"}),
+            aio.update_cache(test_file, {"output": "terminal", "style": "emacs"}),
+        )
+
+    assert asyncio.run(update()) == [test_file] * 3
+    # Only loads asking for the same format are done once.
+    assert len(calls) == 2
+
+
+def test_different_opts_not_merged(monkeypatch):
+    test_file = osp.join(TEST_DIR, "devious.py")
+    calls = []
+    cache_file = main.cache_file
+
+    def counting_cache_file(*args):
+        calls.append(args[2])
+        return cache_file(*args)
+
+    monkeypatch.setattr(main, "cache_file", counting_cache_file)
+
+    async def cache():
+        return await asyncio.gather(
+            aio.cache_file(test_file, True, {"use_linecache_lines": True}),
+            aio.cache_file(test_file, True, {"use_linecache_lines": True}),
+            aio.cache_file(test_file, True, {"use_linecache_lines": False}),
+        )
+
+    assert asyncio.run(cache()) == [test_file] * 3
+    assert len(calls) == 2
+
+
+def test_read_waits_off_loop():
+    test_file = osp.join(TEST_DIR, "devious.py")
+    locked = threading.Event()
+    release = threading.Event()
+
+    def hold_lock():
+        with main.cache_lock:
+            locked.set()
+            release.wait(5)
+
+    async def get_line():
+        await aio.load(test_file, main.default_opts)
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        locked.wait()
+        task = asyncio.create_task(aio.getline(test_file, 2))
+        # The loop keeps running while the read waits for the lock.
+        await asyncio.sleep(0.05)
+        assert not task.done()
+        release.set()
+        line = await task
+        holder.join()
+        return line
+
+    assert asyncio.run(get_line()) == pyficache.getline(test_file, 2)
@@ -0,0 +1,74 @@
+"Unit test for column-wise code position tables (pytest version)"
+
+import pytest
+
+from pyficache import CodePositionTable, position_for_offset
+
+
+def sample(a, b):
+    c = a + b
+    return (
+        c * 2
+    )
+
+
+if not hasattr(sample.__code__, "co_positions"):
+    pytest.skip("code objects have no co_positions()", allow_module_level=True)
+
+
+def test_position_table():
+    code = sample.__code__
+    table = CodePositionTable(code)
+    positions = list(code.co_positions())
+    assert 0 < len(table) <= len(positions)
+
+    for i, (start_line, end_line, start_column, end_column) in enumerate(positions):
+        assert table.span_for_offset(2 * i) == (
+            start_line,
+            start_column,
+            end_line,
+            end_column,
+        )
+    assert table.span_for_offset(-2) is None
+    assert table.span_for_offset(len(code.co_code)) is None
+
+    rows = table.rows_between(0, len(code.co_code))
+    assert list(rows) == list(range(len(table)))
+    first_line = code.co_firstlineno
+    assert {table.span(i)[0] for i in rows} >= {first_line + 1, first_line + 2}
+
+
+def test_position_table_numpy():
+    numpy = pytest.importorskip("numpy")
+    table = CodePositionTable(sample.__code__)
+    views = table.numpy_views()
+    assert list(views["offsets"]) == list(table.offsets)
+    assert numpy.all(numpy.diff(views["offsets"]) > 0)
+
+
+def test_position_for_offset():
+    import sys
+
+    from pyficache.position_table import code_position_tables
+
+    frame = sys._getframe()
+    lasti, lineno = frame.f_lasti, frame.f_lineno
+    span = position_for_offset(frame.f_code, lasti)
+    assert span is not None
+    assert span[0] == lineno
+    assert frame.f_code in code_position_tables
+    assert position_for_offset(frame.f_code, 1 << 20) is None
+
+
+def test_code_position_cache_uses_table():
+    from pyficache.code_positions import code_position_cache
+    from pyficache.position_table import code_position_table
+
+    code = sample.__code__
+    info = code_position_cache[code]
+    assert info.table is code_position_table(code)
+    # The dictionary form is built only when it is asked for.
+    assert info.dicts is None
+    first_line = code.co_firstlineno
+    assert first_line + 1 in {line for line, _ in info.lineno_and_offset}
+    assert info.dicts is not None
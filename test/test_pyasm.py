@@ -1,7 +1,14 @@
 #
 "Unit test for remapping lines pyficache (pytest version)"
 import os.path as osp
-from pyficache import get_pyasm_line
+import py_compile
+
+from pygments.token import Error, Keyword, Text, Whitespace
+from xdis.version_info import PYTHON_VERSION_TRIPLE
+
+import pyficache
+from pyficache import FastPyasmLexer, PyasmLexer, get_pyasm_line
+from pyficache.pyasm_stream import StreamingPyasmFile
 
 TEST_DIR = osp.abspath(osp.dirname(__file__))
 
@@ -12,3 +19,174 @@ def test_remap():
     expected_line2 = "  2:           2 |67 01| RETURN_CONST         (7)"
     assert line == expected_line2
     assert pyasm_line_index == 61
+
+
+def test_pyasm_mapping_is_cached():
+    pyasm_path = osp.join(TEST_DIR, "seven-313.pyasm")
+    get_pyasm_line(pyasm_path, location=2, is_source_line=True)
+    file_info = pyficache.main.file_cache[pyasm_path]
+    pyasm_mapping = file_info.pyasm_mapping
+    from_to_pairs = pyficache.main.file2file_remap_lines[pyasm_path].from_to_pairs
+
+    # Further lookups reuse the mapping and don't grow the line remapping.
+    line, pyasm_line_index = get_pyasm_line(
+        pyasm_path, location=4, offset=16, is_source_line=True
+    )
+    assert pyasm_line_index == 37
+    assert line.startswith("  4:          16 ")
+    assert pyficache.size(pyasm_path) == 4
+    assert file_info.pyasm_mapping is pyasm_mapping
+    remap_line_entry = pyficache.main.file2file_remap_lines[pyasm_path]
+    assert remap_line_entry.from_to_pairs == from_to_pairs
+
+    line, _ = get_pyasm_line(
+        pyasm_path, location=2, is_source_line=True, opts={"style": "tango"}
+    )
+    assert "RETURN_CONST" in line
+    assert ("tango", 60) in file_info.pyasm_highlighted_lines
+
+
+def test_pyasm_reverse_mapping():
+    pyasm_path = osp.join(TEST_DIR, "seven-313.pyasm")
+    assert pyficache.get_pyasm_location(pyasm_path, 37) == (4, 16, "<module>")
+    assert pyficache.get_pyasm_location(pyasm_path, 61) == (2, 2, "seven")
+    # Comment lines are not instructions.
+    assert pyficache.get_pyasm_location(pyasm_path, 1) is None
+
+    # Line 1 has instructions both in <module> and in seven()
+    pyasm_lines = pyficache.get_pyasm_lines_for_source(pyasm_path, 1)
+    assert {pyficache.get_pyasm_location(pyasm_path, i)[2] for i in pyasm_lines} == {
+        "<module>",
+        "seven",
+    }
+    pyasm_lines = pyficache.get_pyasm_lines_for_source(pyasm_path, 2, 4)
+    assert pyasm_lines[0] == 37 and pyasm_lines[-1] == 61
+
+
+def test_pyasm_jump_targets():
+    # Instructions that are jump targets, marked ">>", are mapped like any
+    # other instruction. So are lines past 99, which have no leading space.
+    pyasm_lines = [
+        "  3:           0 |97 00| RESUME               0\n",
+        "               2 |7c 00| LOAD_FAST            (x)\n",
+        "  4:     >>    4 |67 01| RETURN_CONST         (7)\n",
+        "          >>   6 |67 02| RETURN_CONST         (8)\n",
+        "105:           8 |67 00| RETURN_CONST         (None)\n",
+    ]
+    from_to_pairs, line_offset_to_remapped_line = (
+        pyficache.pyasm.compute_pyasm_line_mapping(pyasm_lines)
+    )
+    assert from_to_pairs == ((3, 1), (4, 3), (105, 5))
+    assert line_offset_to_remapped_line == {
+        (3, 0): 1,
+        (3, 2): 2,
+        (4, 4): 3,
+        (4, 6): 4,
+        (105, 8): 5,
+    }
+
+
+def test_fast_pyasm_lexer():
+    with open(osp.join(TEST_DIR, "seven-313.pyasm")) as fp:
+        text = fp.read()
+
+    def significant_tokens(lexer):
+        return [
+            (token_type, value)
+            for token_type, value in lexer.get_tokens(text)
+            if token_type is not Error and token_type not in (Text, Whitespace)
+        ]
+
+    fast_tokens = significant_tokens(FastPyasmLexer(restrict_to_version=True))
+    assert fast_tokens == significant_tokens(PyasmLexer())
+    assert (Keyword, "RETURN_CONST") in fast_tokens
+
+    # RETURN_CONST is not an opcode in Python 3.14
+    text = text.replace("Python bytecode 3.13.0", "Python bytecode 3.14.0")
+    assert (Keyword, "RETURN_CONST") not in significant_tokens(
+        FastPyasmLexer(restrict_to_version=True)
+    )
+
+
+def test_code_pyasm(tmp_path):
+    def seven(x):
+        if x:
+            return 7
+        return 8
+
+    code = seven.__code__
+    listing = pyficache.code_pyasm(code)
+    assert pyficache.code_pyasm(code) is listing
+    pyasm_line_to_location = listing.pyasm_mapping.pyasm_line_to_location
+    assert listing.offset_to_pyasm_line[0] in pyasm_line_to_location
+
+    line, pyasm_line_index = pyficache.get_code_pyasm_line(code, 0)
+    assert "RESUME" in line or PYTHON_VERSION_TRIPLE < (3, 11)
+    _, _, code_name = pyasm_line_to_location[pyasm_line_index]
+    assert code_name == "seven"
+    assert pyficache.get_code_pyasm_line(code, 10_000) == (None, -1)
+
+    pyc_path = str(tmp_path / "devious.pyc")
+    py_compile.compile(osp.join(TEST_DIR, "devious.py"), cfile=pyc_path)
+    listing = pyficache.pyc_code_pyasm(pyc_path)
+    assert listing.pyasm_mapping.pyasm_line_to_location
+    assert pyficache.pyc_code_pyasm(pyc_path, "no-such-code") is None
+
+
+def test_stream_pyasm_file():
+    pyasm_path = osp.join(TEST_DIR, "seven-313.pyasm")
+    streaming = pyficache.stream_pyasm_file(
+        pyasm_path, background=False, chunk_size=64
+    )
+    try:
+        assert streaming.wait(0)
+        line, pyasm_line_index = get_pyasm_line(
+            pyasm_path, location=2, is_source_line=True
+        )
+        assert line == "  2:           2 |67 01| RETURN_CONST         (7)"
+        assert pyasm_line_index == 61
+        line, _ = get_pyasm_line(pyasm_path, location=36, is_source_line=False)
+        assert line.startswith("  4:          16 ")
+    finally:
+        pyficache.unstream_pyasm_file(pyasm_path)
+
+
+def test_stream_pyasm_file_resume():
+    pyasm_path = osp.join(TEST_DIR, "seven-313.pyasm")
+    streaming = StreamingPyasmFile(pyasm_path, chunk_size=64)
+    streaming.index_chunk()
+
+    # Only the header has been indexed so far.
+    assert streaming.line(1).startswith("# Decompiled from")
+    assert streaming.pyasm_line_for(2) == -1
+    assert streaming.line(61) is None
+
+    streaming.start()
+    assert streaming.wait(10)
+    assert streaming.pyasm_line_for(2) == 61
+    assert streaming.line(61).startswith("  2:")
+    streaming.close()
+
+
+def test_stream_pyasm_file_crlf(tmp_path):
+    # Lines from a streaming file end the same way as lines read into the
+    # file cache, whatever the file's line endings.
+    with open(osp.join(TEST_DIR, "seven-313.pyasm"), "rb") as fp:
+        data = fp.read()
+    pyasm_path = str(tmp_path / "seven-313.pyasm")
+    with open(pyasm_path, "wb") as fp:
+        fp.write(data.replace(b"\n", b"\r\n"))
+
+    expected = [
+        get_pyasm_line(pyasm_path, 2, is_source_line=True, opts=opts)
+        for opts in ({"strip_nl": True}, {"strip_nl": False})
+    ]
+    assert expected[1][0].endswith(" (7)\n")
+    pyficache.stream_pyasm_file(pyasm_path, background=False)
+    try:
+        assert [
+            get_pyasm_line(pyasm_path, 2, is_source_line=True, opts=opts)
+            for opts in ({"strip_nl": True}, {"strip_nl": False})
+        ] == expected
+    finally:
+        pyficache.unstream_pyasm_file(pyasm_path)
@@ -171,6 +171,485 @@ class TestPyFiCache:
         expected = {2, 5, 6, 7, 9} if IS_GRAAL else {0, 2, 5, 7, 9}
         assert expected == pyficache.trace_line_numbers(test_file)
 
+    def test_code_analysis_shared(self):
+        test_file = osp.join(TEST_DIR, "devious.py")
+        line_nums = pyficache.trace_line_numbers(test_file)
+        linecache_info = pyficache.get_linecache_info(test_file)
+        analysis = linecache_info.code_analysis
+        assert analysis is not None
+        assert analysis.line_number_set == line_nums
+        assert "<module>" in linecache_info.code_map
+
+        pyficache.clear_file_cache()
+        file_info = pyficache.code_lines(test_file)
+        assert set(file_info.line_numbers.keys()) <= line_nums
+        assert file_info.linestarts[0] == 0
+
+    @pytest.mark.skipif(IS_GRAAL, reason="GraalVM line tables differ")
+    def test_valid_lines(self):
+        test_file = osp.join(TEST_DIR, "devious.py")
+        valid_lines = pyficache.get_valid_lines(test_file)
+        assert set(valid_lines) == pyficache.trace_line_numbers(test_file)
+        assert 5 in valid_lines and 6 not in valid_lines and 100 not in valid_lines
+        assert valid_lines.next_valid_line(3) == 5
+        assert valid_lines.next_valid_line(5) == 5
+        assert valid_lines.next_valid_line(10) is None
+        assert valid_lines.previous_valid_line(4) == 2
+        assert valid_lines.previous_valid_line(100) == 9
+
+        assert pyficache.resolve_breakpoint_lines(test_file, [1, 3, 6, 9, 10]) == {
+            1: 2,
+            3: 5,
+            6: 7,
+            9: 9,
+            10: None,
+        }
+        assert pyficache.resolve_breakpoint_lines(test_file, [6], forward=False) == {
+            6: 5
+        }
+
+    def test_breakpoint_code_offsets(self, tmp_path, monkeypatch):
+        import importlib.util
+
+        source_path = str(tmp_path / "breakpoints.py")
+        with open(source_path, "w") as fp:
+            fp.write(
+                "def f(n):\n"
+                "    for i in range(n):\n"
+                "        n += i\n"
+                "    return n\n"
+                "from os.path import join\n"
+                "class C:\n"
+                "    def g(self):\n"
+                "        return join('a')\n"
+            )
+
+        def load_module():
+            spec = importlib.util.spec_from_file_location("breakpoints", source_path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+            return module
+
+        module = load_module()
+        # Nothing is found until the module is loaded.
+        assert pyficache.breakpoint_code_offsets(source_path, 3) == []
+        monkeypatch.setitem(sys.modules, "breakpoints", module)
+
+        code_offsets = pyficache.breakpoint_code_offsets(source_path, 3)
+        assert len(code_offsets) == 1
+        code, offsets = code_offsets[0]
+        assert code is module.f.__code__ and len(offsets) > 0
+        assert pyficache.breakpoint_code_offsets(source_path, 100) == []
+        # The def line starts code in both the module and the function, but
+        # the module code object is only found if it is given.
+        code_offsets = pyficache.breakpoint_code_offsets(source_path, 1)
+        assert len(code_offsets) == 1 and code_offsets[0][0] is module.f.__code__
+        with open(source_path) as fp:
+            module_code = compile(fp.read(), source_path, "exec")
+        code_offsets = pyficache.breakpoint_code_offsets(
+            source_path, 1, live=module_code
+        )
+        assert [code.co_name for code, _ in code_offsets] == ["<module>", "f"]
+        assert code_offsets[0][0] is module_code
+        assert any(code is code_offsets[1][0] for code in module_code.co_consts)
+
+        codes = pyficache.codes_to_instrument(source_path, [2, 3, 4])
+        assert len(codes) == 1 and next(iter(codes)) is module.f.__code__
+        assert set(offsets) <= codes[module.f.__code__]
+
+        # Methods are found through their class.
+        code_offsets = pyficache.breakpoint_code_offsets(source_path, 8)
+        assert [code for code, _ in code_offsets] == [module.C.g.__code__]
+        assert code_offsets[0][0] is module.C.g.__code__
+
+        # The table is built once, until the module is imported again.
+        assert pyficache.breakpoint_code_offsets(source_path, 8) is code_offsets
+        module = load_module()
+        monkeypatch.setitem(sys.modules, "breakpoints", module)
+        code_offsets = pyficache.breakpoint_code_offsets(source_path, 3)
+        assert code_offsets[0][0] is module.f.__code__
+
+    def test_analysis_store(self, tmp_path, monkeypatch):
+        import pyficache.analysis_store as analysis_store
+
+        source_path = str(tmp_path / "stored.py")
+        with open(source_path, "w") as fp:
+            fp.write("def f(n):\n    n += 1\n\n    return n\n")
+        store_dir = str(tmp_path / "store")
+        pyficache.set_analysis_store(store_dir)
+        try:
+            tables = pyficache.get_code_tables(source_path)
+            assert len(os.listdir(store_dir)) == 1
+            assert ("f", 1) in tables.code_keys
+
+            # A new process would read the saved tables rather than
+            # compile the file.
+            pyficache.clear_file_cache()
+
+            def no_analysis(path):
+                raise AssertionError(f"{path} should not have been analyzed")
+
+            monkeypatch.setattr(analysis_store, "analyze_file", no_analysis)
+            assert pyficache.get_valid_lines(source_path).next_valid_line(3) == 4
+            code_keys = pyficache.breakpoint_code_keys(source_path, 2)
+            assert [key for key, _ in code_keys] == [("f", 1)]
+            if tables.position_table(("f", 1)) is not None:
+                position_table = pyficache.get_code_tables(
+                    source_path
+                ).position_table(("f", 1))
+                assert list(position_table) == list(tables.position_table(("f", 1)))
+
+            # A failed save leaves no temporary file behind.
+            def failing_replace(src, dst):
+                raise OSError("replace failed")
+
+            monkeypatch.setattr(analysis_store.os, "replace", failing_replace)
+            for name in os.listdir(store_dir):
+                os.remove(osp.join(store_dir, name))
+            analysis_store.save_code_tables(tables)
+            assert os.listdir(store_dir) == []
+        finally:
+            pyficache.set_analysis_store(None)
+
+    def test_code_tables_lazy_positions(self, tmp_path):
+        source_path = str(tmp_path / "lazy.py")
+        with open(source_path, "w") as fp:
+            fp.write("def f(n):\n    return n\n\ndef g():\n    pass\n")
+        pyficache.set_analysis_store(None)
+        tables = pyficache.get_code_tables(source_path)
+        assert pyficache.get_valid_lines(source_path).next_valid_line(1) == 1
+
+        # Without a store, no position table is made until one is asked for.
+        assert tables.position_tables == {}
+        if tables.position_codes:
+            assert tables.position_table(("f", 1)) is not None
+            assert list(tables.position_tables) == [("f", 1)]
+            assert len(tables.all_position_tables()) == len(tables.code_keys)
+            assert tables.position_codes == {}
+        assert tables.position_table(("nonesuch", 1)) is None
+
+    def test_warm_up(self, tmp_path):
+        from pyficache.warmup import warm_up
+
+        source_dir = tmp_path / "project"
+        (source_dir / "package").mkdir(parents=True)
+        (source_dir / "top.py").write_text("x = 1\n")
+        (source_dir / "package" / "mod.py").write_text("def f():\n    return 2\n")
+        (source_dir / "package" / "bad.py").write_text("def (\n")
+
+        pyficache.set_analysis_store(str(tmp_path / "store"))
+        try:
+            calls = []
+            stats = warm_up(
+                [str(source_dir)],
+                jobs=2,
+                progress=lambda done, total, path: calls.append((done, total)),
+            )
+            assert (stats.files, stats.analyzed, stats.from_store) == (3, 2, 0)
+            assert list(stats.failed) == [str(source_dir / "package" / "bad.py")]
+            assert calls[-1] == (3, 3)
+            mod_path = str(source_dir / "package" / "mod.py")
+            assert pyficache.file_cache[mod_path].code_tables.code_keys == [
+                ("<module>", 1),
+                ("f", 1),
+            ]
+
+            pyficache.clear_file_cache()
+            stats = warm_up([str(source_dir)], update_file_cache=False)
+            assert (stats.analyzed, stats.from_store) == (0, 2)
+            assert not pyficache.is_cached(mod_path)
+        finally:
+            pyficache.set_analysis_store(None)
+
+    def test_warm_up_cli(self, tmp_path, capsys):
+        import subprocess
+
+        from pyficache.warmup import main_cli
+
+        source_path = tmp_path / "top.py"
+        source_path.write_text("x = 1\n")
+        # Without a store, the work would be thrown away.
+        with pytest.raises(SystemExit) as exc_info:
+            main_cli(["-q", str(source_path)])
+        assert exc_info.value.code == 2
+        assert "no analysis store" in capsys.readouterr().err
+
+        env = dict(os.environ, PYTHONPATH=top_builddir, PYTHONWARNINGS="default")
+        env.pop("PYFICACHE_ANALYSIS_STORE", None)
+        process = subprocess.run(
+            [sys.executable, "-m", "pyficache.warmup", "-q"]
+            + ["--store", str(tmp_path / "store"), str(source_path)],
+            capture_output=True,
+            env=env,
+            text=True,
+        )
+        assert process.returncode == 0, process.stderr
+        assert "1 analyzed" in process.stdout
+        assert "RuntimeWarning" not in process.stderr
+
+    def test_code_position_cache_released(self):
+        import gc
+
+        def devious_codes() -> int:
+            return len(
+                [
+                    code
+                    for code in pyficache.code_position_cache.keys()
+                    if code.co_filename.endswith("devious.py")
+                ]
+            )
+
+        test_file = osp.join(TEST_DIR, "devious.py")
+        analysis = pyficache.get_linecache_info(test_file).code_analysis
+        # Positions are analyzed only when they are looked up.
+        assert devious_codes() == 0
+        position_info = pyficache.code_position_cache[analysis.code]
+        assert position_info.parent is None
+        assert pyficache.code_position_cache.get(analysis.code) is position_info
+        assert devious_codes() == 1
+        assert pyficache.code_position_cache_stats()["positions"] > 0
+        del analysis, position_info
+
+        pyficache.clear_file_cache()
+        gc.collect()
+        assert devious_codes() == 0
+
+        import pyficache.code_positions as code_positions
+
+        old_maxsize = code_positions.code_position_cache_maxsize
+        code_positions.code_position_cache_maxsize = 2
+        try:
+            line_info = pyficache.update_code_position_cache(__file__)
+            for code_offsets in line_info.values():
+                for code, _ in code_offsets:
+                    pyficache.code_position_cache[code]
+            assert len(pyficache.code_position_cache) == 2
+            assert pyficache.code_position_cache_stats()["code_objects"] == 2
+
+            # Eviction is least recently used, not least recently added.
+            first, second = pyficache.code_position_cache.keys()
+            pyficache.code_position_cache.get(first)
+            pyficache.code_position_cache[(lambda: None).__code__]
+            assert list(pyficache.code_position_cache)[0] is first
+            assert second not in pyficache.code_position_cache
+        finally:
+            code_positions.code_position_cache_maxsize = old_maxsize
+
+    def test_pycache_code(self, tmp_path):
+        from py_compile import PycInvalidationMode, compile
+
+        from pyficache.pycache import load_pycache_code, load_source_code
+
+        source_path = str(tmp_path / "pycache_module.py")
+        with open(source_path, "w") as fp:
+            fp.write("x = 1\n")
+        assert load_pycache_code(source_path) is None
+
+        for invalidation_mode in (
+            PycInvalidationMode.TIMESTAMP,
+            PycInvalidationMode.CHECKED_HASH,
+        ):
+            compile(source_path, invalidation_mode=invalidation_mode)
+            code = load_pycache_code(source_path)
+            assert code is not None and code.co_name == "<module>"
+
+        # A changed source makes the .pyc stale.
+        with open(source_path, "w") as fp:
+            fp.write("x = 2\ny = 3\n")
+        assert load_pycache_code(source_path) is None
+        assert 3 in load_source_code(source_path).co_consts
+
+    def test_bytecode_code_lines(self, tmp_path, monkeypatch):
+        from py_compile import compile
+
+        import pyficache.analysis_store as analysis_store
+
+        source_path = str(tmp_path / "compiled.py")
+        with open(source_path, "w") as fp:
+            fp.write("x = 1\n\ndef f(n):\n    return n\n")
+        bytecode_path = compile(source_path, cfile=str(tmp_path / "compiled.pyc"))
+
+        file_info = pyficache.code_lines(bytecode_path)
+        source_info = pyficache.code_lines(source_path)
+        assert sorted(file_info.line_numbers) == sorted(source_info.line_numbers)
+        assert file_info.code_tables.tag.startswith("pyc-")
+        for offset, line_number in source_info.linestarts.items():
+            assert pyficache.code_offset_info(bytecode_path, offset) == line_number
+        assert 4 in pyficache.get_valid_lines(bytecode_path)
+
+        # The tables are kept, so the file is not analyzed again.
+        def no_analysis(path):
+            raise AssertionError(f"{path} should not have been analyzed")
+
+        monkeypatch.setattr(analysis_store, "analyze_file", no_analysis)
+        assert pyficache.code_lines(bytecode_path).code_tables is file_info.code_tables
+        assert pyficache.code_lines(str(tmp_path / "missing.pyc")) is None
+
+    def test_frame_source(self):
+        def current_frame():
+            return sys._getframe()
+
+        frame = current_frame()
+        frame_info = pyficache.frame_source(frame, context=1)
+        assert frame_info.filename == osp.realpath(__file__).replace(".pyc", ".py")
+        assert frame_info.line_number == frame.f_lineno
+        assert frame_info.first_line == frame.f_lineno - 1
+        assert len(frame_info.lines) == 3
+        assert frame_info.lines[frame_info.current_index] == frame_info.source_line
+        assert frame_info.source_line == "            return sys._getframe()"
+        if frame_info.span is not None:
+            marker = frame_info.marker()
+            assert marker.startswith(" " * 12) and set(marker.strip()) == {"^"}
+
+        styled = pyficache.frame_source(frame, context=1, style="emacs")
+        assert styled.line_number == frame_info.line_number
+        assert styled.lines != frame_info.lines
+
+    def test_open_view(self, tmp_path):
+        test_file = osp.join(TEST_DIR, "devious.py")
+        for opts in ({}, {"style": "emacs", "output": "terminal"}):
+            view = pyficache.open_view(test_file, opts)
+            assert len(view) == pyficache.maxline(test_file)
+            for line_number in range(len(view) + 2):
+                assert view.line(line_number) == pyficache.getline(
+                    test_file, line_number, opts
+                )
+            assert view.lines(2, 4) == [view.line(i) for i in range(2, 5)]
+        assert pyficache.open_view(str(tmp_path / "missing.py")) is None
+
+        # A view follows changes to its file.
+        path = str(tmp_path / "changing.py")
+        with open(path, "w") as fp:
+            fp.write("a = 1\n")
+        view = pyficache.open_view(path)
+        assert view.line(1) == "a = 1"
+        with open(path, "w") as fp:
+            fp.write("b = 2\nc = 3\n")
+        pyficache.checkcache(path)
+        assert view.line(1) == "b = 2" and len(view) == 2
+
+    def test_getline_range(self):
+        test_file = osp.join(TEST_DIR, "devious.py")
+        opts = {"style": "emacs", "output": "terminal"}
+        range_lines = pyficache.getline_range(test_file, 2, 5, opts)
+        assert [line.line_number for line in range_lines] == [2, 3, 4, 5]
+        assert [line.text for line in range_lines] == [
+            pyficache.getline(test_file, line_number, opts)
+            for line_number in range(2, 6)
+        ]
+        window = pyficache.getline_window(test_file, 3, 1, 100)
+        assert window[0].line_number == 2
+        assert window[-1].line_number == pyficache.maxline(test_file)
+        assert pyficache.getline_range("missing-file.py", 1, 2) is None
+
+        # Lazily highlighted, only the range is formatted.
+        pyficache.clear_file_cache()
+        lazy_lines = pyficache.getline_range(
+            test_file, 2, 5, dict(opts, lazy_highlight=True)
+        )
+        assert [line.text for line in lazy_lines] == [
+            line.text for line in range_lines
+        ]
+        assert "emacs" not in pyficache.file_cache[test_file].lines
+
+    def test_cache_files(self):
+        test_files = [
+            osp.join(TEST_DIR, name) for name in ("devious.py", "short-file")
+        ]
+        opts = {"style": "emacs", "output": "terminal"}
+        cached = pyficache.cache_files(test_files + ["missing-file.py"], opts)
+        assert cached == {
+            test_files[0]: test_files[0],
+            test_files[1]: test_files[1],
+            "missing-file.py": None,
+        }
+        for test_file in test_files:
+            assert "emacs" in pyficache.file_cache[test_file].lines
+
+        pyficache.clear_file_cache()
+        try:
+            raise ValueError()
+        except ValueError:
+            traceback = sys.exc_info()[2]
+        this_file = osp.realpath(__file__).replace(".pyc", ".py")
+        assert pyficache.cache_frame_files(traceback) == {__file__: this_file}
+        assert __file__ in pyficache.cache_frame_files(sys._getframe())
+
+    def test_cache_files_with_checkcache(self):
+        import glob
+        import threading
+
+        # Worker threads and another thread update the cache at once.
+        paths = sorted(glob.glob(osp.join(osp.dirname(pyficache.__file__), "*.py")))
+        errors = []
+        done = threading.Event()
+
+        def check():
+            while not done.is_set():
+                try:
+                    pyficache.checkcache()
+                except Exception as exc:
+                    errors.append(exc)
+                pass
+
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        checker = threading.Thread(target=check)
+        checker.start()
+        try:
+            for _ in range(30):
+                pyficache.clear_file_cache()
+                cached = pyficache.cache_files(paths, {"reload_on_change": True})
+                assert None not in cached.values()
+        finally:
+            done.set()
+            checker.join()
+            sys.setswitchinterval(switch_interval)
+        assert errors == []
+
+    def test_decompiled_source(self, tmp_path):
+        from py_compile import compile
+
+        import pyficache.decompiled as decompiled
+
+        source_path = str(tmp_path / "sourceless.py")
+        with open(source_path, "w") as fp:
+            fp.write("x = 1\ny = 2\n")
+        compile(source_path, cfile=source_path + "c")
+        os.remove(source_path)
+
+        calls = []
+
+        def decompile(bytecode_path):
+            calls.append(bytecode_path)
+            # The decompiled source has a header line.
+            return "# decompiled\nx = 1\ny = 2\n", [(2, 1), (3, 2)]
+
+        pyficache.set_decompiled_store(str(tmp_path / "decompiled"))
+        pyficache.register_decompiler("test", decompile)
+        try:
+            assert pyficache.getline(source_path, 2) == "y = 2"
+            assert calls == [source_path + "c"]
+
+            # A new session reads the saved source instead of decompiling.
+            pyficache.clear_file_cache()
+            decompiled.decompiled_sources.clear()
+            assert pyficache.getline(source_path, 1) == "x = 1"
+            assert len(calls) == 1
+
+            # A store that cannot be written does not lose the decompiled
+            # source.
+            not_a_directory = tmp_path / "not-a-directory"
+            not_a_directory.write_text("")
+            pyficache.set_decompiled_store(str(not_a_directory / "store"))
+            pyficache.clear_file_cache()
+            assert pyficache.getline(source_path, 2) == "y = 2"
+            assert len(calls) == 2
+            assert decompiled.undecompilable == {}
+        finally:
+            pyficache.register_decompiler("test", None)
+            pyficache.set_decompiled_store(decompiled.default_decompiled_store())
+
     def test_sha1(self):
         test_file = osp.join(TEST_DIR, "short-file")
         assert pyficache.sha1(test_file) == "1134f95ea84a3dcc67d7d1bf41390ee1a03af6d2"
@@ -212,3 +691,63 @@ class TestPyFiCache:
             )
         for path, expect in testdata:
             assert pyficache.resolve_name_to_path(path) == expect
+
+    def test_resolve_name_to_path_cache(self):
+        # A name that can't be found is remembered as such.
+        name = "no_such_module_for_pyficache"
+        assert pyficache.resolve_name_to_path(name) == name
+        assert pyficache.main._resolve_cache[name] == name
+
+        # Changing sys.path invalidates remembered resolutions.
+        sys.path.append(TEST_DIR)
+        try:
+            assert pyficache.resolve_name_to_path("devious") == osp.join(
+                TEST_DIR, "devious.py"
+            )
+            assert name not in pyficache.main._resolve_cache
+        finally:
+            sys.path.remove(TEST_DIR)
+
+    def test_relative_name_in_sys_path(self):
+        sys.path.append(TEST_DIR)
+        try:
+            assert pyficache.update_cache("short-file")
+            assert pyficache.main.find_in_sys_path("no-such-file") is None
+        finally:
+            sys.path.remove(TEST_DIR)
+
+    def test_dot_relative_names(self, monkeypatch):
+        monkeypatch.chdir(top_builddir)
+        assert pyficache.update_cache("./test/short-file") == "./test/short-file"
+        assert pyficache.getline("./test/short-file", 1) == (
+            "# This is a small test file."
+        )
+        pyficache.clear_file_cache()
+        monkeypatch.chdir(TEST_DIR)
+        assert pyficache.update_cache("../test/short-file") == "../test/short-file"
+
+    def test_sys_path_new_file(self, tmp_path, monkeypatch):
+        (tmp_path / "lib").mkdir()
+        (tmp_path / "lib" / "a.txt").write_text("a\n")
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.syspath_prepend("lib")
+        assert pyficache.getline("a.txt", 1) == "a"
+        assert pyficache.getline("b.txt", 1) is None
+        # Files added to a sys.path directory after it was listed are found.
+        (tmp_path / "lib" / "b.txt").write_text("b\n")
+        assert pyficache.getline("b.txt", 1) == "b"
+
+    def test_file_aliases(self):
+        old_dir = os.getcwd()
+        os.chdir(TEST_DIR)
+        try:
+            pyficache.update_cache("short-file")
+            pyficache.update_cache(osp.join(TEST_DIR, "short-file"))
+            assert pyficache.cached_files() == ["short-file"]
+            assert pyficache.is_cached(osp.join(TEST_DIR, "short-file"))
+
+            pyficache.clear_file_cache("short-file")
+            assert pyficache.cached_files() == []
+            assert not pyficache.is_cached(osp.join(TEST_DIR, "short-file"))
+        finally:
+            os.chdir(old_dir)
@@ -43,3 +43,31 @@ def test_remap():
     # remapping by pattern
     add_remap_pat("^/code", "/tmp/project")
     assert remap_file_pat("/code/setup.py") == "/tmp/project/setup.py"
+
+
+def test_remap_snapshot(tmp_path):
+    import pyficache
+    import pyficache.main
+
+    mapped_path = os.path.join(TEST_DIR, "mapped.py")
+    unmapped_path = os.path.join(TEST_DIR, "unmapped.py")
+    pyficache.clear_file_cache()
+    remap_file_lines(unmapped_path, mapped_path, ((1, 3), (4, 5)))
+    pyficache.remap_file(unmapped_path, "unmapped-alias")
+    add_remap_pat("^/snapshot", "/tmp/snapshot", clear_remap=False)
+    snapshot_path = str(tmp_path / "remap.snapshot")
+    pyficache.save_remap_snapshot(snapshot_path)
+
+    pyficache.clear_file_cache()
+    pyficache.main.remap_re_hash.clear()
+    pyficache.load_remap_snapshot(snapshot_path)
+
+    # Line remappings are read only when looked up.
+    assert dict.get(pyficache.main.file2file_remap_lines, mapped_path) is None
+    assert mapped_path in pyficache.main.file2file_remap_lines
+    remap_entry = pyficache.main.file2file_remap_lines.get(mapped_path)
+    assert remap_entry.mapped_path == unmapped_path
+    assert remap_entry.from_to_pairs == ((1, 3), (4, 5))
+
+    assert pyficache.unmap_file("unmapped-alias") == unmapped_path
+    assert remap_file_pat("/snapshot/setup.py") == "/tmp/snapshot/setup.py"